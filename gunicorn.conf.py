@@ -0,0 +1,19 @@
+# gunicorn.conf.py - GUNICORN + UVICORN WORKERS FOR THE ASGI APP
+# Run: gunicorn invoice_maker.asgi:application -c gunicorn.conf.py
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Each uvicorn worker is one event loop; Drive calls run on its own bounded
+# thread pool (DRIVE_MAX_CONCURRENCY), so a few processes serve many parents.
+worker_class = 'uvicorn.workers.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+
+# Slow parent connections and large PDFs: don't kill a worker mid-download
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
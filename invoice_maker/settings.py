@@ -113,6 +113,77 @@ DATABASES = {
 #         }
 #     }
 
+# Cache
+# "drive" holds Drive folder IDs shared by every gunicorn worker. File-based by
+# default; point DRIVE_CACHE_BACKEND/DRIVE_CACHE_LOCATION at Redis in production
+# (e.g. django.core.cache.backends.redis.RedisCache, redis://127.0.0.1:6379/1)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'drive': {
+        'BACKEND': os.environ.get('DRIVE_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('DRIVE_CACHE_LOCATION', os.path.join(BASE_DIR, 'drive_cache')),
+    },
+}
+
+DRIVE_CACHE_ALIAS = 'drive'
+DRIVE_FOLDER_CACHE_TTL = 60 * 60           # Found folder IDs: 1 hour
+DRIVE_FOLDER_CACHE_NEGATIVE_TTL = 5 * 60   # "Folder not found" answers: 5 minutes
+DRIVE_FOLDER_SNAPSHOT_TTL = 60 * 60        # Whole-tree term/class folder snapshot: 1 hour
+DRIVE_METADATA_CACHE_TTL = 2 * 60          # File metadata from batched files().get/list: 2 minutes
+DRIVE_METADATA_CACHE_NEGATIVE_TTL = 30      # "File not found" answers: 30 seconds
+DOWNLOAD_GRANT_TTL = 6 * 60 * 60           # /download/ serves files a search returned for 6 hours (indexed ones always)
+
+# Downloaded report card PDFs, kept on disk and evicted least-recently-used first
+REPORT_CARD_CACHE_DIR = os.environ.get('REPORT_CARD_CACHE_DIR', os.path.join(BASE_DIR, 'report_card_cache'))
+REPORT_CARD_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CARD_CACHE_MAX_BYTES', 2 * 1024 ** 3))  # 2 GB
+
+# Server-rendered report card PDFs (manage.py render_report_cards), laid out like the Drive tree
+REPORT_CARD_RENDER_DIR = os.environ.get('REPORT_CARD_RENDER_DIR', os.path.join(BASE_DIR, 'rendered_report_cards'))
+
+# Batch term bills / term-end accounts (manage.py generate_invoices)
+INVOICE_OUTPUT_DIR = os.environ.get('INVOICE_OUTPUT_DIR', os.path.join(BASE_DIR, 'invoices'))
+
+# Async search/preview/download views: Drive calls in flight per worker process,
+# and how many more may queue before parents get a 503 "try again"
+DRIVE_MAX_CONCURRENCY = int(os.environ.get('DRIVE_MAX_CONCURRENCY', 16))
+DRIVE_MAX_WAITING = int(os.environ.get('DRIVE_MAX_WAITING', 500))
+
+# Keep-alive connections to Drive shared by every thread of a worker (drive_transport.py);
+# threads beyond the pool wait for a free connection instead of opening more
+DRIVE_HTTP_POOL_SIZE = int(os.environ.get('DRIVE_HTTP_POOL_SIZE', DRIVE_MAX_CONCURRENCY))
+DRIVE_HTTP_TIMEOUT = 60  # Seconds to wait for Drive to answer one request
+
+# Single-flight class listings: concurrent identical searches share one Drive call.
+# Threads in a process always coordinate; set DRIVE_SINGLE_FLIGHT_CACHE to a cache
+# alias with an atomic add() (Redis/Memcached) to also coordinate across workers.
+DRIVE_SINGLE_FLIGHT_CACHE = os.environ.get('DRIVE_SINGLE_FLIGHT_CACHE') or None
+DRIVE_SINGLE_FLIGHT_LOCK_TTL = 30    # Seconds before a crashed leader's lock expires
+DRIVE_SINGLE_FLIGHT_RESULT_TTL = 5   # Seconds a finished listing is shared with other workers
+
+# Deep search of nested class folders (e.g. SS1/SS1A) when a class folder has no
+# match of its own (deep_search.py): folders listed at once per worker process,
+# and how far the breadth-first walk may go
+DRIVE_DEEP_SEARCH_WORKERS = int(os.environ.get('DRIVE_DEEP_SEARCH_WORKERS', 8))
+DRIVE_DEEP_SEARCH_MAX_DEPTH = 3       # Levels of subfolders below the starting folder
+DRIVE_DEEP_SEARCH_MAX_FANOUT = 50     # Subfolders followed per folder
+DRIVE_DEEP_SEARCH_MAX_FOLDERS = 200   # Folders visited per search
+DRIVE_DEEP_SEARCH_TREE_TTL = 10 * 60  # Memoized subfolder tree: 10 minutes
+
+# Student IDs (student_ids.py): IDs from the first year the server allocator issued
+# carry a server checksum, so searches with a mistyped ID are rejected before any
+# Drive call. Years with browser-minted IDs (random checksums) are never rejected.
+# Set STUDENT_ID_CHECKSUM_FROM_YEAR to pin the cutover instead of reading it from the database.
+STUDENT_ID_CHECKSUM_FROM_YEAR = int(os.environ.get('STUDENT_ID_CHECKSUM_FROM_YEAR') or 0) or None
+STUDENT_ID_BULK_LIMIT = 1000  # Names per bulk allocation request
+
+# Bloom filter of known student IDs (id_filter.py): searches for IDs that were never
+# issued or indexed are answered without Drive once change tracking is running
+STUDENT_ID_FILTER_MAX_AGE = int(os.environ.get('STUDENT_ID_FILTER_MAX_AGE', 300))  # Seconds between rebuilds
+STUDENT_ID_FILTER_ERROR_RATE = 0.001  # Target false positive rate
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,363 @@
+// broadsheet_grid.js - VIRTUALIZED STAFF BROADSHEET (ONLY THE ROWS ON SCREEN ARE IN THE DOM)
+//
+// const grid = new BroadsheetGrid(document.getElementById('broadSheetTable'));
+// grid.addStudent()               -> appends to the column arrays; only the visible window is touched
+// grid.deleteStudent(index)       -> later rows shift in the model; only rendered rows are renumbered
+// grid.addSubject(name)           -> returns the subject id used by renameSubject/deleteSubject
+// grid.load({names, subjects})    -> replace everything at once (one render)
+// grid.compute()                  -> POST /api/broadsheet/ and fill TOTAL / GRADE / POSITION
+// grid.exportFile('csv' | 'xlsx') -> download the computed broadsheet
+//
+// Data is column-oriented: names[], one scores[] array per subject and one array
+// per result column, all indexed by row. Rows outside the viewport are replaced
+// by two spacer rows, so DOM work per add/delete/scroll depends on the window
+// height, not on the class size. Printing renders every row (beforeprint/afterprint).
+
+class BroadsheetGrid {
+    constructor(table, options = {}) {
+        this.table = table;
+        this.headerRow = table.tHead.rows[0];
+        this.body = table.tBodies[0];
+        this.apiUrl = options.apiUrl || '/api/broadsheet/';
+        this.rowHeight = options.rowHeight || 32;
+        this.overscan = options.overscan || 15;
+        this.onChange = options.onChange || null;
+
+        // ==================== MODEL ====================
+        this.ids = [];        // Stable row keys (survive deletes above them)
+        this.names = [];
+        this.subjects = [];   // [{id, name, scores: []}]
+        this.results = { total: [], grade: [], position: [] };
+        this.nextRowId = 1;
+        this.nextSubjectId = 0;
+
+        // ==================== VIEW ====================
+        this.rowElements = new Map();  // row id -> <tr> currently in the DOM
+        this.renderAllRows = false;
+        this.measured = Boolean(options.rowHeight);
+        this.frame = null;
+
+        this.body.textContent = '';
+        this.topSpacer = this.createSpacer();
+        this.bottomSpacer = this.createSpacer();
+        this.body.append(this.topSpacer, this.bottomSpacer);
+
+        const schedule = () => this.scheduleRender();
+        window.addEventListener('scroll', schedule, { passive: true });
+        window.addEventListener('resize', schedule);
+        window.addEventListener('beforeprint', () => { this.renderAllRows = true; this.render(); });
+        window.addEventListener('afterprint', () => { this.renderAllRows = false; this.render(); });
+        this.body.addEventListener('input', event => this.onInput(event));
+        this.body.addEventListener('click', event => {
+            const button = event.target.closest('.delete-btn');
+            if (!button) return;
+            const index = Number(button.closest('tr').dataset.index);
+            if (options.onDelete) options.onDelete(index);
+            else this.deleteStudent(index);
+        });
+    }
+
+    get count() {
+        return this.ids.length;
+    }
+
+    // ==================== STUDENTS ====================
+    addStudent(name = '') {
+        this.ids.push(this.nextRowId++);
+        this.names.push(name);
+        this.subjects.forEach(subject => subject.scores.push(''));
+        Object.values(this.results).forEach(column => column.push(''));
+        this.render();
+        return this.count - 1;
+    }
+
+    deleteStudent(index) {
+        if (!(index >= 0 && index < this.count)) return;
+        const [id] = this.ids.splice(index, 1);
+        this.names.splice(index, 1);
+        this.subjects.forEach(subject => subject.scores.splice(index, 1));
+        Object.values(this.results).forEach(column => column.splice(index, 1));
+
+        const row = this.rowElements.get(id);
+        if (row) {
+            row.remove();
+            this.rowElements.delete(id);
+        }
+        this.render();
+        this.changed();
+    }
+
+    // ==================== SUBJECTS ====================
+    addSubject(name, scores = null) {
+        const subject = {
+            id: `subject-${this.nextSubjectId++}`,
+            name,
+            scores: Array.from({ length: this.count }, (_, i) => (scores ? scores[i] ?? '' : ''))
+        };
+        this.subjects.push(subject);
+
+        const th = document.createElement('th');
+        th.className = 'vertical';
+        th.textContent = name;
+        th.dataset.controlId = subject.id;
+        this.headerRow.insertBefore(th, this.headerRow.children[this.headerRow.children.length - 3]);
+
+        for (const row of this.rowElements.values()) {
+            row.insertBefore(this.createScoreCell(subject, ''), row.children[row.children.length - 3]);
+        }
+        this.updateSpacers();
+        return subject.id;
+    }
+
+    renameSubject(subjectId, name) {
+        const subject = this.subjects.find(s => s.id === subjectId);
+        if (!subject) return;
+        subject.name = name;
+        const th = this.headerRow.querySelector(`th[data-control-id="${subjectId}"]`);
+        if (th) th.textContent = name;
+    }
+
+    deleteSubject(subjectId) {
+        const position = this.subjects.findIndex(s => s.id === subjectId);
+        if (position === -1) return;
+        this.subjects.splice(position, 1);
+
+        const th = this.headerRow.querySelector(`th[data-control-id="${subjectId}"]`);
+        if (th) th.remove();
+        for (const row of this.rowElements.values()) {
+            const cell = row.querySelector(`td[data-subject="${subjectId}"]`);
+            if (cell) cell.remove();
+        }
+        this.updateSpacers();
+        this.changed();
+    }
+
+    // Replace the whole sheet: {names: [...], subjects: [{name, scores: [...]}]}
+    load(data) {
+        this.subjects.forEach(subject => {
+            const th = this.headerRow.querySelector(`th[data-control-id="${subject.id}"]`);
+            if (th) th.remove();
+        });
+        this.subjects = [];
+        for (const row of this.rowElements.values()) row.remove();
+        this.rowElements.clear();
+
+        this.names = (data.names || []).slice();
+        this.ids = this.names.map(() => this.nextRowId++);
+        Object.keys(this.results).forEach(key => { this.results[key] = new Array(this.count).fill(''); });
+        (data.subjects || []).forEach(subject => this.addSubject(subject.name, subject.scores));
+        this.render();
+    }
+
+    // ==================== EDITING ====================
+    onInput(event) {
+        const cell = event.target.closest('td');
+        const row = cell && cell.closest('tr');
+        if (!row || !row.dataset.index) return;
+        const index = Number(row.dataset.index);
+        const value = cell.textContent.trim();
+
+        if (cell.dataset.field === 'name') {
+            this.names[index] = value;
+        } else if (cell.dataset.subject) {
+            const subject = this.subjects.find(s => s.id === cell.dataset.subject);
+            if (subject) subject.scores[index] = value;
+        }
+        this.changed();
+    }
+
+    changed() {
+        if (this.onChange) this.onChange(this);
+    }
+
+    // ==================== RENDERING ====================
+    scheduleRender() {
+        if (this.frame === null) {
+            this.frame = requestAnimationFrame(() => this.render());
+        }
+    }
+
+    visibleRange() {
+        if (this.renderAllRows) return [0, this.count];
+        const top = this.body.getBoundingClientRect().top;
+        const first = Math.max(0, Math.floor(-top / this.rowHeight) - this.overscan);
+        const last = Math.min(this.count, Math.ceil((window.innerHeight - top) / this.rowHeight) + this.overscan);
+        return [Math.min(first, this.count), Math.max(first, last)];
+    }
+
+    render() {
+        if (this.frame !== null) {
+            cancelAnimationFrame(this.frame);
+            this.frame = null;
+        }
+        const [first, last] = this.visibleRange();
+
+        // Drop rows that scrolled out of the window (or were deleted)
+        const wanted = new Set(this.ids.slice(first, last));
+        for (const [id, row] of this.rowElements) {
+            if (!wanted.has(id)) {
+                row.remove();
+                this.rowElements.delete(id);
+            }
+        }
+
+        // Add/move/renumber the rows in the window, keeping existing <tr>s (and focus)
+        let previous = this.topSpacer;
+        for (let index = first; index < last; index++) {
+            const id = this.ids[index];
+            let row = this.rowElements.get(id);
+            if (!row) {
+                row = this.createRow(index);
+                this.rowElements.set(id, row);
+            } else if (row.dataset.index !== String(index)) {
+                this.renumber(row, index);
+            }
+            if (previous.nextSibling !== row) previous.after(row);
+            previous = row;
+        }
+
+        this.topSpacer.firstChild.style.height = `${first * this.rowHeight}px`;
+        this.bottomSpacer.firstChild.style.height = `${(this.count - last) * this.rowHeight}px`;
+        this.topSpacer.hidden = first === 0;
+        this.bottomSpacer.hidden = last === this.count;
+
+        if (!this.measured && previous !== this.topSpacer) {
+            // Use the real row height once one is on screen
+            const height = previous.getBoundingClientRect().height;
+            this.measured = true;
+            if (height > 0 && Math.abs(height - this.rowHeight) > 0.5) {
+                this.rowHeight = height;
+                this.render();
+            }
+        }
+    }
+
+    createRow(index) {
+        const row = document.createElement('tr');
+        row.className = 'grid-row';
+        row.dataset.index = index;
+
+        const sn = document.createElement('td');
+        sn.append(document.createTextNode(`${index + 1} `), this.createDeleteButton());
+        const name = document.createElement('td');
+        name.contentEditable = 'true';
+        name.dataset.field = 'name';
+        name.textContent = this.names[index];
+        row.append(sn, name);
+
+        this.subjects.forEach(subject => row.append(this.createScoreCell(subject, subject.scores[index])));
+        ['total', 'grade', 'position'].forEach(key => {
+            const cell = document.createElement('td');
+            cell.dataset.result = key;
+            cell.textContent = this.results[key][index];
+            row.append(cell);
+        });
+        return row;
+    }
+
+    createScoreCell(subject, value) {
+        const cell = document.createElement('td');
+        cell.contentEditable = 'true';
+        cell.className = 'subject-cell';
+        cell.dataset.subject = subject.id;
+        cell.dataset.controlId = subject.id;
+        cell.textContent = value;
+        return cell;
+    }
+
+    createDeleteButton() {
+        const button = document.createElement('span');
+        button.className = 'delete-btn';
+        button.textContent = '🗑️';
+        return button;
+    }
+
+    createSpacer() {
+        const row = document.createElement('tr');
+        row.className = 'grid-spacer';
+        row.setAttribute('aria-hidden', 'true');
+        const cell = document.createElement('td');
+        cell.colSpan = 5;
+        row.append(cell);
+        row.hidden = true;
+        return row;
+    }
+
+    renumber(row, index) {
+        row.dataset.index = index;
+        row.firstChild.firstChild.nodeValue = `${index + 1} `;
+    }
+
+    updateSpacers() {
+        const columns = this.subjects.length + 5;
+        this.topSpacer.firstChild.colSpan = columns;
+        this.bottomSpacer.firstChild.colSpan = columns;
+    }
+
+    refreshResults() {
+        for (const row of this.rowElements.values()) {
+            const index = Number(row.dataset.index);
+            row.querySelectorAll('td[data-result]').forEach(cell => {
+                cell.textContent = this.results[cell.dataset.result][index];
+            });
+        }
+    }
+
+    // ==================== SERVER ====================
+    payload() {
+        // Column names as shown; a subject picked twice becomes "MATHS (2)"
+        const seen = {};
+        const columns = this.subjects.map(subject => {
+            seen[subject.name] = (seen[subject.name] || 0) + 1;
+            return seen[subject.name] > 1 ? `${subject.name} (${seen[subject.name]})` : subject.name;
+        });
+        return {
+            subjects: columns,
+            students: this.names.map((name, index) => {
+                const scores = {};
+                this.subjects.forEach((subject, column) => { scores[columns[column]] = subject.scores[index]; });
+                return { name, scores };
+            })
+        };
+    }
+
+    csrfToken() {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    async post(url, body) {
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': this.csrfToken() },
+            body: JSON.stringify(body)
+        });
+        if (!response.ok) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.message || `Request failed (${response.status})`);
+        }
+        return response;
+    }
+
+    // Totals, grades and positions computed on the server (see broadsheet.py)
+    async compute() {
+        const response = await this.post(this.apiUrl, this.payload());
+        const data = await response.json();
+        data.students.forEach((student, index) => {
+            this.results.total[index] = student.total ?? '';
+            this.results.grade[index] = student.average === null ? '' : student.grade;
+            this.results.position[index] = student.position ?? '';
+        });
+        this.refreshResults();
+        return data;
+    }
+
+    async exportFile(format = 'csv', title = 'broadsheet') {
+        const response = await this.post(`${this.apiUrl}export/?format=${format}`, { title, ...this.payload() });
+        const link = document.createElement('a');
+        link.href = URL.createObjectURL(await response.blob());
+        link.download = `${title}.${format}`;
+        link.click();
+        setTimeout(() => URL.revokeObjectURL(link.href), 1000);
+    }
+}
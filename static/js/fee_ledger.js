@@ -0,0 +1,59 @@
+// fee_ledger.js - SAVE THE BILL ON THE PAGE TO THE SERVER FEE LEDGER
+//
+// Used by new_term_bill.html and term_end_account.html. Reads the page's own state
+// (studentInfo, tableData, bankDetails, paymentNotes and the due date input) and
+// saves it as the student's invoice for the term; saving again replaces it.
+
+const FEE_LEDGER_URL = '/api/fees/invoices/';
+
+function feeLedgerCsrfToken() {
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : '';
+}
+
+function feeLedgerStatus(message, isError = false) {
+    const status = document.getElementById('ledgerStatus');
+    if (!status) return;
+    status.textContent = message;
+    status.className = `text-sm font-bold ${isError ? 'text-red-600' : 'text-green-700'}`;
+}
+
+async function saveToFeeLedger(kind) {
+    if (!studentInfo.studentName) {
+        feeLedgerStatus('Enter the student name before saving', true);
+        return;
+    }
+
+    const payload = {
+        kind: kind,
+        session: studentInfo.session,
+        term: studentInfo.term,
+        class_name: studentInfo.class,
+        student_name: studentInfo.studentName,
+        student_id: studentInfo.studentId || '',
+        items: tableData.map(item => ({ description: item.description, amount: parseFloat(item.amount) || 0 })),
+        due_date: document.getElementById('dueDate').value || null,
+        late_fee: 5000,
+        bank_details: bankDetails,
+        payment_notes: paymentNotes
+    };
+
+    feeLedgerStatus('Saving...');
+    try {
+        const response = await fetch(FEE_LEDGER_URL, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': feeLedgerCsrfToken() },
+            body: JSON.stringify(payload)
+        });
+        const data = await response.json().catch(() => ({}));
+        if (!response.ok) {
+            throw new Error(data.message || `Request failed (${response.status})`);
+        }
+        const invoice = data.invoice;
+        feeLedgerStatus(`${data.created ? 'Saved' : 'Updated'}: total ${formatCurrency(parseFloat(invoice.total))}, ` +
+                        `paid ${formatCurrency(parseFloat(invoice.amount_paid))}, ` +
+                        `balance ${formatCurrency(parseFloat(invoice.balance))}`);
+    } catch (error) {
+        feeLedgerStatus(`Not saved: ${error.message}`, true);
+    }
+}
@@ -0,0 +1,165 @@
+// report_store.js - SAVE EXAM RESULT REPORTS ON THE SERVER (replaces localStorage arrays)
+//
+// const reportStore = new ReportStore('SS1', 'savedReports_SS1');
+// reportStore.save(reportData)    -> first save POSTs the document, later saves PATCH only the changes
+// reportStore.list(page)          -> one page of report summaries
+// reportStore.load(id)            -> full report document
+// reportStore.importLegacy()      -> moves reports saved in this browser to the server (once)
+
+class ReportStore {
+    constructor(className, legacyStorageKey) {
+        this.className = className;
+        this.legacyStorageKey = legacyStorageKey;
+        this.baseUrl = '/api/report-cards/';
+        this.current = null;   // {id, version, name, data}: the report open on the page
+        this.saving = Promise.resolve();
+    }
+
+    // ==================== HTTP ====================
+    csrfToken() {
+        const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : '';
+    }
+
+    async request(url, method = 'GET', body = undefined) {
+        const options = { method, headers: {} };
+        if (method !== 'GET') {
+            options.headers['X-CSRFToken'] = this.csrfToken();
+        }
+        if (body !== undefined) {
+            options.headers['Content-Type'] = 'application/json';
+            options.body = JSON.stringify(body);
+        }
+        const response = await fetch(url, options);
+        const data = await response.json().catch(() => ({}));
+        if (!response.ok) {
+            const error = new Error(data.message || `Request failed (${response.status})`);
+            error.status = response.status;
+            error.data = data;
+            throw error;
+        }
+        return data;
+    }
+
+    // ==================== DELTAS ====================
+    // Flatten a document to {"path": value} so two versions can be compared field by field
+    static flatten(value, prefix = '', out = {}) {
+        if (value !== null && typeof value === 'object') {
+            const keys = Object.keys(value);
+            if (keys.length === 0) {
+                out[prefix] = Array.isArray(value) ? [] : {};
+            }
+            keys.forEach(key => ReportStore.flatten(value[key], prefix ? `${prefix}.${key}` : key, out));
+        } else {
+            out[prefix] = value;
+        }
+        return out;
+    }
+
+    // Paths that changed between two documents (null when only a full save can express it)
+    static diff(before, after) {
+        const oldFlat = ReportStore.flatten(before);
+        const newFlat = ReportStore.flatten(after);
+        const changes = {};
+        for (const path of Object.keys(oldFlat)) {
+            if (!(path in newFlat)) {
+                return null; // Something was removed (e.g. a subject row): send the whole document
+            }
+        }
+        for (const [path, value] of Object.entries(newFlat)) {
+            if (JSON.stringify(oldFlat[path]) !== JSON.stringify(value)) {
+                changes[path] = value;
+            }
+        }
+        return changes;
+    }
+
+    // ==================== SAVE / LOAD ====================
+    save(reportData) {
+        // Saves run one after another so every PATCH is based on the previous version
+        this.saving = this.saving.catch(() => {}).then(() => this.saveNow(reportData));
+        return this.saving;
+    }
+
+    async saveNow(reportData) {
+        const snapshot = JSON.parse(JSON.stringify(reportData));
+        delete snapshot.savedAt; // Changes on every save; not worth a round trip
+
+        const current = this.current;
+        const sameStudent = current && current.name === (snapshot.studentName || '').trim();
+        const changes = sameStudent ? ReportStore.diff(current.data, snapshot) : null;
+
+        if (changes && Object.keys(changes).length === 0) {
+            return { report: { id: current.id, version: current.version }, unchanged: true };
+        }
+
+        let result;
+        if (changes) {
+            try {
+                result = await this.request(`${this.baseUrl}${current.id}/`, 'PATCH', {
+                    version: current.version,
+                    changes: changes
+                });
+            } catch (error) {
+                if (error.status !== 409 && error.status !== 404) throw error;
+                // Changed elsewhere or deleted: fall back to a full save of what is on screen
+                result = null;
+            }
+        }
+        if (!result) {
+            result = await this.request(this.baseUrl, 'POST', {
+                class_name: this.className,
+                data: snapshot
+            });
+        }
+
+        this.current = {
+            id: result.report.id,
+            version: result.report.version,
+            name: (snapshot.studentName || '').trim(),
+            data: snapshot
+        };
+        return result;
+    }
+
+    async load(reportId) {
+        const result = await this.request(`${this.baseUrl}${reportId}/`);
+        const report = result.report;
+        this.current = {
+            id: report.id,
+            version: report.version,
+            name: (report.data.studentName || '').trim(),
+            data: report.data
+        };
+        return report;
+    }
+
+    list(page = 1, pageSize = 50) {
+        const params = new URLSearchParams({ class_name: this.className, page, page_size: pageSize });
+        return this.request(`${this.baseUrl}?${params}`);
+    }
+
+    async count() {
+        const result = await this.list(1, 1);
+        return result.count;
+    }
+
+    clear() {
+        this.current = null;
+        const params = new URLSearchParams({ class_name: this.className });
+        return this.request(`${this.baseUrl}?${params}`, 'DELETE');
+    }
+
+    // Upload reports this browser saved before the server store existed, then forget them
+    async importLegacy() {
+        const legacy = JSON.parse(localStorage.getItem(this.legacyStorageKey) || '[]');
+        if (!Array.isArray(legacy) || legacy.length === 0) return null;
+
+        const result = await this.request(`${this.baseUrl}import/`, 'POST', {
+            class_name: this.className,
+            reports: legacy
+        });
+        localStorage.removeItem(this.legacyStorageKey);
+        return result;
+    }
+}
@@ -1,3 +1,71 @@
 from django.contrib import admin
 
+from .models import (
+    DriveFolder, FeeBalance, Invoice, InvoiceItem, Payment, ReportCard, ReportCardFile, StudentIdSequence,
+    StudentRecord,
+)
+
 # Register your models here.
+
+
+@admin.register(DriveFolder)
+class DriveFolderAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'session', 'term', 'class_name', 'synced_at')
+    list_filter = ('kind', 'session', 'term', 'class_name')
+    search_fields = ('name', 'drive_id')
+
+
+@admin.register(ReportCardFile)
+class ReportCardFileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'student_id', 'session', 'term', 'class_name', 'modified_time')
+    list_filter = ('session', 'term', 'class_name')
+    search_fields = ('name', 'student_id', 'short_id', 'drive_id')
+
+
+@admin.register(ReportCard)
+class ReportCardAdmin(admin.ModelAdmin):
+    list_display = ('student_name', 'class_name', 'session', 'term', 'result', 'version', 'updated_at')
+    list_filter = ('class_name', 'session', 'term')
+    search_fields = ('student_name', 'student_id', 'client_id')
+
+
+@admin.register(StudentRecord)
+class StudentRecordAdmin(admin.ModelAdmin):
+    list_display = ('student_id', 'name', 'class_name', 'year', 'admission_date', 'created_at')
+    list_filter = ('year', 'class_name')
+    search_fields = ('student_id', 'name')
+
+
+@admin.register(StudentIdSequence)
+class StudentIdSequenceAdmin(admin.ModelAdmin):
+    list_display = ('year', 'last_value')
+
+
+class InvoiceItemInline(admin.TabularInline):
+    model = InvoiceItem
+    extra = 0
+
+
+class PaymentInline(admin.TabularInline):
+    model = Payment
+    extra = 0
+    readonly_fields = ('amount', 'paid_on', 'method', 'reference')
+    can_delete = False
+
+
+@admin.register(Invoice)
+class InvoiceAdmin(admin.ModelAdmin):
+    # Totals and payments change through fee_ledger.py so balances stay in step
+    list_display = ('student_name', 'class_name', 'kind', 'session', 'term', 'total', 'amount_paid', 'due_date')
+    list_filter = ('kind', 'session', 'term', 'class_name')
+    search_fields = ('student_name', 'student_id')
+    readonly_fields = ('total', 'amount_paid')
+    inlines = [InvoiceItemInline, PaymentInline]
+
+
+@admin.register(FeeBalance)
+class FeeBalanceAdmin(admin.ModelAdmin):
+    list_display = ('student_name', 'class_name', 'session', 'term', 'billed', 'paid', 'balance')
+    list_filter = ('session', 'term', 'class_name')
+    search_fields = ('student_name', 'student_id')
+    readonly_fields = ('billed', 'paid', 'balance')
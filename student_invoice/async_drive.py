@@ -0,0 +1,85 @@
+# async_drive.py - RUN BLOCKING DRIVE CALLS FROM ASYNC VIEWS
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+
+
+class DriveBusy(Exception):
+    """Too many requests are already waiting for a Drive slot in this process"""
+
+
+class AsyncDrivePool:
+    """
+    Bounded thread pool for GoogleDriveService calls made from async views
+    - at most `max_workers` Drive calls run at once per process
+    - at most `max_waiting` more may queue; beyond that DriveBusy is raised
+    - identical calls in flight (same key) are coalesced onto one execution
+    """
+
+    def __init__(self, max_workers=None, max_waiting=None):
+        self.max_workers = max_workers or getattr(settings, 'DRIVE_MAX_CONCURRENCY', 16)
+        self.max_waiting = max_waiting or getattr(settings, 'DRIVE_MAX_WAITING', 500)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._pending = 0
+        self._in_flight = {}  # (event loop, key) -> asyncio.Future
+        self.stats = {'calls': 0, 'coalesced': 0, 'rejected': 0}
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='drive')
+        return self._executor
+
+    async def run(self, func, *args, reject_when_busy=True, **kwargs):
+        """Run func(*args, **kwargs) on the Drive pool and await its result"""
+        if reject_when_busy and self._pending >= self.max_workers + self.max_waiting:
+            self.stats['rejected'] += 1
+            raise DriveBusy("Drive is busy, please try again in a moment")
+
+        self._pending += 1
+        self.stats['calls'] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    async def coalesce(self, key, func, *args, **kwargs):
+        """Like run(), but concurrent callers with the same key share one call"""
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+
+        future = self._in_flight.get(flight_key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        future = loop.create_task(self.run(func, *args, **kwargs))
+        self._in_flight[flight_key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(flight_key, None))
+        return await asyncio.shield(future)
+
+    async def iterate(self, iterator):
+        """Async iterator over a blocking iterator, each next() running on the pool"""
+        sentinel = object()
+        iterator = iter(iterator)
+        try:
+            while True:
+                # A stream that has started is never cut off by DriveBusy
+                item = await self.run(next, iterator, sentinel, reject_when_busy=False)
+                if item is sentinel:
+                    break
+                yield item
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close:
+                await self.run(close, reject_when_busy=False)
+
+
+drive_pool = AsyncDrivePool()
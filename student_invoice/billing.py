@@ -0,0 +1,389 @@
+# billing.py - BATCH FEE INVOICES: TERM BILLS AND TERM-END ACCOUNTS FOR A WHOLE ROSTER
+"""
+Build every invoice the bursary prints from one fee schedule and one roster
+
+    schedule = load_schedule(json.load(open('second_term_fees.json')))
+    invoices = [build_invoice(student, schedule) for student in load_roster(csv_rows)]
+
+Same figures as new_term_bill.html / term_end_account.html: subtotal of the fee
+lines, amount in words, and the total with the late fee once the due date has
+passed. Amounts are Decimals, so kobo never drift. draw_invoice() lays out one
+invoice per A4 page with reportlab; render_job() runs in worker processes like
+report_pdf.render_job().
+
+Schedule (JSON):
+    {"kind": "term_bill", "term": "2ND TERM", "session": "2025/2026",
+     "due_date": "2026-01-12", "late_fee": 5000,
+     "items": [{"description": "TUITION FEE/TERM", "amount": 47000}, ...],
+     "classes": {"SS 1": [{"description": "TUITION FEE/TERM", "amount": 52000}]}}
+
+Roster (CSV): name, class, student_id, plus optional columns named after a fee
+line ("CAUTION FEE") or a new line ("Overdue Balance from Previous Session:")
+holding that student's amount.
+"""
+import csv
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_FLOOR
+from functools import lru_cache
+
+from .broadsheet import _Echo
+from .result_index import normalize_class_name
+
+LATE_FEE = Decimal('5000.00')
+CENT = Decimal('0.01')
+MAX_AMOUNT = Decimal(10) ** 10  # Ledger columns are DecimalField(max_digits=12, decimal_places=2)
+
+# (page title, filename prefix) of the two invoice pages
+INVOICE_KINDS = {
+    'term_bill': ('SCHOOL TUITION AND BILL SUMMARY', 'Tuition Invoice'),
+    'term_end_account': ('BREAKDOWN OF OUTSTANDING BALANCE', 'Outstanding Balance'),
+}
+TERM_LABELS = {'1ST TERM': '1st Term', '2ND TERM': '2nd Term', '3RD TERM': '3rd Term'}
+
+SCHOOL_NAME = 'EMILIA FOREMOST HIGH SCHOOL'
+SCHOOL_PHONE = '09053336429, 08112734458'
+BANK_DETAILS = {
+    'bank': 'UBA',
+    'account_name': 'EMILIA FOREMOST HIGH SCHOOL OKEAGBO',
+    'account_number': '1008189775',
+}
+CONTACT_INFO = {
+    'billing_email': 'emiliaforemost@gmail.com',
+    'contact_phone': '08022854677 / 09057147497',
+}
+PAYMENT_NOTES = [
+    'Please use Student Name & Class as the payment reference.',
+    'Send proof of payment (transfer slip/teller) to the email below.',
+    'Payments made after the due date may incur a late fee of ₦5,000.00',
+]
+ROSTER_COLUMNS = {'name', 'class', 'student_id'}
+CSV_HEADER = ['STUDENT NAME', 'CLASS', 'STUDENT ID', 'TERM', 'SESSION', 'SUBTOTAL',
+              'LATE FEE', 'TOTAL WITH LATE FEE', 'OVERDUE', 'AMOUNT IN WORDS', 'FILENAME']
+
+
+class BillingError(ValueError):
+    """Fee schedule or roster is malformed"""
+
+
+# ============ AMOUNT IN WORDS ============
+ONES = ['', 'One', 'Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine']
+TEENS = ['Ten', 'Eleven', 'Twelve', 'Thirteen', 'Fourteen', 'Fifteen', 'Sixteen', 'Seventeen', 'Eighteen', 'Nineteen']
+TENS = ['', '', 'Twenty', 'Thirty', 'Forty', 'Fifty', 'Sixty', 'Seventy', 'Eighty', 'Ninety']
+SCALES = [(10 ** 9, 'Billion'), (10 ** 6, 'Million'), (10 ** 3, 'Thousand')]
+
+
+@lru_cache(maxsize=1000)
+def _below_thousand(n):
+    words = []
+    if n >= 100:
+        words.append(f"{ONES[n // 100]} Hundred")
+        n %= 100
+    if 10 <= n < 20:
+        words.append(TEENS[n - 10])
+    elif n:
+        words.append(f"{TENS[n // 10]} {ONES[n % 10]}".strip())
+    return ' '.join(word for word in words if word)
+
+
+@lru_cache(maxsize=4096)
+def number_to_words(num):
+    """
+    Whole naira amount in words, as the invoice pages write it
+    Fee totals repeat across a class, so most calls are cache hits.
+    """
+    if num == 0:
+        return 'Zero'
+    words = []
+    for scale, name in SCALES:
+        if num >= scale:
+            words.append(f"{_below_thousand(num // scale)} {name}")
+            num %= scale
+    if num:
+        words.append(_below_thousand(num))
+    return ' '.join(words)
+
+
+def amount_in_words(amount):
+    """'Forty Seven Thousand Naira Only' (kobo dropped, sign ignored, like the pages)"""
+    return f"{number_to_words(int(abs(amount).to_integral_value(ROUND_FLOOR)))} Naira Only"
+
+
+def format_currency(amount):
+    """₦47,000.00, and (₦40,000.00) for credits"""
+    formatted = f"₦{abs(amount):,.2f}"
+    return f"({formatted})" if amount < 0 else formatted
+
+
+# ============ SCHEDULE AND ROSTER ============
+def _amount(value, label):
+    try:
+        amount = Decimal(str(value).replace(',', '').replace('₦', '').strip())
+    except (InvalidOperation, ValueError):
+        raise BillingError(f"Invalid amount for {label}: {value!r}")
+    if not amount.is_finite():
+        raise BillingError(f"Invalid amount for {label}: {value!r}")
+    if abs(amount) >= MAX_AMOUNT:
+        raise BillingError(f"Amount for {label} is too large: {value!r}")
+    try:
+        return amount.quantize(CENT)
+    except InvalidOperation:
+        raise BillingError(f"Invalid amount for {label}: {value!r}")
+
+
+def _items(entries, label):
+    if not isinstance(entries, list):
+        raise BillingError(f"{label} must be a list of {{description, amount}}")
+    items = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not str(entry.get('description') or '').strip():
+            raise BillingError(f"Every fee line in {label} needs a description")
+        description = str(entry['description']).strip()
+        items.append((description, _amount(entry.get('amount', 0), description)))
+    return items
+
+
+def _class_key(class_name):
+    class_name = str(class_name or '').strip().upper()
+    return normalize_class_name(class_name) or class_name
+
+
+def load_schedule(data):
+    """Validate a fee schedule (see module docstring) into plain Python values"""
+    if not isinstance(data, dict):
+        raise BillingError("The fee schedule must be an object")
+    kind = data.get('kind', 'term_bill')
+    if kind not in INVOICE_KINDS:
+        raise BillingError(f"'kind' must be one of: {', '.join(INVOICE_KINDS)}")
+
+    due_date = None
+    if data.get('due_date'):
+        try:
+            due_date = date.fromisoformat(str(data['due_date']))
+        except ValueError:
+            raise BillingError("'due_date' must be YYYY-MM-DD")
+
+    classes = data.get('classes') or {}
+    if not isinstance(classes, dict):
+        raise BillingError("'classes' must map class names to fee lines")
+
+    return {
+        'kind': kind,
+        'term': str(data.get('term') or '').strip().upper(),
+        'session': str(data.get('session') or '').strip(),
+        'due_date': due_date,
+        'late_fee': _amount(data.get('late_fee', LATE_FEE), 'late_fee'),
+        'items': _items(data.get('items') or [], 'items'),
+        'class_items': {_class_key(name): _items(items, name) for name, items in classes.items()},
+    }
+
+
+def load_roster(rows):
+    """
+    Students from csv.DictReader rows (or dicts with the same keys)
+    Columns other than name/class/student_id are that student's fee lines.
+    """
+    students = []
+    for line, row in enumerate(rows, start=2):
+        row = {str(key or '').strip(): value for key, value in row.items()}
+        lowered = {key.lower(): value for key, value in row.items()}
+        name = ' '.join(str(lowered.get('name') or '').split())
+        if not name:
+            continue
+        items = [
+            (key, _amount(value, f"{key} (line {line})"))
+            for key, value in row.items()
+            if key and key.lower() not in ROSTER_COLUMNS and str(value or '').strip()
+        ]
+        students.append({
+            'name': name,
+            'class': str(lowered.get('class') or '').strip().upper(),
+            'student_id': str(lowered.get('student_id') or '').strip().upper(),
+            'items': items,
+        })
+    return students
+
+
+# ============ INVOICES ============
+def invoice_filename(kind, student, term, session, issued):
+    """Same name the pages suggest when printing to PDF (slashes would make folders)"""
+    name = ' '.join(word.capitalize() for word in (student['name'] or 'Student').split())
+    parts = [INVOICE_KINDS[kind][1], name, student['class'], TERM_LABELS.get(term, term.title()),
+             session, issued.strftime('%d-%m-%Y')]
+    return f"{' - '.join(part.replace('/', '-') for part in parts if part)}.pdf"
+
+
+def build_invoice(student, schedule, today=None):
+    """
+    One student's invoice: the schedule's lines, replaced by the class's lines of
+    the same description, then by the student's own amounts from the roster
+    """
+    today = today or date.today()
+    lines = {}
+    for items in (schedule['items'], schedule['class_items'].get(_class_key(student['class']), []),
+                  student.get('items', [])):
+        for description, amount in items:
+            key = description.upper()
+            lines[key] = (lines[key][0] if key in lines else description, amount)
+
+    subtotal = sum((amount for _, amount in lines.values()), Decimal('0.00'))
+    due_date = schedule['due_date']
+    # term_end_account.html charges the late fee on the balance, whatever its sign
+    base = abs(subtotal) if schedule['kind'] == 'term_end_account' else subtotal
+    return {
+        'kind': schedule['kind'],
+        'name': student['name'],
+        'class': student['class'],
+        'student_id': student.get('student_id', ''),
+        'term': schedule['term'],
+        'session': schedule['session'],
+        'items': list(lines.values()),
+        'subtotal': subtotal,
+        'late_fee': schedule['late_fee'],
+        'total_with_late_fee': base + schedule['late_fee'],
+        'due_date': due_date,
+        'overdue': bool(due_date and today > due_date),
+        'amount_in_words': amount_in_words(subtotal),
+        'filename': invoice_filename(schedule['kind'], student, schedule['term'], schedule['session'], today),
+    }
+
+
+def csv_row(invoice):
+    return [
+        invoice['name'], invoice['class'], invoice['student_id'], invoice['term'], invoice['session'],
+        invoice['subtotal'], invoice['late_fee'], invoice['total_with_late_fee'],
+        'YES' if invoice['overdue'] else 'NO', invoice['amount_in_words'], invoice['filename'],
+    ]
+
+
+def iter_invoice_csv(invoices):
+    """Invoice summary CSV one line at a time (for files or StreamingHttpResponse)"""
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM so Excel opens the file as UTF-8
+    yield writer.writerow(CSV_HEADER)
+    for invoice in invoices:
+        yield writer.writerow(csv_row(invoice))
+
+
+# ============ PDF ============
+def draw_invoice(pdf, invoice):
+    """Draw one invoice on the current page of a reportlab canvas"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Table, TableStyle
+
+    page_width, page_height = A4
+    left, right = 18 * mm, page_width - 18 * mm
+    width = right - left
+    y = page_height - 20 * mm
+
+    pdf.setFont('Times-Bold', 18)
+    pdf.drawCentredString(page_width / 2, y, SCHOOL_NAME)
+    y -= 6 * mm
+    pdf.setFont('Times-Roman', 10)
+    pdf.drawCentredString(page_width / 2, y, f"Tel: {SCHOOL_PHONE}")
+    y -= 10 * mm
+    pdf.setFont('Times-Bold', 14)
+    pdf.drawCentredString(page_width / 2, y, INVOICE_KINDS[invoice['kind']][0])
+    y -= 12 * mm
+
+    info = [
+        ['STUDENT NAME', invoice['name'].upper(), 'CLASS', invoice['class']],
+        ['STUDENT ID', invoice['student_id'] or '-', 'TERM', invoice['term']],
+        ['DUE DATE', invoice['due_date'].strftime('%d %b %Y') if invoice['due_date'] else '-',
+         'SESSION', invoice['session']],
+    ]
+    info_table = Table(info, colWidths=[width * share for share in (0.2, 0.4, 0.14, 0.26)], rowHeights=7 * mm)
+    info_table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.6, colors.black),
+        ('FONT', (0, 0), (-1, -1), 'Times-Roman', 10),
+        ('FONT', (0, 0), (0, -1), 'Times-Bold', 10),
+        ('FONT', (2, 0), (2, -1), 'Times-Bold', 10),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    _, height = info_table.wrapOn(pdf, width, y)
+    y -= height
+    info_table.drawOn(pdf, left, y)
+    y -= 8 * mm
+
+    total_label = 'GRAND TOTAL' if invoice['kind'] == 'term_end_account' else 'SUB TOTAL'
+    rows = [['S/N', 'DESCRIPTION', 'AMOUNT']]
+    rows += [[index, description, format_currency(amount)]
+             for index, (description, amount) in enumerate(invoice['items'], start=1)]
+    rows.append(['', total_label, format_currency(invoice['subtotal'])])
+    fee_table = Table(rows, colWidths=[width * share for share in (0.1, 0.6, 0.3)], rowHeights=7 * mm)
+    fee_table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.6, colors.black),
+        ('FONT', (0, 0), (-1, -1), 'Times-Roman', 10),
+        ('FONT', (0, 0), (-1, 0), 'Times-Bold', 10),
+        ('FONT', (0, -1), (-1, -1), 'Times-Bold', 11),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e5e7eb')),
+        ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+        ('ALIGN', (2, 0), (2, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    _, height = fee_table.wrapOn(pdf, width, y)
+    y -= height
+    fee_table.drawOn(pdf, left, y)
+    y -= 8 * mm
+
+    pdf.setFont('Times-Bold', 10)
+    pdf.drawString(left, y, 'AMOUNT IN WORDS:')
+    y -= 5 * mm
+    pdf.setFont('Times-Italic', 10)
+    pdf.drawString(left, y, invoice['amount_in_words'])
+    y -= 7 * mm
+    pdf.setFont('Times-Bold', 10)
+    status = 'OVERDUE - ' if invoice['overdue'] else ''
+    pdf.drawString(left, y, f"{status}TOTAL WITH LATE FEE (AFTER DUE DATE): "
+                            f"{format_currency(invoice['total_with_late_fee'])}")
+    y -= 12 * mm
+
+    pdf.setFont('Times-Bold', 12)
+    pdf.drawString(left, y, 'PAYMENT INSTRUCTIONS')
+    y -= 6 * mm
+    pdf.setFont('Times-Roman', 10)
+    for line in [
+        f"Bank: {BANK_DETAILS['bank']}",
+        f"Account Name: {BANK_DETAILS['account_name']}",
+        f"Account Number: {BANK_DETAILS['account_number']}",
+        *[f"• {note}" for note in PAYMENT_NOTES],
+        f"Billing email: {CONTACT_INFO['billing_email']}    Enquiries: {CONTACT_INFO['contact_phone']}",
+    ]:
+        pdf.drawString(left, y, line)
+        y -= 5 * mm
+
+
+def render_invoices(invoices, path):
+    """Write invoices as one PDF, one page each (atomically, like render_report_card)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    os.close(fd)
+    try:
+        pdf = canvas.Canvas(tmp_path, pagesize=A4, pageCompression=1)
+        pdf.setAuthor(SCHOOL_NAME)
+        pdf.setTitle(os.path.splitext(os.path.basename(path))[0])
+        for invoice in invoices:
+            draw_invoice(pdf, invoice)
+            pdf.showPage()
+        pdf.save()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+
+def render_job(job):
+    """
+    ProcessPoolExecutor entry point
+    job: {'invoices', 'path'} -> (path, invoice count, size)
+    """
+    size = render_invoices(job['invoices'], job['path'])
+    return job['path'], len(job['invoices']), size
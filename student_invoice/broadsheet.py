@@ -0,0 +1,257 @@
+# broadsheet.py - CLASS BROADSHEET: TOTALS, AVERAGES, POSITIONS AND SUBJECT STATISTICS
+"""
+The staff broadsheet as data: one score (subject total out of 100) per student
+per subject, NaN where a student does not offer the subject.
+
+    sheet = Broadsheet.from_payload({"subjects": ["MATHS", "ENGLISH"],
+                                     "students": [{"name": "ADA OBI", "scores": {"MATHS": 71}}]})
+    sheet.results()['positions']        # class positions, ties share (1, 2, 2, 4)
+    sheet.subject_stats()['pass_rate']  # % of takers scoring PASS_MARK or more
+
+Everything is computed for the whole class in one vectorized step and cached
+until the scores change; as_json() and the CSV/XLSX exports only read it.
+"""
+import csv
+import tempfile
+
+import numpy as np
+
+from .grading import GRADE_BOUNDARIES, SUBJECT_MAX, competition_rank, grade_labels
+
+# E (40) is the lowest passing grade on the report cards
+PASS_MARK = GRADE_BOUNDARIES[1][0]
+STAT_ROWS = [('MEAN', 'mean'), ('MINIMUM', 'min'), ('MAXIMUM', 'max'), ('PASS RATE %', 'pass_rate')]
+
+
+class BroadsheetError(ValueError):
+    """Broadsheet input is malformed or a score is out of range"""
+
+
+def _number(value):
+    """JSON-friendly float: None for NaN, whole numbers without .0"""
+    if value is None or np.isnan(value):
+        return None
+    value = round(float(value), 2)
+    return int(value) if value.is_integer() else value
+
+
+class _Echo:
+    """csv.writer target that hands back each written line instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+class Broadsheet:
+    def __init__(self, students, subjects, scores):
+        """
+        students: [{'id': ..., 'name': ...}] in row order
+        subjects: subject names in column order
+        scores: (students x subjects) array-like, NaN/None = not offered
+        """
+        self.students = list(students)
+        self.subjects = [str(subject) for subject in subjects]
+        try:
+            matrix = np.array(scores, dtype=float).reshape(len(self.students), len(self.subjects))
+        except (TypeError, ValueError):
+            raise BroadsheetError("Scores must be numbers (or null for not offered)")
+        offered = ~np.isnan(matrix)
+        if np.any(matrix[offered] < 0) or np.any(matrix[offered] > SUBJECT_MAX):
+            raise BroadsheetError(f"Scores must be between 0 and {SUBJECT_MAX}")
+        self.scores = matrix
+        self._results = None
+        self._subject_stats = None
+
+    # ============ BUILDING ============
+    @classmethod
+    def from_payload(cls, payload):
+        """
+        {"subjects": ["MATHS", ...],
+         "students": [{"id": "...", "name": "...", "scores": {"MATHS": 71, "ENGLISH": null}}]}
+        """
+        if not isinstance(payload, dict):
+            raise BroadsheetError("Broadsheet data must be an object")
+        subjects = payload.get('subjects')
+        students = payload.get('students')
+        if not isinstance(subjects, list) or not isinstance(students, list):
+            raise BroadsheetError("'subjects' and 'students' must be lists")
+        if not all(isinstance(student, dict) for student in students):
+            raise BroadsheetError("Every student must be an object")
+
+        scores = [
+            [_score((student.get('scores') or {}).get(subject)) for subject in subjects]
+            for student in students
+        ]
+        rows = [{'id': student.get('id'), 'name': str(student.get('name') or '').strip()} for student in students]
+        return cls(rows, subjects, scores)
+
+    @classmethod
+    def from_report_cards(cls, class_name, session, term):
+        """Broadsheet of the report cards saved for one class and term (see report_store.py)"""
+        from .models import ReportCard
+
+        reports = list(
+            ReportCard.objects.filter(class_name=class_name, session=session, term=term)
+            .only('student_name', 'student_id', 'data')
+            .order_by('student_name')
+        )
+
+        subjects, columns, rows = [], {}, []
+        for report in reports:
+            row = {}
+            for subject in report.data.get('subjects') or []:
+                if not isinstance(subject, dict):
+                    continue
+                name = str(subject.get('name') or '').strip().upper()
+                if not name:
+                    continue
+                if name not in columns:
+                    columns[name] = len(subjects)
+                    subjects.append(name)
+                try:
+                    row[name] = _score(subject.get('total'))
+                except BroadsheetError:
+                    row[name] = np.nan  # Half-typed total on a saved card: treat as not offered
+            rows.append(row)
+
+        scores = [[row.get(subject, np.nan) for subject in subjects] for row in rows]
+        students = [{'id': report.student_id or None, 'name': report.student_name} for report in reports]
+        return cls(students, subjects, scores)
+
+    # ============ COMPUTATION ============
+    def results(self):
+        """Per-student totals, averages, grades and positions (cached)"""
+        if self._results is None:
+            offered = ~np.isnan(self.scores)
+            subjects_offered = offered.sum(axis=1)
+            totals = np.where(offered, self.scores, 0).sum(axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                averages = np.round(totals / subjects_offered, 2)
+            averages[subjects_offered == 0] = np.nan
+            totals[subjects_offered == 0] = np.nan
+
+            self._results = {
+                'totals': totals,
+                'subjects_offered': subjects_offered,
+                'averages': averages,
+                'grades': grade_labels(averages),
+                'positions': competition_rank(averages),
+            }
+        return self._results
+
+    def subject_stats(self):
+        """Per-subject mean/min/max/pass rate over the students who take it (cached)"""
+        if self._subject_stats is None:
+            offered = ~np.isnan(self.scores)
+            takers = offered.sum(axis=0)
+            nobody = takers == 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = np.round(np.where(offered, self.scores, 0).sum(axis=0) / takers, 2)
+                passed = (offered & (np.where(offered, self.scores, 0) >= PASS_MARK)).sum(axis=0)
+                pass_rate = np.round(passed / takers * 100, 1)
+            minimum = np.where(offered, self.scores, np.inf).min(axis=0, initial=np.inf)
+            maximum = np.where(offered, self.scores, -np.inf).max(axis=0, initial=-np.inf)
+            for values in (mean, pass_rate, minimum, maximum):
+                values[nobody] = np.nan
+
+            self._subject_stats = {
+                'takers': takers,
+                'mean': mean,
+                'min': minimum,
+                'max': maximum,
+                'pass_rate': pass_rate,
+            }
+        return self._subject_stats
+
+    # ============ OUTPUT ============
+    def as_json(self):
+        results = self.results()
+        stats = self.subject_stats()
+        return {
+            'subjects': [
+                {
+                    'name': subject,
+                    'takers': int(stats['takers'][column]),
+                    'mean': _number(stats['mean'][column]),
+                    'min': _number(stats['min'][column]),
+                    'max': _number(stats['max'][column]),
+                    'pass_rate': _number(stats['pass_rate'][column]),
+                }
+                for column, subject in enumerate(self.subjects)
+            ],
+            'students': [
+                {
+                    'sn': row + 1,
+                    'id': student.get('id'),
+                    'name': student.get('name'),
+                    'scores': [_number(score) for score in self.scores[row]],
+                    'total': _number(results['totals'][row]),
+                    'average': _number(results['averages'][row]),
+                    'grade': results['grades'][row],
+                    'position': int(results['positions'][row]) or None,
+                }
+                for row, student in enumerate(self.students)
+            ],
+            'pass_mark': PASS_MARK,
+        }
+
+    def rows(self):
+        """Export rows: header, one row per student, a blank row, then the subject statistics"""
+        results = self.results()
+        stats = self.subject_stats()
+        tail = [''] * 4
+
+        yield ['S/N', 'NAME OF STUDENTS'] + self.subjects + ['TOTAL', 'AVERAGE', 'GRADE', 'POSITION']
+        for row, student in enumerate(self.students):
+            yield ([row + 1, student.get('name')]
+                   + [_blank(score) for score in self.scores[row]]
+                   + [_blank(results['totals'][row]), _blank(results['averages'][row]),
+                      results['grades'][row], int(results['positions'][row]) or ''])
+        yield []
+        for label, key in STAT_ROWS:
+            yield ['', label] + [_blank(value) for value in stats[key]] + tail
+
+    def iter_csv(self):
+        """CSV text one line at a time (for StreamingHttpResponse)"""
+        writer = csv.writer(_Echo())
+        yield '\ufeff'  # BOM so Excel opens the file as UTF-8
+        for row in self.rows():
+            yield writer.writerow(row)
+
+    def write_xlsx(self, file, title='Broadsheet'):
+        """Write an .xlsx workbook to a binary file object (openpyxl write-only mode)"""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=title[:31] or 'Broadsheet')
+        for row in self.rows():
+            sheet.append(row)
+        workbook.save(file)
+
+    def iter_xlsx(self, title='Broadsheet', chunk_size=64 * 1024):
+        """The .xlsx workbook in chunks; spills to disk instead of building it in memory"""
+        with tempfile.SpooledTemporaryFile(max_size=4 * 1024 * 1024) as workbook_file:
+            self.write_xlsx(workbook_file, title=title)
+            workbook_file.seek(0)
+            for chunk in iter(lambda: workbook_file.read(chunk_size), b''):
+                yield chunk
+
+
+def _score(value):
+    """A cell value as a float score: '', None and '-' mean not offered"""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        value = value.strip()
+        if value in ('', '-', '--'):
+            return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise BroadsheetError(f"Invalid score: {value!r}")
+
+
+def _blank(value):
+    """Export cell: '' for NaN, ints without .0"""
+    number = _number(value)
+    return '' if number is None else number
@@ -0,0 +1,204 @@
+# deep_search.py - BREADTH-FIRST SEARCH OF NESTED FOLDERS FOR A REPORT CARD
+"""
+Finds a student's report card below a class or term folder, however the
+school has nested it (e.g. SS1/SS1A/...)
+
+    pdfs, stats = subfolder_search.search(drive_service, folder_id, student_id)
+
+The walk goes one level at a time. Every folder of a level is listed at
+once on a bounded thread pool (DRIVE_DEEP_SEARCH_WORKERS per process), one
+query per folder returning its subfolders plus only the PDFs named like the
+ID. Drive only matches a name term at the start of a word, so a level where
+that finds nothing has all its PDFs listed and matched here, as the class
+folder search does. The walk stops as soon as a strict (exact or component)
+ID match turns up: queued listings are cancelled and running ones stop after
+their current page. It never goes deeper than DRIVE_DEEP_SEARCH_MAX_DEPTH, follows at most
+DRIVE_DEEP_SEARCH_MAX_FANOUT subfolders per folder and visits at most
+DRIVE_DEEP_SEARCH_MAX_FOLDERS folders.
+
+The subfolders found are memoized per starting folder in the folder cache
+(DRIVE_DEEP_SEARCH_TREE_TTL, dropped by FolderCache.invalidate()). Later
+searches skip discovering them and ask for the PDFs of up to
+PARENTS_PER_QUERY known folders in one query.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from .folder_cache import folder_cache
+from .folder_snapshot import PARENTS_PER_QUERY
+from .id_matcher import MATCH_ANYWHERE, StudentIdMatcher
+from .result_index import FOLDER_MIME_TYPE, PDF_MIME_TYPE
+
+
+class _Walk:
+    """State of one search: the memoized tree, the stop flag and what it cost"""
+
+    def __init__(self, drive_service, matcher, children):
+        self.drive = drive_service
+        self.matcher = matcher
+        self.names = drive_service._name_filter(matcher)
+        self.children = children  # folder ID -> child folder IDs (memoized and found now)
+        self.discovered = False
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.stats = {'folders': 0, 'memoized': 0, 'queries': 0, 'depth': 0, 'truncated': 0,
+                      'full_listings': 0, 'errors': 0, 'stopped_early': False}
+
+    def _pdf_filter(self, named=True):
+        pdfs = f"mimeType='{PDF_MIME_TYPE}'"
+        return f"({pdfs} and {self.names})" if named and self.names else pdfs
+
+    def _list(self, query, label):
+        """(items, complete) for a query, abandoned after the current page once the walk stops"""
+        listing = self.drive.list_files(query, self.drive.METADATA_FIELDS, label=label)
+        items, complete = [], True
+        for item in listing:
+            items.append(item)
+            if self.stop.is_set():
+                complete = False
+                break
+        with self.lock:
+            self.stats['queries'] += listing.pages
+        return items, complete
+
+    def list_folder(self, folder_id, with_pdfs):
+        """Subfolders of a folder not seen before (and its PDFs named like the ID)"""
+        wanted = f"mimeType='{FOLDER_MIME_TYPE}'"
+        if with_pdfs:
+            wanted = f"({wanted} or {self._pdf_filter()})"
+        items, complete = self._list(f"'{folder_id}' in parents and trashed=false and {wanted}", 'deep_folders')
+        folders = sorted((item for item in items if item.get('mimeType') == FOLDER_MIME_TYPE),
+                         key=lambda item: item['name'])
+        if complete:
+            with self.lock:
+                self.children[folder_id] = [folder['id'] for folder in folders]
+                self.discovered = True
+        return [item for item in items if item.get('mimeType') != FOLDER_MIME_TYPE]
+
+    def list_pdfs(self, folder_ids, named=True):
+        """PDFs named like the ID (or, with named=False, every PDF) in several folders"""
+        parents = ' or '.join(f"'{folder_id}' in parents" for folder_id in folder_ids)
+        items, _ = self._list(f"({parents}) and trashed=false and {self._pdf_filter(named)}",
+                              'deep_pdfs' if named else 'deep_all_pdfs')
+        return items
+
+    def strict_matches(self, pdfs):
+        return [(kind, pdf) for kind, pdf in self.matcher.filter(pdfs) if kind != MATCH_ANYWHERE]
+
+
+class SubfolderSearch:
+    def __init__(self, workers=None, max_depth=None, max_fanout=None, max_folders=None, tree_ttl=None, cache=None):
+        self.workers = workers or getattr(settings, 'DRIVE_DEEP_SEARCH_WORKERS', 8)
+        self.max_depth = max_depth if max_depth is not None else getattr(settings, 'DRIVE_DEEP_SEARCH_MAX_DEPTH', 3)
+        self.max_fanout = max_fanout or getattr(settings, 'DRIVE_DEEP_SEARCH_MAX_FANOUT', 50)
+        self.max_folders = max_folders or getattr(settings, 'DRIVE_DEEP_SEARCH_MAX_FOLDERS', 200)
+        self.tree_ttl = tree_ttl or getattr(settings, 'DRIVE_DEEP_SEARCH_TREE_TTL', 10 * 60)
+        self.cache = cache or folder_cache
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'searches': 0, 'found': 0, 'folders': 0, 'queries': 0, 'truncated': 0,
+                      'full_listings': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+
+    @property
+    def executor(self):
+        # Its own pool: searches already run on the async views' Drive pool, and
+        # waiting there for tasks queued on the same pool could deadlock it
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='drive-deep')
+        return self._executor
+
+    def search(self, drive_service, root_id, student_id, include_root=True, log=print):
+        """
+        ([(match kind, pdf)], stats) for strict ID matches at or below root_id
+        include_root=False skips the PDFs directly in root_id (the caller has searched them).
+        """
+        start = time.perf_counter()
+        generation = self.cache.generation()
+        walk = _Walk(drive_service, StudentIdMatcher(student_id), dict(self.cache.get_subtree(generation, root_id) or {}))
+
+        found = []
+        level = [root_id]
+        visited = 1
+        while level:
+            walk.stats['folders'] += len(level)
+            found = self._search_level(walk, level, skip_pdfs=None if include_root else root_id, log=log)
+            if found or walk.stats['depth'] >= self.max_depth:
+                break
+            level, visited = self._next_level(walk, level, visited)
+            if level:
+                walk.stats['depth'] += 1
+
+        if walk.discovered:
+            self.cache.set_subtree(generation, root_id, walk.children, ttl=self.tree_ttl)
+
+        stats = walk.stats
+        stats['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        self._record(stats, found)
+        return found, stats
+
+    def _search_level(self, walk, level, skip_pdfs, log):
+        """Strict matches in one level's folders; the first one found stops the rest"""
+        known = [folder_id for folder_id in level if folder_id in walk.children and folder_id != skip_pdfs]
+        walk.stats['memoized'] += sum(1 for folder_id in level if folder_id in walk.children)
+        tasks = [self.executor.submit(walk.list_folder, folder_id, folder_id != skip_pdfs)
+                 for folder_id in level if folder_id not in walk.children]
+        tasks += self._submit_batches(walk, known, named=True)
+        found = self._collect(walk, tasks, log)
+
+        searched = [folder_id for folder_id in level if folder_id != skip_pdfs]
+        if not found and walk.names and searched:
+            # Drive found no name starting with the ID (e.g. 'EMFHS2025-A7K-B9.pdf'): list every PDF here
+            walk.stats['full_listings'] += len(searched)
+            found = self._collect(walk, self._submit_batches(walk, searched, named=False), log)
+        return found
+
+    def _submit_batches(self, walk, folder_ids, named):
+        return [self.executor.submit(walk.list_pdfs, folder_ids[start:start + PARENTS_PER_QUERY], named)
+                for start in range(0, len(folder_ids), PARENTS_PER_QUERY)]
+
+    def _collect(self, walk, tasks, log):
+        found = []
+        for task in as_completed(tasks):
+            if task.cancelled():
+                continue
+            try:
+                found.extend(walk.strict_matches(task.result()))
+            except Exception as e:
+                walk.stats['errors'] += 1
+                log(f"⚠️ Deep search listing failed: {str(e)}")
+                continue
+            if found and not walk.stop.is_set():
+                walk.stop.set()
+                walk.stats['stopped_early'] = True
+                for other in tasks:
+                    other.cancel()
+        return found
+
+    def _next_level(self, walk, level, visited):
+        """Subfolders of a level, within the fan-out and folder limits"""
+        next_level = []
+        for folder_id in level:
+            children = walk.children.get(folder_id, [])
+            followed = children[:max(0, min(self.max_fanout, self.max_folders - visited))]
+            walk.stats['truncated'] += len(children) - len(followed)
+            next_level.extend(followed)
+            visited += len(followed)
+        return next_level, visited
+
+    def _record(self, stats, found):
+        with self._stats_lock:
+            self.stats['searches'] += 1
+            self.stats['found'] += bool(found)
+            for name in ('folders', 'queries', 'truncated', 'full_listings'):
+                self.stats[name] += stats[name]
+            self.stats['total_ms'] += stats['elapsed_ms']
+            self.stats['max_ms'] = max(self.stats['max_ms'], stats['elapsed_ms'])
+
+
+subfolder_search = SubfolderSearch()
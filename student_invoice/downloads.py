@@ -0,0 +1,158 @@
+# downloads.py - STREAMING REPORT CARD DOWNLOADS (RANGE + CONDITIONAL GET)
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import content_disposition_header, http_date
+
+from .drive_service import DriveFileNotFound
+from .models import ReportCardFile
+
+RANGE_HEADER_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """The Range header asks for bytes outside the file"""
+
+
+def parse_range_header(header, size):
+    """
+    Turn a single-range 'Range: bytes=a-b' header into (start, end), both inclusive
+    Returns None for a missing or unsupported header (serve the whole file)
+    """
+    if not header:
+        return None
+
+    match = RANGE_HEADER_PATTERN.match(header.strip())
+    if not match:
+        return None  # Multi-range or malformed: RFC 7233 allows ignoring it
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+# ============ WHICH FILES MAY BE DOWNLOADED ============
+# /download/ is open to parents who are not logged in, so it only serves report
+# cards: PDFs in the result index, or files a search or class listing returned.
+# Any other file the service account can read is answered 404.
+
+def _grants():
+    return caches[getattr(settings, 'DRIVE_CACHE_ALIAS', 'default')]
+
+
+def allow_downloads(file_ids):
+    """Let /download/ serve these files (search results) for DOWNLOAD_GRANT_TTL seconds"""
+    grants = {f"download_grant:{file_id}": True for file_id in file_ids if file_id}
+    if grants:
+        _grants().set_many(grants, timeout=getattr(settings, 'DOWNLOAD_GRANT_TTL', 6 * 60 * 60))
+
+
+def download_allowed(file_id):
+    if _grants().get(f"download_grant:{file_id}"):
+        return True
+    return ReportCardFile.objects.filter(drive_id=file_id).exists()
+
+
+def get_download_metadata(drive_service, file_id):
+    """
+    Name, size, ETag and Last-Modified for a file, from Drive's (briefly cached) metadata
+    The result index is not used here: a report card replaced since the last sync
+    would get the old size and checksum while its new bytes stream from Drive.
+    """
+    if not download_allowed(file_id):
+        raise DriveFileNotFound(f"File not found: {file_id}")
+
+    file_info = drive_service.get_download_info(file_id)
+    return {
+        'name': file_info.get('name', 'result.pdf'),
+        'size': int(file_info.get('size') or 0),
+        'md5Checksum': file_info.get('md5Checksum', ''),
+        'modified_time': parse_datetime(file_info['modifiedTime']) if file_info.get('modifiedTime') else None,
+    }
+
+
+def iter_cached_file(path, start, end, chunk_size=64 * 1024):
+    """Bytes [start, end] (inclusive) of a cached PDF"""
+    with open(path, 'rb') as cached_file:
+        cached_file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = cached_file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def build_download_response(request, metadata, stream_content, cached_path=None, wrap_iterator=None):
+    """
+    304 / 416 / 206 / 200 response for a download
+    stream_content(start, end) must return an iterator over the requested bytes.
+    With cached_path the bytes come from the local PDF cache instead.
+    wrap_iterator (e.g. drive_pool.iterate) turns the cached bytes into an async
+    iterator for async views: ASGI servers have no sendfile(), and Django reads
+    a synchronous FileResponse into memory before an async view can send it.
+    Without it (sync views under WSGI) whole-file GETs become a FileResponse.
+    """
+    etag = f'"{metadata["md5Checksum"]}"' if metadata['md5Checksum'] else None
+    last_modified = int(metadata['modified_time'].timestamp()) if metadata['modified_time'] else None
+
+    # If-None-Match / If-Modified-Since: answer 304 without fetching anything
+    conditional_response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional_response is not None:
+        return conditional_response
+
+    size = metadata['size']
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or (etag and if_range == etag):
+        try:
+            byte_range = parse_range_header(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+
+    start, end = byte_range if byte_range else (0, size - 1)
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type='application/pdf')
+    elif cached_path and not byte_range and not wrap_iterator:
+        response = FileResponse(open(cached_path, 'rb'), content_type='application/pdf')
+    elif cached_path:
+        chunks = iter_cached_file(cached_path, start, end)
+        if wrap_iterator:
+            chunks = wrap_iterator(chunks)
+        response = StreamingHttpResponse(chunks, content_type='application/pdf')
+    else:
+        response = StreamingHttpResponse(stream_content(start, end), content_type='application/pdf')
+
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    response['Content-Length'] = str(end - start + 1 if size else 0)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(True, metadata['name'])
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,42 @@
+# drive_listing.py - PAGINATED, STREAMING files().list
+MAX_PAGE_SIZE = 1000  # Largest pageSize Drive v3 accepts for files().list
+
+
+class DriveListing:
+    """
+    Lazy files().list over every page of results
+    Iterate it to stream files one by one; stop early and no further pages are fetched.
+    `pages` and `files_seen` count what this listing actually pulled from Drive.
+    """
+
+    def __init__(self, service, query, fields, page_size=MAX_PAGE_SIZE, on_done=None):
+        self.service = service
+        self.query = query
+        self.fields = fields
+        self.page_size = page_size
+        self.on_done = on_done
+        self.pages = 0
+        self.files_seen = 0
+
+    def __iter__(self):
+        page_token = None
+        try:
+            while True:
+                results = self.service.files().list(
+                    q=self.query,
+                    fields=f"nextPageToken, files({self.fields})",
+                    pageSize=self.page_size,
+                    pageToken=page_token
+                ).execute()
+                self.pages += 1
+
+                for item in results.get('files', []):
+                    self.files_seen += 1
+                    yield item
+
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
+        finally:
+            if self.on_done:
+                self.on_done(self)
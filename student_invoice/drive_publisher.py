@@ -0,0 +1,248 @@
+# drive_publisher.py - PUBLISH RENDERED REPORT CARDS INTO THE DRIVE TERM/CLASS TREE
+"""
+Upload a local folder of report card PDFs (render_report_cards output) to Drive
+
+    <source>/FIRST TERM 2025-2026/JSS1/ADA OBI EMFHS-2025-A7K-B9.pdf
+        -> <main folder>/FIRST TERM 2025-2026/JSS1/ADA OBI EMFHS-2025-A7K-B9.pdf
+
+Existing term/class folders are found with the same matching the searches use;
+missing class folders are created together in one batch request. Each class
+folder is listed once, and a file whose md5Checksum already matches the local
+copy is not sent again, so republishing a corrected class only uploads the
+cards that changed. Uploads are resumable: after a dropped connection or a 5xx
+the upload carries on from the last byte Drive acknowledged.
+"""
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from .drive_service import FolderNotFound
+from .report_pdf import term_folder_name
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+PDF_MIME_TYPE = 'application/pdf'
+
+# Resumable chunks must be a multiple of 256 KB; most report cards fit in one
+UPLOAD_CHUNK_SIZE = 4 * 256 * 1024
+# Drive accepts at most 100 calls in one batch request
+BATCH_LIMIT = 100
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class PublishError(Exception):
+    """The local tree is missing or Drive rejected part of the publish"""
+
+
+def file_md5(path, block_size=1024 * 1024):
+    """md5 hex digest of a local file (what Drive reports as md5Checksum)"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as local_file:
+        for block in iter(lambda: local_file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_retryable(error):
+    """5xx/429 from Drive, or the connection dropped mid-chunk"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is not None:
+        return int(status) in RETRYABLE_STATUSES
+    return isinstance(error, OSError)
+
+
+class DrivePublisher:
+    """
+    Publish one term of rendered report cards
+
+    drive is a GoogleDriveService authenticated with PUBLISH_SCOPES (or one whose
+    .service is a FakeDrive resource). Uploads run on max_workers threads; each
+    thread gets its own Drive client from drive.service.
+    """
+
+    def __init__(self, drive, max_workers=8, chunk_size=UPLOAD_CHUNK_SIZE,
+                 max_retries=5, retry_delay=1.0, log=print):
+        self.drive = drive
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.log = log
+        self._stats_lock = threading.Lock()
+        self.stats = {'chunks': 0, 'retries': 0}
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    # ============ FOLDERS ============
+    def ensure_term_folder(self, term, session):
+        """ID of the term folder, created in the main folder if it does not exist yet"""
+        try:
+            return self.drive.find_term_folder(term, session)
+        except FolderNotFound:
+            pass
+
+        name = term_folder_name(term, session)
+        folder = self.drive.service.files().create(
+            body={'name': name, 'mimeType': FOLDER_MIME_TYPE, 'parents': [self.drive.main_folder_id]},
+            fields='id',
+        ).execute()
+        self.log(f"📁 Created term folder '{name}'")
+        self.drive.folder_cache.invalidate()  # Drops the "not found" answer and the folder snapshot
+        self.drive.folder_cache.set('term', (term, session), folder['id'])
+        return folder['id']
+
+    def ensure_class_folders(self, term, session, term_folder_id, class_names):
+        """{class name: folder ID}; missing class folders are created in batch requests"""
+        query = f"'{term_folder_id}' in parents and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
+        existing = list(self.drive.list_files(query, "id, name", label='publish_folders'))
+
+        folder_ids, missing = {}, []
+        for class_name in class_names:
+            match = next((folder for folder in existing
+                          if self.drive._class_folder_matches(class_name, folder['name'])), None)
+            if match:
+                folder_ids[class_name] = match['id']
+            else:
+                missing.append(class_name)
+
+        for start in range(0, len(missing), BATCH_LIMIT):
+            folder_ids.update(self._create_folders(term_folder_id, missing[start:start + BATCH_LIMIT]))
+        if missing:
+            self.drive.folder_cache.invalidate()
+
+        for class_name, folder_id in folder_ids.items():
+            self.drive.folder_cache.set('class', (term, session, class_name), folder_id)
+        return folder_ids
+
+    def _create_folders(self, parent_id, names):
+        """Create several folders in one HTTP round trip"""
+        created, errors = {}, {}
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+            else:
+                created[request_id] = response['id']
+
+        files = self.drive.service.files()
+        batch = self.drive.service.new_batch_http_request(callback=on_response)
+        for name in names:
+            batch.add(
+                files.create(body={'name': name, 'mimeType': FOLDER_MIME_TYPE, 'parents': [parent_id]}, fields='id'),
+                request_id=name,
+            )
+        batch.execute()
+
+        if errors:
+            raise PublishError(f"Could not create folder(s): {', '.join(sorted(errors))}")
+        self.log(f"📁 Created {len(created)} class folder(s) in one batch: {', '.join(names)}")
+        return created
+
+    # ============ FILES ============
+    def publish_file(self, path, folder_id, remote=None):
+        """
+        Upload one PDF unless Drive already has identical bytes
+        remote: the existing Drive file of the same name ({id, md5Checksum}) or None
+        Returns 'unchanged', 'updated' or 'created'
+        """
+        from googleapiclient.http import MediaIoBaseUpload
+
+        local_md5 = file_md5(path)
+        if remote and remote.get('md5Checksum') == local_md5:
+            return 'unchanged'
+
+        files = self.drive.service.files()
+        with open(path, 'rb') as local_file:
+            media = MediaIoBaseUpload(local_file, mimetype=PDF_MIME_TYPE, chunksize=self.chunk_size, resumable=True)
+            if remote:
+                request = files.update(fileId=remote['id'], media_body=media, fields='id, md5Checksum')
+            else:
+                request = files.create(
+                    body={'name': path.name, 'parents': [folder_id], 'mimeType': PDF_MIME_TYPE},
+                    media_body=media,
+                    fields='id, md5Checksum',
+                )
+            uploaded = self._upload(request)
+
+        if uploaded.get('md5Checksum') and uploaded['md5Checksum'] != local_md5:
+            raise PublishError(f"Checksum mismatch after uploading {path.name}")
+        if remote:
+            self.drive.metadata_cache.forget([remote['id']])  # Size and checksum just changed
+        return 'updated' if remote else 'created'
+
+    def _upload(self, request):
+        """Send a resumable upload chunk by chunk, resuming after transient failures"""
+        failures = 0
+        response = None
+        while response is None:
+            try:
+                _, response = request.next_chunk()
+            except Exception as e:
+                if not _is_retryable(e) or failures >= self.max_retries:
+                    raise
+                failures += 1
+                self._count('retries')
+                # The next next_chunk() asks Drive how far it got and continues from there
+                time.sleep(self.retry_delay * (2 ** (failures - 1)) * random.uniform(0.5, 1.5))
+                continue
+            self._count('chunks')
+            failures = 0
+        return response
+
+    # ============ PUBLISH ============
+    def publish(self, source_root, term, session, class_names=None):
+        """
+        Publish <source_root>/<term folder>/<CLASS>/*.pdf for one term
+        Returns a summary: created/updated/unchanged/failed counts, bytes sent, retries, seconds
+        """
+        term_dir = Path(source_root) / term_folder_name(term, session)
+        if not term_dir.is_dir():
+            raise PublishError(f"Nothing to publish: {term_dir} does not exist")
+
+        local_classes = {
+            class_dir.name: sorted(class_dir.glob('*.pdf'))
+            for class_dir in sorted(term_dir.iterdir())
+            if class_dir.is_dir() and (not class_names or class_dir.name in class_names)
+        }
+        local_classes = {name: paths for name, paths in local_classes.items() if paths}
+        summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'bytes': 0}
+        if not local_classes:
+            return summary
+
+        start = time.perf_counter()
+        retries_before = self.stats['retries']
+        term_folder_id = self.ensure_term_folder(term, session)
+        folder_ids = self.ensure_class_folders(term, session, term_folder_id, list(local_classes))
+
+        jobs = []
+        for class_name, paths in local_classes.items():
+            folder_id = folder_ids[class_name]
+            query = f"'{folder_id}' in parents and mimeType='{PDF_MIME_TYPE}' and trashed=false"
+            remote_files = {
+                remote['name']: remote
+                for remote in self.drive.list_files(query, "id, name, md5Checksum", label='publish_pdfs')
+            }
+            jobs.extend((path, folder_id, remote_files.get(path.name)) for path in paths)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.publish_file, *job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    summary['failed'] += 1
+                    self.log(f"❌ {path.parent.name}/{path.name}: {str(e)}")
+                    continue
+                summary[outcome] += 1
+                if outcome != 'unchanged':
+                    summary['bytes'] += path.stat().st_size
+                    self.log(f"⬆️  {path.parent.name}/{path.name} ({outcome})")
+
+        summary['retries'] = self.stats['retries'] - retries_before
+        summary['seconds'] = round(time.perf_counter() - start, 2)
+        return summary
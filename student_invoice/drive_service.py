@@ -1,44 +1,119 @@
 # drive_service.py - UPDATED FOR NEW ID FORMAT: EMFHS-YYYY-XXX-XX
 import os
 import json
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+import threading
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 import re
 from datetime import datetime
 from dotenv import load_dotenv
 
+from .drive_listing import MAX_PAGE_SIZE, DriveListing
+from .file_metadata import file_metadata_cache
+from .folder_cache import folder_cache
+from .folder_snapshot import folder_snapshots
+from .deep_search import subfolder_search
+from .id_matcher import MATCH_ANYWHERE, MATCH_COMPONENT, MATCH_EXACT, StudentIdMatcher
+from .result_index import search_index
+from .single_flight import SingleFlight
+from .id_filter import check_student_id
+
+
+class FolderNotFound(Exception):
+    """A term or class folder does not exist in Drive (safe to cache as a negative answer)"""
+
+
+class DriveFileNotFound(Exception):
+    """Drive answered 404 for a file ID"""
+
+
 class GoogleDriveService:
-    def __init__(self):
+    READONLY_SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+    # Publishing report cards (see drive_publisher.py) creates folders and uploads files
+    PUBLISH_SCOPES = ['https://www.googleapis.com/auth/drive']
+    
+    def __init__(self, scopes=None):
         # Load environment variables from .env file
         load_dotenv()
         
-        self.SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
-        self.service = self._authenticate()
+        self.SCOPES = scopes or self.READONLY_SCOPES
+        
+        # The Drive client is built on first use, not at import (see the service property).
+        # It runs on a pooled, thread-safe transport (drive_transport.py), so every
+        # thread shares one client, one connection pool and one access token.
+        self._service = None
+        self._client = None
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+        self.http = None
         
         # MAIN "Emilia Report Card" FOLDER ID
         self.main_folder_id = "1S4UZEqGhCeBa-n3895jmSF22neTzCTZn"
         
-        # Cache for folder IDs
-        self.term_folders_cache = {}
-        self.class_folders_cache = {}
+        # Cache for folder IDs (shared by all workers through Django's cache framework)
+        self.folder_cache = folder_cache
+        
+        # Every term/class folder indexed by canonical (session, term, class) keys
+        self.folder_snapshots = folder_snapshots
+        
+        # Breadth-first search of nested class folders (timing counters in self.subfolder_search.stats)
+        self.subfolder_search = subfolder_search
+        
+        # Short-lived file metadata, filled by batched files().get/list calls
+        self.metadata_cache = file_metadata_cache
+        
+        # Listing instrumentation: label -> calls / pages / files pulled from Drive
+        # (updated from request, pool and deep search threads, so only under the lock)
+        self.listing_stats = {}
+        self._stats_lock = threading.Lock()
         
-        print("✅ Drive Service Ready - Emilia School Result System")
-        print("🔐 Authentication: Using environment variables (.env)")
-        print("🔑 Student ID Verification: STRICT ID MATCHING ENABLED")
-        print("📊 Student ID Formats: Supports EMFHS-YYYY-XXX-XX, YYYY-NNN, etc.")
-        print("🆕 NEW FORMAT: EMFHS-YYYY-XXX-XX (XXX = mixed alphanumeric)")
-        print("🔍 Search Mode: Requires EXACT Student ID in filename")
-        print("⚠️  Year Matching: DISABLED - Search any session regardless of ID year")
+        # Identical class listings in flight at the same time share one Drive call
+        # (hit/miss counters in self.single_flight.stats)
+        self.single_flight = SingleFlight()
+        
+    @property
+    def service(self):
+        """Drive v3 client shared by every thread, authenticated on first access"""
+        if self._service is not None:
+            return self._service  # Client injected from outside (e.g. a fake Drive)
+        
+        if self._client is None:
+            credentials = self._get_credentials()
+            with self._credentials_lock:
+                if self._client is None:
+                    self._client = self._build_client(credentials)
+        return self._client
+    
+    @service.setter
+    def service(self, value):
+        self._service = value
+    
+    def _get_credentials(self):
+        """Service account credentials, loaded once per process (thread-safe)"""
+        if self._credentials is None:
+            with self._credentials_lock:
+                if self._credentials is None:
+                    self._credentials = self._authenticate()
+                    print("✅ Drive Service Ready - Emilia School Result System")
+                    print("🔐 Authentication: Using environment variables (.env)")
+                    print("🔑 Student ID Verification: STRICT ID MATCHING ENABLED")
+                    print("📊 Student ID Formats: Supports EMFHS-YYYY-XXX-XX, YYYY-NNN, etc.")
+                    print("🆕 NEW FORMAT: EMFHS-YYYY-XXX-XX (XXX = mixed alphanumeric)")
+                    print("🔍 Search Mode: Requires EXACT Student ID in filename")
+                    print("⚠️  Year Matching: DISABLED - Search any session regardless of ID year")
+        return self._credentials
     
     def _authenticate(self):
-        """Connect to Google Drive using environment variables"""
+        """Load service account credentials from environment variables"""
         # Get credentials JSON from environment variable
         creds_json = os.getenv('GOOGLE_CREDENTIALS')
         
         if not creds_json:
             raise Exception("❌ GOOGLE_CREDENTIALS not found in environment variables. Check your .env file")
         
+        # Imported here: googleapiclient alone adds ~250ms to every process that imports this module
+        from google.oauth2 import service_account
+        
         try:
             # Parse the JSON string from .env
             creds_dict = json.loads(creds_json)
@@ -49,38 +124,97 @@ class GoogleDriveService:
             )
             
             print(f"✅ Authenticated as: {creds_dict.get('client_email')}")
-            return build('drive', 'v3', credentials=credentials)
+            return credentials
             
         except json.JSONDecodeError as e:
             raise Exception(f"❌ Invalid JSON in GOOGLE_CREDENTIALS: {str(e)}")
         except Exception as e:
             raise Exception(f"❌ Authentication failed: {str(e)}")
     
+    def _build_client(self, credentials):
+        """Connect to Google Drive with the shared credentials over the pooled transport"""
+        from googleapiclient.discovery import build
+        from .drive_transport import PooledHttp
+        
+        self.http = PooledHttp(
+            credentials,
+            pool_size=getattr(settings, 'DRIVE_HTTP_POOL_SIZE', 16),
+            timeout=getattr(settings, 'DRIVE_HTTP_TIMEOUT', 60),
+        )
+        # static_discovery: use the discovery document bundled with googleapiclient
+        # instead of fetching it over the network on every build
+        return build('drive', 'v3', http=self.http,
+                     static_discovery=True, cache_discovery=False)
+    
+    MATCH_LABELS = {
+        MATCH_EXACT: 'EXACT ID MATCH FOUND',
+        MATCH_COMPONENT: 'ID COMPONENT MATCH',
+        MATCH_ANYWHERE: 'ID APPEARS IN FILENAME',
+    }
+    
+    # Only the metadata the result pages actually show
+    PDF_FIELDS = "id, name, size, modifiedTime, webViewLink, webContentLink"
+    
+    def list_files(self, query, fields, label='files'):
+        """
+        Stream every file matching a Drive query, following nextPageToken
+        Page/file counts per label are kept in self.listing_stats
+        """
+        return DriveListing(self.service, query, fields, on_done=lambda listing: self._record_listing(label, listing))
+    
+    def list_class_pdfs(self, folder_id):
+        """
+        Every PDF in a class folder, as a list shared by concurrent identical requests
+        At release time a whole class searches at once; only one of them lists Drive.
+        """
+        query = f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false"
+        return self.single_flight.do(
+            f"class_pdfs:{folder_id}",
+            lambda: list(self.list_files(query, self.PDF_FIELDS, label='class_pdfs'))
+        )
+    
+    def _record_listing(self, label, listing):
+        """Add one finished (or abandoned) listing to the instrumentation counters"""
+        self._count_listing(label, pages=listing.pages, files=listing.files_seen)
+    
+    def _count_listing(self, label, pages=0, files=0):
+        with self._stats_lock:
+            stats = self.listing_stats.setdefault(label, {'calls': 0, 'pages': 0, 'files': 0})
+            stats['calls'] += 1
+            stats['pages'] += pages
+            stats['files'] += files
+    
     def find_term_folder(self, term_number, session):
         """
         Find term folder based on term number and session
         term_number: 1, 2, or 3
         session: '2025/2026', '2024/2025', etc.
         """
-        cache_key = f"{term_number}-{session}"
-        if cache_key in self.term_folders_cache:
-            return self.term_folders_cache[cache_key]
+        cache_parts = (term_number, session)
+        cached, folder_id = self.folder_cache.get('term', *cache_parts)
+        if cached:
+            if folder_id is None:
+                raise FolderNotFound(f"Term {term_number} {session} folder not found (cached)")
+            return folder_id
+        
+        answered, folder_id = self._snapshot_lookup(lambda snapshot: snapshot.term_folder(session, term_number))
+        if answered:
+            if folder_id is None:
+                self.folder_cache.set_missing('term', cache_parts)
+                print(f"❌ Term {term_number} {session} folder not found")
+                raise FolderNotFound(f"Term {term_number} {session} folder not found")
+            self.folder_cache.set('term', cache_parts, folder_id)
+            return folder_id
         
         print(f"🔍 Looking for Term {term_number} {session} folder...")
         
         try:
             # List all folders in main directory
             query = f"'{self.main_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.service.files().list(
-                q=query,
-                fields="files(id, name)",
-                pageSize=50
-            ).execute()
-            
-            all_folders = results.get('files', [])
+            all_folders = list(self.list_files(query, "id, name", label='term_folders'))
             
             if not all_folders:
-                raise Exception(f"No term folders found in main directory")
+                raise FolderNotFound(f"No term folders found in main directory")
             
             # Term mapping with variations
             term_mapping = {
@@ -127,7 +261,7 @@ class GoogleDriveService:
                 print("📋 Available folders in main directory:")
                 for folder in all_folders:
                     print(f"   📁 {folder['name']}")
-                raise Exception(f"No folders found for session {session}")
+                raise FolderNotFound(f"No folders found for session {session}")
             
             # Now look for term match among session-matched folders
             term_keywords = term_mapping.get(str(term_number), {})
@@ -140,7 +274,7 @@ class GoogleDriveService:
                     folder_name_upper = folder['name'].upper()
                     if priority_term in folder_name_upper:
                         print(f"✅ Found exact match: '{folder['name']}'")
-                        self.term_folders_cache[cache_key] = folder['id']
+                        self.folder_cache.set('term', cache_parts, folder['id'])
                         return folder['id']
             
             # Then try any keyword match
@@ -149,7 +283,7 @@ class GoogleDriveService:
                     folder_name_upper = folder['name'].upper()
                     if keyword in folder_name_upper:
                         print(f"✅ Found keyword match: '{folder['name']}'")
-                        self.term_folders_cache[cache_key] = folder['id']
+                        self.folder_cache.set('term', cache_parts, folder['id'])
                         return folder['id']
             
             # If still not found, show what we found
@@ -157,17 +291,34 @@ class GoogleDriveService:
             for folder in matching_folders:
                 print(f"   📁 {folder['name']}")
             
-            raise Exception(f"Term {term_number} not found among session folders")
+            raise FolderNotFound(f"Term {term_number} not found among session folders")
             
+        except FolderNotFound as e:
+            self.folder_cache.set_missing('term', cache_parts)
+            print(f"❌ Error finding term folder: {str(e)}")
+            raise
         except Exception as e:
             print(f"❌ Error finding term folder: {str(e)}")
             raise
     
     def find_class_folder(self, term_number, session, class_name):
         """Find class folder inside term folder"""
-        cache_key = f"{term_number}-{session}-{class_name}"
-        if cache_key in self.class_folders_cache:
-            return self.class_folders_cache[cache_key]
+        cache_parts = (term_number, session, class_name)
+        cached, folder_id = self.folder_cache.get('class', *cache_parts)
+        if cached:
+            if folder_id is None:
+                raise FolderNotFound(f"Class {class_name} not found in Term {term_number} {session} (cached)")
+            return folder_id
+        
+        answered, folder_id = self._snapshot_lookup(
+            lambda snapshot: snapshot.class_folder(session, term_number, class_name))
+        if answered:
+            if folder_id is None:
+                self.folder_cache.set_missing('class', cache_parts)
+                print(f"❌ Class {class_name} not found in Term {term_number} {session}")
+                raise FolderNotFound(f"Class {class_name} not found in Term {term_number} {session}")
+            self.folder_cache.set('class', cache_parts, folder_id)
+            return folder_id
         
         try:
             # First find the term folder
@@ -177,24 +328,19 @@ class GoogleDriveService:
             
             # List all folders inside term folder
             query = f"'{term_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.service.files().list(
-                q=query,
-                fields="files(id, name)",
-                pageSize=50
-            ).execute()
+            class_folders = []
             
-            class_folders = results.get('files', [])
+            for folder in self.list_files(query, "id, name", label='class_folders'):
+                class_folders.append(folder)
+                if self._class_folder_matches(class_name, folder['name']):
+                    print(f"✅ Found class folder: '{folder['name']}'")
+                    self.folder_cache.set('class', cache_parts, folder['id'])
+                    return folder['id']
             
             if not class_folders:
                 # Try to find if there are nested folders
                 query_all = f"'{term_folder_id}' in parents and trashed=false"
-                results_all = self.service.files().list(
-                    q=query_all,
-                    fields="files(id, name, mimeType)",
-                    pageSize=100
-                ).execute()
-                
-                all_items = results_all.get('files', [])
+                all_items = list(self.list_files(query_all, "id, name, mimeType", label='term_items'))
                 print(f"📁 Found {len(all_items)} items in term folder")
                 
                 # Look for folders that might contain class name
@@ -209,7 +355,7 @@ class GoogleDriveService:
                             (class_name.startswith('SS') and f"SS {class_name[2:]}" in folder_name_upper)):
                             
                             print(f"✅ Found class folder (nested): '{item['name']}'")
-                            self.class_folders_cache[cache_key] = item['id']
+                            self.folder_cache.set('class', cache_parts, item['id'])
                             return item['id']
                 
                 # If we get here, show what we found
@@ -218,55 +364,66 @@ class GoogleDriveService:
                 for folder in folders_in_term:
                     print(f"   📁 {folder['name']}")
                 
-                raise Exception(f"No class folders found in Term {term_number}")
-            
-            # Look for class folder directly
-            class_upper = class_name.upper()
-            
-            for folder in class_folders:
-                folder_name_upper = folder['name'].upper()
-                
-                # Exact match
-                if class_upper == folder_name_upper:
-                    print(f"✅ Found class folder: '{folder['name']}'")
-                    self.class_folders_cache[cache_key] = folder['id']
-                    return folder['id']
-                
-                # Contains match
-                if class_upper in folder_name_upper:
-                    print(f"✅ Found class folder (contains): '{folder['name']}'")
-                    self.class_folders_cache[cache_key] = folder['id']
-                    return folder['id']
-                
-                # Try variations
-                class_variations = [
-                    class_upper,
-                    class_upper.replace(' ', ''),
-                    class_upper.replace('SS', 'S S'),
-                    class_upper.replace('JSS', 'J S S'),
-                    f"JSS {class_name[3:]}" if class_name.startswith('JSS') else None,
-                    f"SS {class_name[2:]}" if class_name.startswith('SS') else None,
-                    f"{class_name} REPORT",
-                    f"REPORT {class_name}"
-                ]
-                
-                for variation in class_variations:
-                    if variation and variation in folder_name_upper:
-                        print(f"✅ Found class folder (variation): '{folder['name']}'")
-                        self.class_folders_cache[cache_key] = folder['id']
-                        return folder['id']
+                raise FolderNotFound(f"No class folders found in Term {term_number}")
             
             # Show available class folders
             print(f"📋 Available class folders in Term {term_number}:")
             for folder in class_folders:
                 print(f"   📁 {folder['name']}")
             
-            raise Exception(f"Class {class_name} not found in Term {term_number}")
+            raise FolderNotFound(f"Class {class_name} not found in Term {term_number}")
             
+        except FolderNotFound as e:
+            self.folder_cache.set_missing('class', cache_parts)
+            print(f"❌ Error finding class folder: {str(e)}")
+            raise
         except Exception as e:
             print(f"❌ Error finding class folder: {str(e)}")
             raise
     
+    def _snapshot_lookup(self, lookup):
+        """
+        (answered, folder_id) from the whole-tree folder snapshot (folder_snapshot.py)
+        A miss in a snapshot older than the negative cache TTL rebuilds it once, in
+        case the folder was added since; a miss in a fresh snapshot is final.
+        answered is False only when the snapshot cannot be built (the folder scans take over).
+        """
+        try:
+            snapshot = self.folder_snapshots.get_or_build(self)
+            folder_id = lookup(snapshot)
+            if folder_id is None and snapshot.age() > self.folder_cache.negative_ttl:
+                folder_id = lookup(self.folder_snapshots.refresh(self, older_than=self.folder_cache.negative_ttl))
+        except Exception as e:
+            print(f"⚠️ Folder snapshot unavailable, scanning folders instead: {str(e)}")
+            return False, None
+        return True, folder_id
+    
+    def _class_folder_matches(self, class_name, folder_name):
+        """Check if a folder name is the class folder (exact, contains or a spelling variation)"""
+        class_upper = class_name.upper()
+        folder_name_upper = folder_name.upper()
+        
+        # Exact or contains match
+        if class_upper in folder_name_upper:
+            return True
+        
+        # Try variations
+        class_variations = [
+            class_upper.replace(' ', ''),
+            class_upper.replace('SS', 'S S'),
+            class_upper.replace('JSS', 'J S S'),
+            f"JSS {class_name[3:]}" if class_name.startswith('JSS') else None,
+            f"SS {class_name[2:]}" if class_name.startswith('SS') else None,
+            f"{class_name} REPORT",
+            f"REPORT {class_name}"
+        ]
+        
+        for variation in class_variations:
+            if variation and variation in folder_name_upper:
+                return True
+        
+        return False
+    
     def search_student_pdf(self, term_number, session, class_name, student_name, student_id=None):
         """
         Find student PDF with STRICT ID MATCHING ONLY
@@ -285,229 +442,160 @@ class GoogleDriveService:
             print("❌ Student ID is required for search")
             return []
         
+        # Malformed, mistyped or never-issued IDs never reach the index or Drive
+        rejection = check_student_id(student_id)
+        if rejection:
+            print(f"❌ {student_id} rejected before searching ({rejection})")
+            return []
+
+        # 0. Answer from the local index when it has the report card; a miss is not
+        #    final (a PDF added since the last sync), so Drive is searched next
+        indexed_pdfs = self._search_index_with_strict_id(term_number, session, class_name, student_id)
+        if indexed_pdfs:
+            return indexed_pdfs
+
         try:
             # 1. Find class folder
-            folder_id = self.find_class_folder(term_number, session, class_name)
-            
-            # 2. Search for PDFs
-            query = f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false"
-            results = self.service.files().list(
-                q=query,
-                fields="files(id, name, size, modifiedTime, webViewLink, webContentLink)",
-                pageSize=200
-            ).execute()
-            
-            all_pdfs = results.get('files', [])
-            print(f"📄 Found {len(all_pdfs)} PDFs in {class_name} folder")
-            
-            if not all_pdfs:
-                # Try searching in all files (including subfolders)
+            try:
+                folder_id = self.find_class_folder(term_number, session, class_name)
+            except FolderNotFound:
+                # No folder named for the class: look through the whole term folder
                 return self._search_deep_with_strict_id(term_number, session, class_name, student_id)
             
-            # 3. STRICT ID MATCHING: Search for student with EXACT ID in filename
-            student_id_upper = student_id.upper().strip()
-            found_pdfs = []
-            
-            for pdf in all_pdfs:
-                pdf_name = pdf['name'].upper()
-                
-                # STRATEGY 1: EXACT ID MATCH in filename (MOST IMPORTANT)
-                if self._exact_id_match(student_id_upper, pdf_name):
-                    print(f"✅ EXACT ID MATCH FOUND: '{pdf['name']}'")
-                    found_pdfs.append(self._format_file_info(pdf))
-                    continue
-                
-                # STRATEGY 2: ID COMPONENT MATCH (e.g., EMFHS-2025-A7K matches EMFHS-2025-A7K-B9)
-                if self._id_components_match(student_id_upper, pdf_name):
-                    print(f"✅ ID COMPONENT MATCH: '{pdf['name']}'")
-                    found_pdfs.append(self._format_file_info(pdf))
-                    continue
-                
-                # STRATEGY 3: For backwards compatibility - check if ID appears anywhere
-                if self._id_appears_anywhere(student_id_upper, pdf_name):
-                    print(f"✅ ID APPEARS IN FILENAME: '{pdf['name']}'")
-                    found_pdfs.append(self._format_file_info(pdf))
-                    continue
-            
-            print(f"📊 Found {len(found_pdfs)} matching PDF(s) with STRICT ID verification")
-            return found_pdfs
+            # 2. Ask Drive only for the PDFs whose names contain the ID, verified strictly here
+            found_pdfs = self._search_by_name_with_strict_id(folder_id, student_id)
+            if found_pdfs:
+                return found_pdfs
             
-        except Exception as e:
-            print(f"❌ Search error: {str(e)}")
-            return []
-    
-    def _search_deep_with_strict_id(self, term_number, session, class_name, student_id):
-        """Search deeper with strict ID matching"""
-        print(f"🔍 Deep search with STRICT ID for ID: {student_id} in {class_name}...")
-        
-        try:
-            # Find term folder
-            term_folder_id = self.find_term_folder(term_number, session)
-            
-            student_id_upper = student_id.upper().strip()
+            # 3. Nothing by name (e.g. an unusual filename): list the whole class
+            #    (shared with concurrent searches of the same class)
+            all_pdfs = self.list_class_pdfs(folder_id)
             
-            # Build search query for all PDFs in term folder
-            query_parts = [
-                f"'{term_folder_id}' in parents",
-                "mimeType='application/pdf'",
-                "trashed=false"
-            ]
-            
-            query = ' and '.join(query_parts)
+            # 4. STRICT ID MATCHING: one pass over the folder with a precompiled matcher
+            #    exact ID, then ID components (EMFHS-2025-A7K matches EMFHS-2025-A7K-B9),
+            #    then (backwards compatibility) the ID appearing anywhere
+            matcher = StudentIdMatcher(student_id)
+            found_pdfs = []
             
-            results = self.service.files().list(
-                q=query,
-                fields="files(id, name, size, modifiedTime, webViewLink, webContentLink, parents)",
-                pageSize=200
-            ).execute()
+            for match_kind, pdf in matcher.filter(all_pdfs):
+                print(f"✅ {self.MATCH_LABELS[match_kind]}: '{pdf['name']}'")
+                # Copy: the listing is shared with other requests
+                found_pdfs.append(self._format_file_info(dict(pdf)))
             
-            all_pdfs = results.get('files', [])
-            print(f"📄 Found {len(all_pdfs)} PDFs in term folder")
+            print(f"📄 Scanned {len(all_pdfs)} PDFs in {class_name} folder")
             
-            found_pdfs = []
+            if not found_pdfs:
+                # Not in the class folder itself: try its subfolders (e.g. SS1/SS1A)
+                return self._search_deep_with_strict_id(term_number, session, class_name, student_id, folder_id)
             
-            for pdf in all_pdfs:
-                pdf_name_upper = pdf['name'].upper()
-                
-                # STRICT ID MATCHING in deep search
-                if self._exact_id_match(student_id_upper, pdf_name_upper):
-                    print(f"✅ DEEP SEARCH EXACT ID MATCH: '{pdf['name']}'")
-                    found_pdfs.append(self._format_file_info(pdf))
-                    continue
-                
-                # ID component match
-                if self._id_components_match(student_id_upper, pdf_name_upper):
-                    print(f"✅ DEEP SEARCH ID COMPONENT MATCH: '{pdf['name']}'")
-                    found_pdfs.append(self._format_file_info(pdf))
-                    continue
-            
-            print(f"📊 Found {len(found_pdfs)} matching PDF(s) in deep search with STRICT ID")
+            print(f"📊 Found {len(found_pdfs)} matching PDF(s) with STRICT ID verification")
             return found_pdfs
             
         except Exception as e:
-            print(f"❌ Deep search error: {str(e)}")
+            print(f"❌ Search error: {str(e)}")
             return []
     
-    def _exact_id_match(self, search_id, filename):
+    def _name_filter(self, matcher):
         """
-        Check for EXACT ID match in filename
-        Returns True if the exact student ID appears in the filename
-        Supports NEW format: EMFHS-YYYY-XXX-XX
+        Drive query clause for file names that contain the searched ID
+        The base (EMFHS-2025-A7K) and short (2025-A7K) forms are OR-ed together,
+        each written with '-', ' ' and '_' separators. None if the ID has neither form.
         """
-        # Normalize both
-        search_id_clean = search_id.upper().strip()
-        filename_upper = filename.upper()
-        
-        # Method 1: Direct exact match
-        if search_id_clean in filename_upper:
-            # Check if it's a whole word match (not part of another ID)
-            # Look for patterns like " EMFHS-2025-A7K-B9 " or "EMFHS-2025-A7K-B9.pdf"
-            pattern1 = f"\\b{re.escape(search_id_clean)}\\b"
-            if re.search(pattern1, filename_upper):
-                return True
-            
-            # Also check for ID at start/end of filename
-            if filename_upper.startswith(search_id_clean) or filename_upper.endswith(search_id_clean):
-                return True
-        
-        # Method 2: Check variations (with/without spaces, dashes, etc.)
-        variations = [
-            search_id_clean,
-            search_id_clean.replace('-', ' '),
-            search_id_clean.replace(' ', '-'),
-            search_id_clean.replace('_', '-'),
-            search_id_clean.replace('-', '_'),
-        ]
-        
-        for variation in variations:
-            if len(variation) > 5:  # Ensure meaningful length
-                pattern = f"\\b{re.escape(variation)}\\b"
-                if re.search(pattern, filename_upper):
-                    return True
+        terms = []
+        for form in (matcher.base_id, matcher.short_id):
+            for separator in ('-', ' ', '_'):
+                term = form.replace('-', separator)
+                if term and term not in terms:
+                    terms.append(term)
+        if not terms:
+            return None
         
-        return False
+        # Forms are letters, digits and separators only, so nothing needs quoting
+        return '(' + ' or '.join(f"name contains '{term}'" for term in terms) + ')'
     
-    def _id_components_match(self, search_id, filename):
+    def _name_query(self, folder_id, matcher):
+        """Drive query for the PDFs in a folder whose names contain the searched ID (None if it cannot)"""
+        names = self._name_filter(matcher)
+        if names is None:
+            return None
+        return f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false and {names}"
+    
+    def _search_by_name_with_strict_id(self, folder_id, student_id):
         """
-        Check if ID components match 
-        Supports:
-        1. NEW format: EMFHS-2025-A7K matches EMFHS-2025-A7K-B9
-        2. OLD format: EMFHS-2025-001 matches EMFHS-2025-001-T8
-        3. Year+code: 2025-A7K matches EMFHS-2025-A7K-B9
+        Strict ID search with the name filter pushed down to Drive
+        Drive returns the one or two candidate PDFs instead of the whole class; their
+        metadata is cached, so opening or downloading the result needs no further call
         """
-        search_id_clean = search_id.upper().strip()
-        filename_upper = filename.upper()
-        
-        # Pattern for NEW format: EMFHS-YYYY-XXX-XX (XXX = mixed alphanumeric)
-        pattern_new = r'(EMFHS-\d{4}-[A-Z0-9]{3})-[A-Z0-9]{2}'
-        match_new = re.search(pattern_new, search_id_clean)
-        
-        if match_new:
-            base_id = match_new.group(1)  # E.g., EMFHS-2025-A7K
-            # Check if this base ID appears in filename
-            if base_id in filename_upper:
-                return True
-        
-        # Pattern for OLD format: EMFHS-YYYY-NNN-XX (backwards compatibility)
-        pattern_old = r'(EMFHS-\d{4}-\d{3})-[A-Z0-9]{2}'
-        match_old = re.search(pattern_old, search_id_clean)
-        
-        if match_old:
-            base_id = match_old.group(1)  # E.g., EMFHS-2025-001
-            if base_id in filename_upper:
-                return True
-        
-        # Pattern for YYYY-XXX-XX (new format without EMFHS prefix)
-        pattern_short_new = r'(\d{4}-[A-Z0-9]{3})-[A-Z0-9]{2}'
-        match_short_new = re.search(pattern_short_new, search_id_clean)
-        
-        if match_short_new:
-            base_id = match_short_new.group(1)  # E.g., 2025-A7K
-            if base_id in filename_upper:
-                return True
-        
-        # Pattern for YYYY-NNN-XX (old format without EMFHS prefix)
-        pattern_short_old = r'(\d{4}-\d{3})-[A-Z0-9]{2}'
-        match_short_old = re.search(pattern_short_old, search_id_clean)
-        
-        if match_short_old:
-            base_id = match_short_old.group(1)  # E.g., 2025-001
-            if base_id in filename_upper:
-                return True
+        matcher = StudentIdMatcher(student_id)
+        query = self._name_query(folder_id, matcher)
+        if query is None:
+            return []
         
-        # Check for partial matches (e.g., 2025-A7K, 2025-001)
-        # Extract year and code from search ID
-        year_match = re.search(r'(\d{4})-[A-Z0-9]{3}', search_id_clean)  # New format
-        if not year_match:
-            year_match = re.search(r'(\d{4})-\d{3}', search_id_clean)    # Old format
+        candidates = list(self.list_files(query, self.METADATA_FIELDS, label='name_pdfs'))
+        self.metadata_cache.set_many({pdf['id']: pdf for pdf in candidates})
         
-        if year_match:
-            year = year_match.group(1)
-            # Try to get the code part
-            code_match_new = re.search(r'\d{4}-([A-Z0-9]{3})', search_id_clean)  # New format
-            code_match_old = re.search(r'\d{4}-(\d{3})', search_id_clean)        # Old format
-            
-            if code_match_new:
-                code = code_match_new.group(1)
-                # Look for YEAR-CODE pattern in filename
-                if f"{year}-{code}" in filename_upper:
-                    return True
-            elif code_match_old:
-                code = code_match_old.group(1)
-                # Look for YEAR-CODE pattern in filename
-                if f"{year}-{code}" in filename_upper:
-                    return True
+        found_pdfs = []
+        for match_kind, pdf in matcher.filter(candidates):
+            print(f"✅ {self.MATCH_LABELS[match_kind]}: '{pdf['name']}'")
+            found_pdfs.append(self._format_file_info(dict(pdf)))
         
-        return False
+        print(f"📄 Drive returned {len(candidates)} PDF(s) named like the ID, {len(found_pdfs)} verified")
+        return found_pdfs
     
-    def _id_appears_anywhere(self, search_id, filename):
+    def _search_index_with_strict_id(self, term_number, session, class_name, student_id):
         """
-        Check if ID appears anywhere in filename (least strict)
+        Search the local result index (see sync_result_index) with strict ID matching
+        Returns None when the index cannot answer, so the caller falls back to Drive
         """
-        search_id_clean = search_id.upper().strip()
-        filename_upper = filename.upper()
+        try:
+            candidates = search_index(term_number, session, class_name, student_id)
+        except Exception as e:
+            print(f"⚠️  Result index unavailable: {str(e)}")
+            return None
+
+        if candidates is None:
+            return None
+
+        matcher = StudentIdMatcher(student_id)
+        found_pdfs = [
+            self._format_file_info(report_card.as_file_info())
+            for report_card in candidates
+            if matcher.matches(report_card.name)
+        ]
+
+        print(f"📇 Found {len(found_pdfs)} matching PDF(s) in local result index")
+        return found_pdfs
+
+    def _search_deep_with_strict_id(self, term_number, session, class_name, student_id, class_folder_id=None):
+        """
+        Search the subfolders of the class folder (or, without one, the whole term folder)
+        breadth-first, with strict ID matching (exact or component matches only)
+        """
+        print(f"🔍 Deep search with STRICT ID for ID: {student_id} in {class_name}...")
         
-        return search_id_clean in filename_upper
+        try:
+            if class_folder_id:
+                # The class folder's own PDFs have just been searched
+                found, stats = self.subfolder_search.search(self, class_folder_id, student_id, include_root=False)
+            else:
+                term_folder_id = self.find_term_folder(term_number, session)
+                found, stats = self.subfolder_search.search(self, term_folder_id, student_id)
+            
+            self.metadata_cache.set_many({pdf['id']: pdf for _, pdf in found})
+            found_pdfs = []
+            for match_kind, pdf in found:
+                print(f"✅ DEEP SEARCH {self.MATCH_LABELS[match_kind]}: '{pdf['name']}'")
+                found_pdfs.append(self._format_file_info(dict(pdf)))
+            
+            print(f"📄 Searched {stats['folders']} folder(s) to depth {stats['depth']} in {stats['queries']} "
+                  f"quer{'y' if stats['queries'] == 1 else 'ies'} ({stats['memoized']} already mapped, "
+                  f"{stats['truncated']} skipped by limits) in {stats['elapsed_ms']:.0f} ms")
+            print(f"📊 Found {len(found_pdfs)} matching PDF(s) in deep search with STRICT ID")
+            return found_pdfs
+            
+        except Exception as e:
+            print(f"❌ Deep search error: {str(e)}")
+            return []
     
     def _extract_year_from_id(self, student_id):
         """Extract year from student ID (FOR INFORMATION ONLY - NOT FOR RESTRICTION)"""
@@ -596,13 +684,7 @@ class GoogleDriveService:
         """Get all available sessions from folder names PLUS generate future sessions"""
         try:
             query = f"'{self.main_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.service.files().list(
-                q=query,
-                fields="files(name)",
-                pageSize=50
-            ).execute()
-            
-            folders = results.get('files', [])
+            folders = self.list_files(query, "name", label='sessions')
             sessions = set()
             
             # Extract sessions from folder names
@@ -693,37 +775,203 @@ class GoogleDriveService:
                 'id_formats': 'SUPPORTS BOTH: EMFHS-YYYY-XXX-XX (NEW) & EMFHS-YYYY-NNN-XX (OLD)'
             }
     
+    # Everything preview and download need, so one fetch serves both
+    METADATA_FIELDS = "id, name, size, mimeType, md5Checksum, modifiedTime, webViewLink, webContentLink"
+    
+    # Drive accepts at most 100 calls in one batch request
+    BATCH_LIMIT = 100
+    
+    def get_files_metadata(self, file_ids):
+        """
+        Raw metadata for many files: {file ID: metadata, or None if Drive has no such file}
+        IDs are de-duplicated, answered from the metadata cache where possible, and the
+        rest fetched as files().get calls grouped BATCH_LIMIT to a BatchHttpRequest
+        """
+        file_ids = list(dict.fromkeys(file_id for file_id in file_ids if file_id))
+        found = self.metadata_cache.get_many(file_ids)
+        missing = [file_id for file_id in file_ids if file_id not in found]
+        
+        for start in range(0, len(missing), self.BATCH_LIMIT):
+            found.update(self._batch_get(missing[start:start + self.BATCH_LIMIT]))
+        
+        return {file_id: found.get(file_id) for file_id in file_ids}
+    
+    def _batch_get(self, file_ids):
+        """files().get for up to BATCH_LIMIT files in one HTTP round trip"""
+        fetched, not_found, errors = {}, [], {}
+        
+        def on_response(request_id, response, exception):
+            if exception is None:
+                fetched[request_id] = response
+            elif getattr(getattr(exception, 'resp', None), 'status', None) == 404:
+                not_found.append(request_id)
+            else:
+                errors[request_id] = exception
+        
+        if len(file_ids) == 1:
+            # A batch of one is still a multipart request; send it plainly
+            try:
+                on_response(file_ids[0], self.service.files().get(
+                    fileId=file_ids[0], fields=self.METADATA_FIELDS).execute(), None)
+            except Exception as e:
+                on_response(file_ids[0], None, e)
+        else:
+            files = self.service.files()
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for file_id in file_ids:
+                batch.add(files.get(fileId=file_id, fields=self.METADATA_FIELDS), request_id=file_id)
+            batch.execute()
+        
+        self.metadata_cache.set_many(fetched)
+        self.metadata_cache.set_missing(not_found)
+        self._count_listing('metadata_batch', files=len(file_ids))
+        
+        if errors and not fetched and not not_found:
+            raise next(iter(errors.values()))  # Drive itself failed, not individual files
+        for file_id, error in errors.items():
+            print(f"⚠️  Metadata for {file_id} not fetched: {str(error)}")
+        return {**fetched, **{file_id: None for file_id in not_found}}
+    
+    def list_folders_pdfs(self, folder_ids):
+        """
+        {folder ID: every PDF in it}, one files().list per folder grouped into batch requests
+        Every file's metadata lands in the metadata cache, so previews and downloads
+        of anything listed here need no further Drive calls
+        """
+        folder_ids = list(dict.fromkeys(folder_ids))
+        listings, overflowing, errors = {}, [], []
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                errors.append(exception)
+                return
+            listings[request_id] = response.get('files', [])
+            if response.get('nextPageToken'):
+                overflowing.append(request_id)
+        
+        files = self.service.files()
+        for start in range(0, len(folder_ids), self.BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for folder_id in folder_ids[start:start + self.BATCH_LIMIT]:
+                batch.add(files.list(
+                    q=f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false",
+                    fields=f"nextPageToken, files({self.METADATA_FIELDS})",
+                    pageSize=MAX_PAGE_SIZE,
+                ), request_id=folder_id)
+            batch.execute()
+        if errors:
+            raise errors[0]
+        
+        for folder_id in overflowing:
+            # More than one page: list the rest of this folder the usual way
+            query = f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false"
+            listings[folder_id] = list(self.list_files(query, self.METADATA_FIELDS, label='class_pdfs'))
+        
+        self.metadata_cache.set_many({pdf['id']: pdf for pdfs in listings.values() for pdf in pdfs})
+        return listings
+    
+    def get_class_files(self, term_number, session, class_name):
+        """Every report card in a class folder, formatted, with metadata cached for preview/download"""
+        folder_id = self.find_class_folder(term_number, session, class_name)
+        pdfs = self.list_folders_pdfs([folder_id])[folder_id]
+        return [self._format_file_info(dict(pdf)) for pdf in sorted(pdfs, key=lambda pdf: pdf['name'])]
+    
+    def get_files_info(self, file_ids):
+        """{file ID: formatted file information, or None} for many files at once"""
+        return {
+            file_id: self._format_file_info(dict(metadata)) if metadata else None
+            for file_id, metadata in self.get_files_metadata(file_ids).items()
+        }
+    
     def get_file_info(self, file_id):
         """Get file information"""
         try:
-            file_info = self.service.files().get(
-                fileId=file_id,
-                fields="id, name, size, modifiedTime, webViewLink, webContentLink"
-            ).execute()
-            
-            return self._format_file_info(file_info)
+            return self.get_files_info([file_id]).get(file_id)
             
         except Exception as e:
             print(f"❌ Error getting file info: {str(e)}")
             return None
 
-# Create global instance
-drive_service = GoogleDriveService()
+    def get_download_info(self, file_id):
+        """Metadata needed to serve a download: size plus md5Checksum/modifiedTime for ETag/Last-Modified"""
+        metadata = self.get_files_metadata([file_id]).get(file_id)
+        if metadata is None:
+            raise DriveFileNotFound(f"File not found: {file_id}")
+        return metadata
+
+    # Bytes fetched from Drive per ranged request while streaming a download
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+    def iter_file_content(self, file_id, start=0, end=None, chunk_size=None):
+        """
+        Stream a file's bytes [start, end] (inclusive) from Drive, one ranged request per chunk
+        Only one chunk is held in memory at a time
+        """
+        from googleapiclient.errors import HttpError
+
+        chunk_size = chunk_size or self.DOWNLOAD_CHUNK_SIZE
+        request = self.service.files().get_media(fileId=file_id)
+        position = start
+
+        while end is None or position <= end:
+            chunk_end = position + chunk_size - 1
+            if end is not None:
+                chunk_end = min(chunk_end, end)
+
+            requested = chunk_end - position + 1
+            headers = dict(request.headers)
+            headers['range'] = f"bytes={position}-{chunk_end}"
+            resp, content = request.http.request(request.uri, 'GET', headers=headers)
+
+            if resp.status == 416:
+                break  # Asked past the end of the file
+            if resp.status not in (200, 206):
+                raise HttpError(resp, content, uri=request.uri)
+            if not content:
+                break
+
+            yield content
+            position += len(content)
+
+            # 200 means Drive ignored the range and sent everything; a short chunk means EOF
+            if resp.status == 200 or len(content) < requested:
+                break
+
+
+_drive_service = None
+_drive_service_lock = threading.Lock()
+
+
+def _print_startup_banner(service):
+    print("\n" + "="*70)
+    print("🏫 EMILIA SCHOOL RESULT SYSTEM - UPDATED FOR NEW ID FORMAT")
+    print("="*70)
+    print("🔐 Authentication: Environment Variables (.env)")
+    print("🔑 Security: STRICT Student ID Matching ENABLED")
+    print("🆕 ID FORMAT: Supports EMFHS-YYYY-XXX-XX (NEW MIXED ALPHANUMERIC)")
+    print("📝 ALSO SUPPORTS: EMFHS-YYYY-NNN-XX (OLD FORMAT - BACKWARDS COMPATIBLE)")
+    print("❌ Student Name Verification: DISABLED")
+    print("❌ Year Restrictions: COMPLETELY DISABLED")
+    print(f"📁 Main folder ID: {service.main_folder_id}")
+    print("🔍 Search Mode: Requires EXACT Student ID in filename ONLY")
+    print("✅ Support: All terms (1st, 2nd, 3rd) and sessions (2000-2035+)")
+    print("✅ Classes: JSS1, JSS2, JSS3, SS1, SS2, SS3")
+    print("✅ Required: EXACT Student ID Number ONLY")
+    print("✅ Important: Search ANY session regardless of ID year")
+    print("="*70)
+
+
+def get_drive_service():
+    """Process-wide GoogleDriveService, created on first call (thread-safe)"""
+    global _drive_service
+    if _drive_service is None:
+        with _drive_service_lock:
+            if _drive_service is None:
+                service = GoogleDriveService()
+                _print_startup_banner(service)
+                _drive_service = service
+    return _drive_service
+
 
-# Startup message
-print("\n" + "="*70)
-print("🏫 EMILIA SCHOOL RESULT SYSTEM - UPDATED FOR NEW ID FORMAT")
-print("="*70)
-print("🔐 Authentication: Environment Variables (.env)")
-print("🔑 Security: STRICT Student ID Matching ENABLED")
-print("🆕 ID FORMAT: Supports EMFHS-YYYY-XXX-XX (NEW MIXED ALPHANUMERIC)")
-print("📝 ALSO SUPPORTS: EMFHS-YYYY-NNN-XX (OLD FORMAT - BACKWARDS COMPATIBLE)")
-print("❌ Student Name Verification: DISABLED")
-print("❌ Year Restrictions: COMPLETELY DISABLED")
-print("📁 Main folder ID: {drive_service.main_folder_id}")
-print("🔍 Search Mode: Requires EXACT Student ID in filename ONLY")
-print("✅ Support: All terms (1st, 2nd, 3rd) and sessions (2000-2035+)")
-print("✅ Classes: JSS1, JSS2, JSS3, SS1, SS2, SS3")
-print("✅ Required: EXACT Student ID Number ONLY")
-print("✅ Important: Search ANY session regardless of ID year")
-print("="*70)
\ No newline at end of file
+# Global instance: nothing is built or authenticated until it is first used
+drive_service = SimpleLazyObject(get_drive_service)
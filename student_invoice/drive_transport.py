@@ -0,0 +1,133 @@
+# drive_transport.py - THREAD-SAFE, POOLED HTTP TRANSPORT FOR THE DRIVE CLIENT
+"""
+httplib2.Http stand-in for googleapiclient, backed by one urllib3 connection pool
+
+    http = PooledHttp(credentials, pool_size=16)
+    service = build('drive', 'v3', http=http, static_discovery=True)
+
+httplib2 is not thread-safe, so the old setup built one client (and one TLS
+connection) per thread, and every AuthorizedHttp refreshed the shared
+credentials on its own. Here every thread shares:
+- a urllib3 connection pool of `pool_size` keep-alive connections to Drive
+- one access token, refreshed under a lock by whichever thread first finds it
+  expired; the others wait and reuse it (refresh_count says how often it ran)
+"""
+import os
+import socket
+import threading
+
+from urllib.parse import urljoin
+
+import urllib3
+
+DEFAULT_TIMEOUT = 60  # Seconds to wait for Drive to answer one request
+
+# Not 308: resumable uploads answer 308 "Resume Incomplete" (googleapiclient turns it off in httplib2 too)
+REDIRECT_CODES = (301, 302, 303, 307)
+
+# One more try when a pooled keep-alive connection turns out to be closed (as httplib2 does);
+# real retries are googleapiclient's (num_retries) and redirects are followed in request()
+RECONNECT = urllib3.Retry(total=1, connect=1, read=1, status=0, other=0, redirect=0, raise_on_redirect=False)
+
+
+def _as_socket_error(error):
+    """urllib3 errors as the socket errors googleapiclient retries (num_retries)"""
+    if isinstance(error, urllib3.exceptions.MaxRetryError) and error.reason is not None:
+        error = error.reason
+    # NewConnectionError subclasses ConnectTimeoutError but is a refusal, not a timeout
+    if (isinstance(error, urllib3.exceptions.TimeoutError)
+            and not isinstance(error, urllib3.exceptions.NewConnectionError)):
+        return socket.timeout(str(error))
+    return ConnectionError(str(error))
+
+
+class PooledResponse(dict):
+    """httplib2.Response look-alike: lower-cased header dict with .status and .reason"""
+
+    def __init__(self, response, content_length):
+        super().__init__((name.lower(), value) for name, value in response.headers.items())
+        # urllib3 has already decompressed the body, as httplib2 does
+        self.pop('content-encoding', None)
+        self['content-length'] = str(content_length)
+        self['status'] = str(response.status)
+        self.status = response.status
+        self.reason = response.reason
+
+
+class PooledHttp:
+    """Thread-safe replacement for the AuthorizedHttp/httplib2.Http pair googleapiclient expects"""
+
+    def __init__(self, credentials=None, pool_size=16, timeout=DEFAULT_TIMEOUT):
+        self._credentials = credentials
+        self.timeout = timeout
+        # block: threads beyond pool_size wait for a free connection instead of opening more
+        proxy_url = os.environ.get('HTTPS_PROXY') or os.environ.get('https_proxy')
+        if proxy_url:
+            self.pool = urllib3.ProxyManager(proxy_url, maxsize=pool_size, block=True)
+        else:
+            self.pool = urllib3.PoolManager(maxsize=pool_size, block=True)
+        self._token_lock = threading.Lock()
+        self.refresh_count = 0
+
+    # ============ ACCESS TOKEN ============
+    def _refresh_token(self, rejected_token=None):
+        """
+        Refresh the shared access token if it has expired, or if Drive rejected
+        `rejected_token` and no other thread has replaced it yet
+        """
+        from google.auth.transport.urllib3 import Request
+
+        with self._token_lock:
+            if rejected_token is None and self._credentials.valid:
+                return  # Another thread refreshed it while this one waited
+            if rejected_token is not None and self._credentials.token != rejected_token:
+                return
+            self._credentials.refresh(Request(self.pool))
+            self.refresh_count += 1
+
+    @property
+    def credentials(self):
+        """
+        The shared credentials with a valid token
+        BatchHttpRequest reads this to sign the calls inside a batch, so refreshing
+        here keeps googleapiclient from refreshing on a throwaway httplib2 client
+        """
+        if self._credentials is not None and not self._credentials.valid:
+            self._refresh_token()
+        return self._credentials
+
+    # ============ httplib2 INTERFACE ============
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        headers = dict(headers or {})
+        response, token = self._send(uri, method, body, headers)
+
+        if response.status == 401 and self._credentials is not None:
+            # Token revoked or expired early: refresh once (shared) and retry
+            self._refresh_token(rejected_token=token)
+            response, _ = self._send(uri, method, body, headers)
+
+        while (response.status in REDIRECT_CODES and method in ('GET', 'HEAD')
+               and response.headers.get('location') and redirections > 0):
+            redirections -= 1
+            uri = urljoin(uri, response.headers['location'])
+            response, _ = self._send(uri, method, body, headers)
+
+        content = response.data
+        return PooledResponse(response, len(content)), content
+
+    def _send(self, uri, method, body, headers):
+        """One request; returns (response, the access token it was sent with)"""
+        token = None
+        if self._credentials is not None:
+            credentials = self.credentials
+            token = credentials.token
+            credentials.apply(headers, token=token)
+        try:
+            response = self.pool.request(method, uri, body=body, headers=headers, timeout=self.timeout,
+                                         retries=RECONNECT, redirect=False)
+        except urllib3.exceptions.HTTPError as e:
+            raise _as_socket_error(e)
+        return response, token
+
+    def close(self):
+        self.pool.clear()
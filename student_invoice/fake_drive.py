@@ -0,0 +1,380 @@
+# fake_drive.py - IN-MEMORY STAND-IN FOR THE GOOGLE DRIVE v3 API
+"""
+Fake Drive service for exercising sync and search code without Google
+
+    drive = FakeDrive()
+    term = drive.add_folder('FIRST TERM 2025-2026', drive.main_folder_id)
+    jss1 = drive.add_folder('JSS1', term)
+    drive.add_file('EMFHS-2025-A7K-B9.pdf', jss1)
+    sync_result_index(drive)
+
+Every mutation (add, rename, move, trash) is also appended to a change feed,
+so `changes().list` replays exactly what happened since a page token.
+
+Uploads (files().create/update with a resumable media_body) arrive chunk by
+chunk; set `drive.fail_chunks = n` to drop the next n chunks and exercise
+resuming.
+"""
+import hashlib
+import itertools
+import re
+import threading
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+PDF_MIME_TYPE = 'application/pdf'
+
+IN_PARENTS_CLAUSE = re.compile(r"^'([^']+)' in parents$")
+FIELD_CLAUSE = re.compile(r"^(\w+)\s*(=|!=)\s*'?([^']*)'?$")
+CONTAINS_CLAUSE = re.compile(r"^name contains '((?:[^'\\]|\\.)*)'$")
+
+
+class FakeRequest:
+    """Mimics googleapiclient's HttpRequest: call execute() to get the response"""
+
+    def __init__(self, handler, **kwargs):
+        self.handler = handler
+        self.kwargs = kwargs
+
+    def execute(self, http=None, num_retries=0):
+        return self.handler(**self.kwargs)
+
+
+def _split_top_level(query, separator):
+    """Split a query on ' and ' / ' or ' outside of parentheses and quotes"""
+    parts, depth, quoted, start = [], 0, False, 0
+    i = 0
+    while i < len(query):
+        char = query[i]
+        if char == "'" and (i == 0 or query[i - 1] != '\\'):
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and query.startswith(separator, i):
+            parts.append(query[start:i])
+            start = i + len(separator)
+            i = start
+            continue
+        i += 1
+    parts.append(query[start:])
+    return [part.strip() for part in parts]
+
+
+def matches_query(item, query):
+    """Evaluate the subset of the Drive query language used by this app"""
+    query = query.strip()
+    if not query:
+        return True
+
+    or_parts = _split_top_level(query, ' or ')
+    if len(or_parts) > 1:
+        return any(matches_query(item, part) for part in or_parts)
+
+    and_parts = _split_top_level(query, ' and ')
+    if len(and_parts) > 1:
+        return all(matches_query(item, part) for part in and_parts)
+
+    if query.startswith('(') and query.endswith(')'):
+        return matches_query(item, query[1:-1])
+
+    match = IN_PARENTS_CLAUSE.match(query)
+    if match:
+        return match.group(1) in item.get('parents', [])
+
+    match = CONTAINS_CLAUSE.match(query)
+    if match:
+        # Like Drive: the term must start a word of the name ('World' finds
+        # 'Hello World' but not 'HelloWorld')
+        needle = re.escape(match.group(1).replace("\\'", "'"))
+        return re.search(rf"(?<![A-Za-z0-9]){needle}", item['name'], re.IGNORECASE) is not None
+
+    match = FIELD_CLAUSE.match(query)
+    if match:
+        field, operator, value = match.groups()
+        actual = item.get(field)
+        if isinstance(actual, bool):
+            actual = 'true' if actual else 'false'
+        return (str(actual) == value) if operator == '=' else (str(actual) != value)
+
+    raise ValueError(f"Unsupported query clause: {query}")
+
+
+class FakeUploadStatus:
+    """Mimics googleapiclient's MediaUploadProgress"""
+
+    def __init__(self, resumable_progress, total_size):
+        self.resumable_progress = resumable_progress
+        self.total_size = total_size
+
+    def progress(self):
+        return self.resumable_progress / self.total_size if self.total_size else 0.0
+
+
+class FakeUploadRequest:
+    """
+    Resumable upload: next_chunk() sends one chunk of media_body and returns
+    (status, None) until the last chunk, then (None, file metadata).
+    After a failed chunk the upload continues from the last acknowledged byte.
+    """
+
+    def __init__(self, drive, media_body, finish):
+        self.drive = drive
+        self.media_body = media_body
+        self.finish = finish
+        self.received = b''
+
+    def next_chunk(self, http=None, num_retries=0):
+        size = self.media_body.size()
+        chunk = self.media_body.getbytes(len(self.received), self.media_body.chunksize())
+        self.drive.calls.append(('upload.chunk', len(self.received), len(chunk)))
+        if self.drive._take_failure():
+            raise ConnectionResetError("Fake Drive dropped the upload chunk")
+
+        self.received += chunk
+        if len(self.received) < size:
+            return FakeUploadStatus(len(self.received), size), None
+        return None, self.finish(self.received)
+
+    def execute(self, http=None, num_retries=0):
+        response = None
+        while response is None:
+            _, response = self.next_chunk()
+        return response
+
+
+class FakeBatchRequest:
+    """Mimics BatchHttpRequest: add() requests, execute() runs them as one call"""
+
+    def __init__(self, drive, callback=None):
+        self.drive = drive
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id or str(len(self.requests) + 1), request, callback or self.callback))
+
+    def execute(self, http=None):
+        self.drive.calls.append(('batch', len(self.requests)))
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = request.execute(), None
+            except Exception as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class FakeResponse(dict):
+    """httplib2-style response: a header dict with a .status attribute"""
+
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+        self.reason = ''
+
+
+class FakeMediaHttp:
+    """Serves file content for get_media requests, honouring 'range' headers"""
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        file_id = uri.rsplit('/', 1)[-1]
+        self.drive.calls.append(('files.get_media', file_id, (headers or {}).get('range')))
+        item = self.drive.files.get(file_id)
+        if item is None:
+            return FakeResponse(404), b'Not Found'
+
+        content = item.get('content', b'')
+        byte_range = (headers or {}).get('range')
+        if not byte_range:
+            return FakeResponse(200), content
+
+        first, last = byte_range.split('=', 1)[1].split('-')
+        start, end = int(first), min(int(last or len(content) - 1), len(content) - 1)
+        if start >= len(content):
+            return FakeResponse(416), b''
+        return FakeResponse(206, {'content-range': f"bytes {start}-{end}/{len(content)}"}), content[start:end + 1]
+
+
+class FakeMediaRequest:
+    def __init__(self, drive, file_id):
+        self.uri = f"fake://drive/files/{file_id}"
+        self.headers = {}
+        self.http = FakeMediaHttp(drive)
+
+
+class FakeFilesResource:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, q='', fields=None, pageSize=100, pageToken=None, **kwargs):
+        return FakeRequest(self.drive._list_files, q=q, page_size=pageSize, page_token=pageToken)
+
+    def get(self, fileId, fields=None, **kwargs):
+        return FakeRequest(self.drive._get_file, file_id=fileId)
+
+    def get_media(self, fileId, **kwargs):
+        return FakeMediaRequest(self.drive, fileId)
+
+    def create(self, body, media_body=None, fields=None, **kwargs):
+        if media_body is None:
+            return FakeRequest(self.drive._create_file, body=body, content=None)
+        return FakeUploadRequest(self.drive, media_body,
+                                 lambda content: self.drive._create_file(body=body, content=content))
+
+    def update(self, fileId, body=None, media_body=None, fields=None, **kwargs):
+        if media_body is None:
+            return FakeRequest(self.drive._update_file, file_id=fileId, body=body, content=None)
+        return FakeUploadRequest(self.drive, media_body,
+                                 lambda content: self.drive._update_file(file_id=fileId, body=body, content=content))
+
+
+class FakeChangesResource:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def getStartPageToken(self, **kwargs):
+        return FakeRequest(lambda: {'startPageToken': str(len(self.drive.change_feed) + 1)})
+
+    def list(self, pageToken, pageSize=100, fields=None, **kwargs):
+        return FakeRequest(self.drive._list_changes, page_token=pageToken, page_size=pageSize)
+
+
+class FakeDriveResource:
+    """Object returned by build('drive', 'v3'): exposes files() and changes()"""
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def files(self):
+        return FakeFilesResource(self.drive)
+
+    def changes(self):
+        return FakeChangesResource(self.drive)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatchRequest(self.drive, callback)
+
+
+class FakeDrive:
+    """Quacks like GoogleDriveService for code that uses .service and .main_folder_id"""
+
+    def __init__(self, main_folder_id='fake-main-folder'):
+        self.main_folder_id = main_folder_id
+        self.files = {}
+        self.change_feed = []
+        self.calls = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.fail_chunks = 0
+        self.service = FakeDriveResource(self)
+
+    # ============ SCRIPTING ============
+    def add_folder(self, name, parent_id):
+        return self._add(name, parent_id, FOLDER_MIME_TYPE)
+
+    def add_file(self, name, parent_id, content=b'%PDF-1.4 fake report card'):
+        return self._add(
+            name, parent_id, PDF_MIME_TYPE,
+            size=str(len(content)),
+            md5Checksum=hashlib.md5(content).hexdigest(),
+            content=content,
+        )
+
+    def replace(self, file_id, content):
+        """Upload new content over a file (a corrected report card)"""
+        self.files[file_id].update(size=str(len(content)), md5Checksum=hashlib.md5(content).hexdigest(),
+                                   content=content)
+        self._record_change(file_id)
+
+    def rename(self, file_id, new_name):
+        self.files[file_id]['name'] = new_name
+        self._record_change(file_id)
+
+    def move(self, file_id, new_parent_id):
+        self.files[file_id]['parents'] = [new_parent_id]
+        self._record_change(file_id)
+
+    def trash(self, file_id):
+        self.files[file_id]['trashed'] = True
+        self._record_change(file_id)
+
+    def delete(self, file_id):
+        del self.files[file_id]
+        self.change_feed.append({'fileId': file_id, 'removed': True})
+
+    def _add(self, name, parent_id, mime_type, **extra):
+        file_id = f"fake-{next(self._ids)}"
+        self.files[file_id] = {
+            'id': file_id,
+            'name': name,
+            'mimeType': mime_type,
+            'parents': [parent_id],
+            'trashed': False,
+            'modifiedTime': '2025-01-01T00:00:00.000Z',
+            **extra,
+        }
+        self._record_change(file_id)
+        return file_id
+
+    def _record_change(self, file_id):
+        self.change_feed.append({'fileId': file_id, 'removed': False, 'file': self._public(file_id)})
+
+    def _public(self, file_id):
+        return {k: v for k, v in self.files[file_id].items() if k != 'content'}
+
+    # ============ API HANDLERS ============
+    def _list_files(self, q, page_size, page_token):
+        self.calls.append(('files.list', q, page_token))
+        matched = [self._public(fid) for fid, item in self.files.items() if matches_query(item, q)]
+        start = int(page_token or 0)
+        response = {'files': matched[start:start + page_size]}
+        if start + page_size < len(matched):
+            response['nextPageToken'] = str(start + page_size)
+        return response
+
+    def _get_file(self, file_id):
+        self.calls.append(('files.get', file_id))
+        if file_id not in self.files:
+            from googleapiclient.errors import HttpError
+            raise HttpError(FakeResponse(404), b'File not found', uri=f"fake://drive/files/{file_id}")
+        return self._public(file_id)
+
+    def _create_file(self, body, content):
+        self.calls.append(('files.create', body.get('name')))
+        parent_id = (body.get('parents') or [self.main_folder_id])[0]
+        if content is None:
+            file_id = self._add(body['name'], parent_id, body.get('mimeType', FOLDER_MIME_TYPE))
+        else:
+            file_id = self.add_file(body['name'], parent_id, content)
+        return self._public(file_id)
+
+    def _update_file(self, file_id, body, content):
+        self.calls.append(('files.update', file_id))
+        item = self.files[file_id]
+        item.update(body or {})
+        if content is not None:
+            item.update(size=str(len(content)), md5Checksum=hashlib.md5(content).hexdigest(), content=content)
+        self._record_change(file_id)
+        return self._public(file_id)
+
+    def _take_failure(self):
+        with self._lock:
+            if self.fail_chunks > 0:
+                self.fail_chunks -= 1
+                return True
+            return False
+
+    def _list_changes(self, page_token, page_size):
+        self.calls.append(('changes.list', page_token))
+        start = int(page_token) - 1
+        changes = self.change_feed[start:start + page_size]
+        response = {'changes': changes}
+        if start + page_size < len(self.change_feed):
+            response['nextPageToken'] = str(start + page_size + 1)
+        else:
+            response['newStartPageToken'] = str(len(self.change_feed) + 1)
+        return response
@@ -0,0 +1,314 @@
+# fake_drive_server.py - FAKE DRIVE SERVED OVER LOCAL HTTP, FOR TRANSPORT BENCHMARKS
+"""
+FakeDrive behind a real HTTP/1.1 server, so the googleapiclient transport
+(connections, keep-alive, token refresh) runs exactly as against Google
+
+    with FakeDriveServer(drive, latency=0.02, connect_delay=0.06) as server:
+        client = server.client(http=PooledHttp(server.credentials()))
+
+Serves files().list, files().get and an OAuth token endpoint (server.token_uri),
+plus what publishing needs: files().create for folders, resumable uploads for
+files().create/update (drive.fail_chunks answers the next n chunks with a 503)
+and batch requests of files().create.
+`latency` is added to every response, `connect_delay` to every new connection
+and `bandwidth` (bytes/second) caps how fast response bodies go out, standing
+in for the network round trip, TLS handshake and link speed that a loopback
+server does not have. server.stats counts connections, requests, response
+body bytes and token refreshes. Listings are memoized per query, so the fake's
+own query matching stays out of the timings; warm() fills them before a
+benchmark, and every write through the server drops them.
+"""
+import itertools
+import json
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from googleapiclient.errors import HttpError
+
+from .fake_drive import matches_query
+
+API_PREFIX = '/drive/v3/files'
+UPLOAD_PREFIX = '/upload/drive/v3/files'
+BATCH_PATH = '/batch/drive/v3'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like Drive
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+    def setup(self):
+        super().setup()
+        self.server.fake.count('connections')
+        time.sleep(self.server.fake.connect_delay)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data, headers=None):
+        self._send(status, json.dumps(data).encode() if data is not None else b'',
+                   'application/json; charset=UTF-8', headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        fake = self.server.fake
+        fake.count('bytes_sent', len(body))
+        time.sleep(fake.latency + (len(body) / fake.bandwidth if fake.bandwidth else 0))
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {'error': {'code': status, 'message': message}})
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _authorized(self):
+        fake = self.server.fake
+        fake.count('requests')
+        if self.headers.get('Authorization', '') in fake.tokens:
+            return True
+        self._send_error(401, 'Invalid Credentials')
+        return False
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = self._read_body()
+        url = urlsplit(self.path)
+        if url.path == '/token':
+            fake.count('requests')
+            fake.count('token_refreshes')
+            return self._send_json(200, {'access_token': fake.new_token(), 'expires_in': 3600,
+                                         'token_type': 'Bearer'})
+        if not self._authorized():
+            return
+        if url.path == API_PREFIX:
+            return self._send_json(200, fake.create_file(json.loads(body or b'{}')))
+        if url.path == UPLOAD_PREFIX:
+            return self._start_upload(None, body)
+        if url.path == BATCH_PATH:
+            return self._send_batch(body)
+        self._send_error(404, 'Not found')
+
+    def do_PATCH(self):
+        body = self._read_body()
+        url = urlsplit(self.path)
+        if not self._authorized():
+            return
+        if url.path.startswith(UPLOAD_PREFIX + '/'):
+            file_id = url.path[len(UPLOAD_PREFIX) + 1:]
+            if file_id not in self.server.fake.drive.files:
+                return self._send_error(404, f"File not found: {file_id}")
+            return self._start_upload(file_id, body)
+        self._send_error(404, 'Not found')
+
+    def do_PUT(self):
+        fake = self.server.fake
+        chunk = self._read_body()
+        if not self._authorized():
+            return
+        upload_id = parse_qs(urlsplit(self.path).query).get('upload_id', [''])[0]
+        try:
+            status, data, headers = fake.upload_chunk(upload_id, self.headers.get('Content-Range', ''), chunk)
+        except KeyError:
+            return self._send_error(404, 'Upload session not found')
+        self._send_json(status, data, headers)
+
+    def _start_upload(self, file_id, body):
+        """Open a resumable upload session; its URI goes back in the Location header"""
+        fake = self.server.fake
+        metadata = json.loads(body) if body else {}
+        upload_id = fake.start_upload(file_id, metadata)
+        self._send_json(200, None, {'Location': f"{fake.base_url}{UPLOAD_PREFIX}?uploadType=resumable"
+                                                f"&upload_id={upload_id}"})
+
+    def _send_batch(self, body):
+        """Run every files().create in a multipart/mixed batch and answer in the same format"""
+        fake = self.server.fake
+        message = BytesParser().parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + body
+        )
+        boundary = f"batch_{next(fake._batch_ids)}"
+        parts = []
+        for part in message.get_payload():
+            request = part.get_payload(decode=True) or part.get_payload().encode()
+            head, _, request_body = request.replace(b'\r\n', b'\n').partition(b'\n\n')
+            method, path = head.split(b'\n', 1)[0].decode().split(' ')[:2]
+            if method == 'POST' and urlsplit(path).path == API_PREFIX:
+                status, data = 200, fake.create_file(json.loads(request_body or b'{}'))
+            else:
+                status, data = 404, {'error': {'code': 404, 'message': f"Not found: {method} {path}"}}
+            content_id = part['Content-ID'].strip('<>')
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(data)}\r\n"
+            )
+        payload = (''.join(parts) + f"--{boundary}--\r\n").encode()
+        self._send(200, payload, f"multipart/mixed; boundary={boundary}")
+
+    def do_GET(self):
+        fake = self.server.fake
+        if not self._authorized():
+            return
+
+        url = urlsplit(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        try:
+            if url.path == API_PREFIX:
+                data = fake.list_files(params.get('q', ''), int(params.get('pageSize', 100)), params.get('pageToken'))
+            elif url.path.startswith(API_PREFIX + '/'):
+                data = fake.drive._get_file(url.path[len(API_PREFIX) + 1:])
+            else:
+                return self._send_error(404, 'Not found')
+        except HttpError:
+            return self._send_error(404, 'File not found')
+        self._send_json(200, data)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Many threads connect at once; the default backlog of 5 drops SYNs
+
+
+class FakeDriveServer:
+    def __init__(self, drive, latency=0.0, connect_delay=0.0, bandwidth=None):
+        self.drive = drive
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.bandwidth = bandwidth
+        self.tokens = set()
+        self._listings = {}
+        self._uploads = {}  # upload ID -> [file ID or None, metadata, bytes received]
+        self._token_ids = itertools.count(1)
+        self._upload_ids = itertools.count(1)
+        self._batch_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.stats = {'connections': 0, 'requests': 0, 'bytes_sent': 0, 'token_refreshes': 0}
+        self._server = None
+        self._thread = None
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _matching(self, query):
+        matched = self._listings.get(query)
+        if matched is None:
+            matched = self._listings[query] = [
+                self.drive._public(file_id) for file_id, item in self.drive.files.items() if matches_query(item, query)
+            ]
+        return matched
+
+    def warm(self, queries):
+        for query in queries:
+            self._matching(query)
+
+    def list_files(self, query, page_size, page_token):
+        matched = self._matching(query)
+        start = int(page_token or 0)
+        response = {'files': matched[start:start + page_size]}
+        if start + page_size < len(matched):
+            response['nextPageToken'] = str(start + page_size)
+        return response
+
+    # ============ WRITES ============
+    def create_file(self, metadata):
+        """files().create without media (folders)"""
+        with self._write_lock:
+            self._listings.clear()
+            return self.drive._create_file(body=metadata, content=None)
+
+    def start_upload(self, file_id, metadata):
+        upload_id = str(next(self._upload_ids))
+        with self._write_lock:
+            self._uploads[upload_id] = [file_id, metadata, b'']
+        return upload_id
+
+    def upload_chunk(self, upload_id, content_range, chunk):
+        """
+        (status, JSON body, headers) for one PUT of a resumable upload
+        308 with the bytes stored so far until the last chunk, then 200 with the
+        file. 'bytes */total' only asks how far the upload got.
+        """
+        with self._write_lock:
+            upload = self._uploads[upload_id]
+            received = upload[2]
+            span, _, total = content_range.replace('bytes ', '').partition('/')
+            if span != '*':
+                if self.drive._take_failure():
+                    return 503, {'error': {'code': 503, 'message': 'Backend Error'}}, None
+                start = int(span.split('-')[0])
+                if start == len(received):  # A repeated chunk is acknowledged, not appended
+                    received = upload[2] = received + chunk
+            if total != '*' and len(received) >= int(total):
+                del self._uploads[upload_id]
+                self._listings.clear()
+                file_id, metadata = upload[0], upload[1]
+                if file_id is None:
+                    return 200, self.drive._create_file(body=metadata, content=received), None
+                return 200, self.drive._update_file(file_id=file_id, body=metadata, content=received), None
+        return 308, None, {'Range': f"bytes=0-{len(received) - 1}"} if received else None
+
+    def new_token(self):
+        token = f"fake-token-{next(self._token_ids)}"
+        self.tokens.add(f"Bearer {token}")
+        return token
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = dict.fromkeys(self.stats, 0)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_endpoint(self):
+        return f"{self.base_url}/drive/v3/"
+
+    @property
+    def token_uri(self):
+        return f"{self.base_url}/token"
+
+    def credentials(self):
+        """OAuth credentials without a token yet: the first request refreshes one from token_uri"""
+        from google.oauth2.credentials import Credentials
+
+        return Credentials(token=None, refresh_token='fake-refresh-token', token_uri=self.token_uri,
+                           client_id='fake-client', client_secret='fake-secret')
+
+    def client(self, **kwargs):
+        """Drive v3 client pointed at this server; pass http= or credentials="""
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+
+        # rootUrl too, not just the API endpoint: uploads and batches are sent to it
+        document = json.loads(get_static_doc('drive', 'v3'))
+        document.update(rootUrl=f"{self.base_url}/", baseUrl=self.api_endpoint)
+        return build_from_document(document, **kwargs)
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,257 @@
+# fee_ledger.py - PERSISTENT FEE LEDGER: INVOICES, PAYMENTS AND RUNNING BALANCES
+"""
+Invoices and payments recorded on the server instead of only in the bill pages
+
+    invoice, created = save_invoice('term_bill', '2025/2026', '2ND TERM', 'JSS 1', 'ADA OBI',
+                                    items=[('TUITION FEE/TERM', 47000), ('MEDICAL', 5000)])
+    record_payment(invoice.pk, 20000, reference='UBA TRF 0192')
+    outstanding_balances('2025/2026', '2')          # FeeBalance rows still owing
+
+Every change adjusts the student's FeeBalance row with F() expressions in the
+same transaction (billed += new total - old total, paid += amount), so the
+balance is never recomputed from documents and concurrent payments do not
+overwrite each other. rebuild_balances() recomputes the rows from the
+invoices if they are ever edited outside these functions (e.g. in the admin).
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+
+from .billing import BillingError, _amount, _class_key
+from .models import FeeBalance, Invoice, InvoiceItem, Payment
+from .result_index import normalize_session, normalize_term
+
+ZERO = Decimal('0.00')
+
+
+class LedgerError(ValueError):
+    """Invoice or payment data is malformed"""
+
+
+def _identity(session, term, class_name, student_name):
+    """Canonical (session, term, class, student name) used by invoices and balances"""
+    clean_session = normalize_session(session)
+    clean_term = normalize_term(term)
+    clean_class = _class_key(class_name)[:10]
+    clean_name = ' '.join(str(student_name or '').split()).upper()[:255]
+    if not clean_session or not clean_term:
+        raise LedgerError("Use a session like 2025/2026 and a term like '2ND TERM' or 2")
+    if not clean_class or not clean_name:
+        raise LedgerError("Student name and class are required")
+    return clean_session, clean_term, clean_class, clean_name
+
+
+def _adjust_balance(invoice, billed=ZERO, paid=ZERO):
+    """Add to a student's running totals (creating the row on their first invoice)"""
+    key = {'session': invoice.session, 'term': invoice.term,
+           'class_name': invoice.class_name, 'student_name': invoice.student_name}
+    changes = {'billed': F('billed') + billed, 'paid': F('paid') + paid,
+               'balance': F('balance') + billed - paid}
+    if invoice.student_id:
+        changes['student_id'] = invoice.student_id
+
+    if FeeBalance.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            FeeBalance.objects.create(**key, student_id=invoice.student_id,
+                                      billed=billed, paid=paid, balance=billed - paid)
+    except IntegrityError:
+        # A concurrent save created the row first
+        FeeBalance.objects.filter(**key).update(**changes)
+
+
+# ============ INVOICES ============
+def _clean_items(items):
+    if not isinstance(items, (list, tuple)):
+        raise LedgerError("'items' must be a list of fee lines")
+    clean = []
+    for item in items:
+        if isinstance(item, dict):
+            description, amount = item.get('description'), item.get('amount')
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            description, amount = item
+        else:
+            raise LedgerError("Every fee line needs a description and an amount")
+        description = str(description or '').strip()[:255]
+        if not description:
+            raise LedgerError("Every fee line needs a description")
+        try:
+            clean.append((description, _amount(amount, description)))
+        except BillingError as e:
+            raise LedgerError(str(e))
+    return clean
+
+
+def save_invoice(kind, session, term, class_name, student_name, student_id='', items=(),
+                 due_date=None, late_fee=0, bank_details=None, payment_notes=None):
+    """
+    Create or replace a student's invoice of this kind for the term
+    Returns (invoice, created). Payments already recorded stay attached.
+    """
+    if kind not in dict(Invoice.KIND_CHOICES):
+        raise LedgerError(f"'kind' must be one of: {', '.join(dict(Invoice.KIND_CHOICES))}")
+    session, term, class_name, student_name = _identity(session, term, class_name, student_name)
+    clean_items = _clean_items(items)
+    total = sum((amount for _, amount in clean_items), ZERO)
+    try:
+        late_fee = _amount(late_fee or 0, 'late fee')
+    except BillingError as e:
+        raise LedgerError(str(e))
+
+    with transaction.atomic():
+        invoice, created = Invoice.objects.select_for_update().get_or_create(
+            session=session, term=term, class_name=class_name, student_name=student_name, kind=kind,
+        )
+        previous_total = invoice.total
+        invoice.student_id = str(student_id or invoice.student_id or '').strip().upper()[:32]
+        invoice.due_date = due_date
+        invoice.late_fee = late_fee
+        invoice.total = total
+        if bank_details is not None:
+            invoice.bank_details = bank_details
+        if payment_notes is not None:
+            invoice.payment_notes = payment_notes
+        invoice.save()
+
+        invoice.items.all().delete()
+        InvoiceItem.objects.bulk_create([
+            InvoiceItem(invoice=invoice, position=position, description=description, amount=amount)
+            for position, (description, amount) in enumerate(clean_items, start=1)
+        ])
+        _adjust_balance(invoice, billed=total - previous_total)
+    return invoice, created
+
+
+def delete_invoice(invoice_id):
+    """Remove an invoice and its payments, taking both out of the student's balance"""
+    with transaction.atomic():
+        invoice = Invoice.objects.select_for_update().get(pk=invoice_id)
+        _adjust_balance(invoice, billed=-invoice.total, paid=-invoice.amount_paid)
+        invoice.delete()
+
+
+# ============ PAYMENTS ============
+def record_payment(invoice_id, amount, paid_on=None, method='', reference=''):
+    """Record money received; paying more than the invoice leaves a credit (negative balance)"""
+    try:
+        amount = _amount(amount, 'payment')
+    except BillingError as e:
+        raise LedgerError(str(e))
+    if amount <= 0:
+        raise LedgerError("Payment amount must be more than zero")
+
+    with transaction.atomic():
+        invoice = Invoice.objects.get(pk=invoice_id)
+        payment = Payment.objects.create(
+            invoice=invoice, amount=amount, paid_on=paid_on or date.today(),
+            method=str(method or '').strip()[:30], reference=str(reference or '').strip()[:100],
+        )
+        Invoice.objects.filter(pk=invoice.pk).update(amount_paid=F('amount_paid') + amount)
+        _adjust_balance(invoice, paid=amount)
+    return payment
+
+
+def delete_payment(payment_id):
+    """Undo a payment recorded by mistake"""
+    with transaction.atomic():
+        payment = Payment.objects.select_related('invoice').get(pk=payment_id)
+        Invoice.objects.filter(pk=payment.invoice_id).update(amount_paid=F('amount_paid') - payment.amount)
+        _adjust_balance(payment.invoice, paid=-payment.amount)
+        payment.delete()
+
+
+# ============ REPORTS ============
+def outstanding_balances(session, term, class_name=''):
+    """Students who still owe for the term, largest balance first (uses fee_balance_outstanding)"""
+    balances = FeeBalance.objects.filter(
+        session=normalize_session(session), term=normalize_term(term), balance__gt=0,
+    )
+    if class_name:
+        balances = balances.filter(class_name=_class_key(class_name))
+    return balances.order_by('class_name', '-balance', 'student_name')
+
+
+def outstanding_summary(session, term):
+    """Per-class count of students owing and the amount owed, in one grouped query"""
+    return list(
+        outstanding_balances(session, term)
+        .order_by()
+        .values('class_name')
+        .annotate(students=Count('id'), owed=Sum('balance'))
+        .order_by('class_name')
+    )
+
+
+def rebuild_balances(session=None, term=None):
+    """Recompute FeeBalance rows from the invoices (after edits made outside this module)"""
+    invoices = Invoice.objects.all()
+    balances = FeeBalance.objects.all()
+    if session:
+        invoices = invoices.filter(session=normalize_session(session))
+        balances = balances.filter(session=normalize_session(session))
+    if term:
+        term = normalize_term(term)
+        invoices = invoices.filter(term=term)
+        balances = balances.filter(term=term)
+
+    totals = (
+        invoices.values('session', 'term', 'class_name', 'student_name')
+        .annotate(billed=Sum('total'), paid=Sum('amount_paid'), student_id=Max('student_id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        balances.delete()
+        FeeBalance.objects.bulk_create([
+            FeeBalance(**row, balance=row['billed'] - row['paid']) for row in totals
+        ], batch_size=500)
+    return len(totals)
+
+
+def invoice_json(invoice, items=False):
+    data = {
+        'id': invoice.pk,
+        'kind': invoice.kind,
+        'session': invoice.session,
+        'term': invoice.term,
+        'class_name': invoice.class_name,
+        'student_name': invoice.student_name,
+        'student_id': invoice.student_id,
+        'due_date': invoice.due_date.isoformat() if invoice.due_date else None,
+        'late_fee': str(invoice.late_fee),
+        'total': str(invoice.total),
+        'amount_paid': str(invoice.amount_paid),
+        'balance': str(invoice.balance),
+        'updated_at': invoice.updated_at.isoformat(),
+    }
+    if items:
+        data['items'] = [{'description': item.description, 'amount': str(item.amount)}
+                         for item in invoice.items.all()]
+        data['payments'] = [payment_json(payment) for payment in invoice.payments.all()]
+    return data
+
+
+def payment_json(payment):
+    return {
+        'id': payment.pk,
+        'invoice_id': payment.invoice_id,
+        'amount': str(payment.amount),
+        'paid_on': payment.paid_on.isoformat(),
+        'method': payment.method,
+        'reference': payment.reference,
+    }
+
+
+def balance_json(balance):
+    return {
+        'session': balance.session,
+        'term': balance.term,
+        'class_name': balance.class_name,
+        'student_name': balance.student_name,
+        'student_id': balance.student_id,
+        'billed': str(balance.billed),
+        'paid': str(balance.paid),
+        'balance': str(balance.balance),
+    }
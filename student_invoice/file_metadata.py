@@ -0,0 +1,51 @@
+# file_metadata.py - SHORT-LIVED CACHE OF DRIVE FILE METADATA
+from django.conf import settings
+from django.core.cache import caches
+
+MISSING = '__not_found__'  # Stored for files Drive answered 404 for
+
+
+class FileMetadataCache:
+    """
+    Raw files().get responses keyed by file ID, shared by every worker
+    Entries live for DRIVE_METADATA_CACHE_TTL seconds (links and checksums go
+    stale when a report card is replaced), "not found" answers for
+    DRIVE_METADATA_CACHE_NEGATIVE_TTL. Lookups and fills are get_many/set_many,
+    so a whole class costs one cache round trip on Redis/Memcached.
+    """
+
+    def __init__(self, alias=None, ttl=None, negative_ttl=None, prefix='drive_file'):
+        self.alias = alias or getattr(settings, 'DRIVE_CACHE_ALIAS', 'default')
+        self.ttl = ttl if ttl is not None else getattr(settings, 'DRIVE_METADATA_CACHE_TTL', 120)
+        self.negative_ttl = (negative_ttl if negative_ttl is not None
+                             else getattr(settings, 'DRIVE_METADATA_CACHE_NEGATIVE_TTL', 30))
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, file_id):
+        return f"{self.prefix}:{file_id}"
+
+    def get_many(self, file_ids):
+        """{file ID: metadata, or None for a cached "not found"} for the IDs in the cache"""
+        keys = {self._key(file_id): file_id for file_id in file_ids}
+        found = self.cache.get_many(list(keys))
+        return {keys[key]: (None if value == MISSING else value) for key, value in found.items()}
+
+    def set_many(self, files):
+        """Cache {file ID: metadata}"""
+        if files:
+            self.cache.set_many({self._key(file_id): data for file_id, data in files.items()}, timeout=self.ttl)
+
+    def set_missing(self, file_ids):
+        if file_ids:
+            self.cache.set_many({self._key(file_id): MISSING for file_id in file_ids}, timeout=self.negative_ttl)
+
+    def forget(self, file_ids):
+        """Drop entries for files that were just replaced or removed"""
+        self.cache.delete_many([self._key(file_id) for file_id in file_ids])
+
+
+file_metadata_cache = FileMetadataCache()
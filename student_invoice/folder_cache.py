@@ -0,0 +1,87 @@
+# folder_cache.py - SHARED, TTL-BOUNDED CACHE OF DRIVE FOLDER IDS
+from django.conf import settings
+from django.core.cache import caches
+
+MISSING = '__not_found__'  # Stored for negative ("no such folder") entries
+
+
+class FolderCache:
+    """
+    Term/class folder IDs in Django's cache framework, shared by every worker
+    Found folders live for DRIVE_FOLDER_CACHE_TTL seconds, "not found" answers
+    for DRIVE_FOLDER_CACHE_NEGATIVE_TTL. invalidate() drops everything at once by
+    bumping a generation number that is part of every key, including the
+    whole-tree folder snapshot and the subtrees memoized by deep searches.
+    """
+
+    def __init__(self, alias=None, ttl=None, negative_ttl=None, prefix='drive_folder'):
+        self.alias = alias or getattr(settings, 'DRIVE_CACHE_ALIAS', 'default')
+        self.ttl = ttl if ttl is not None else getattr(settings, 'DRIVE_FOLDER_CACHE_TTL', 3600)
+        self.negative_ttl = (negative_ttl if negative_ttl is not None
+                             else getattr(settings, 'DRIVE_FOLDER_CACHE_NEGATIVE_TTL', 300))
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _generation(self):
+        generation_key = f"{self.prefix}:generation"
+        generation = self.cache.get(generation_key)
+        if generation is None:
+            self.cache.add(generation_key, 1, timeout=None)
+            generation = self.cache.get(generation_key, 1)
+        return generation
+
+    def _key(self, kind, parts):
+        clean_parts = [str(part).strip().upper().replace(' ', '_') for part in parts]
+        return f"{self.prefix}:{self._generation()}:{kind}:{'|'.join(clean_parts)}"
+
+    def get(self, kind, *parts):
+        """
+        Look up a folder ID
+        Returns (hit, folder_id); folder_id is None for a cached "not found"
+        """
+        value = self.cache.get(self._key(kind, parts))
+        if value is None:
+            return False, None
+        if value == MISSING:
+            return True, None
+        return True, value
+
+    def set(self, kind, parts, folder_id):
+        self.cache.set(self._key(kind, parts), folder_id, timeout=self.ttl)
+
+    def set_missing(self, kind, parts):
+        self.cache.set(self._key(kind, parts), MISSING, timeout=self.negative_ttl)
+
+    def generation(self):
+        """The current generation (changes on every invalidate())"""
+        return self._generation()
+
+    def get_snapshot(self, generation):
+        """The whole-tree folder snapshot stored for a generation, or None (see folder_snapshot.py)"""
+        return self.cache.get(f"{self.prefix}:{generation}:snapshot")
+
+    def set_snapshot(self, generation, snapshot, ttl=None):
+        """Store a snapshot built while `generation` was current (a later invalidate() orphans it)"""
+        self.cache.set(f"{self.prefix}:{generation}:snapshot", snapshot, timeout=ttl or self.ttl)
+
+    def get_subtree(self, generation, root_id):
+        """{folder ID: child folder IDs} found under root_id by deep searches, or None (see deep_search.py)"""
+        return self.cache.get(f"{self.prefix}:{generation}:subtree:{root_id}")
+
+    def set_subtree(self, generation, root_id, children, ttl=None):
+        self.cache.set(f"{self.prefix}:{generation}:subtree:{root_id}", children, timeout=ttl or self.ttl)
+
+    def invalidate(self):
+        """Forget every cached folder ID (old entries simply expire)"""
+        generation_key = f"{self.prefix}:generation"
+        try:
+            return self.cache.incr(generation_key)
+        except ValueError:
+            self.cache.set(generation_key, 2, timeout=None)
+            return 2
+
+
+folder_cache = FolderCache()
@@ -0,0 +1,166 @@
+# folder_snapshot.py - WHOLE-TREE SNAPSHOT OF TERM/CLASS FOLDERS
+"""
+Every term and class folder under the main "Emilia Report Card" folder, fetched
+level by level in a few paged queries and indexed by canonical keys
+
+    snapshot = build_folder_snapshot(drive_service)
+    snapshot.term_folder('2025-2026', 'FIRST TERM')    # folder ID or None
+    snapshot.class_folder('2025/2026', 1, 'jss 1')     # folder ID or None
+    snapshot.problems                                  # names that did not index cleanly
+
+Folder names are normalized once, with the result index normalizers, into
+(session, term) and (session, term, class) keys: 'FIRST TERM 2025-2026' ->
+('2025/2026', '1'), 'JSS 1' / 'SS1 REPORT' -> 'JSS1' / 'SS1'. A lookup
+normalizes the request the same way and is one dict access. Folders whose
+names give no key, or the same key as another folder, are reported when the
+snapshot is built rather than when a parent searches.
+
+folder_snapshots shares the current snapshot between workers through the
+folder cache; FolderCache.invalidate() (a folder renamed or moved, or
+manage.py clear_drive_cache) replaces it, and so does a lookup that misses
+in a snapshot older than DRIVE_FOLDER_CACHE_NEGATIVE_TTL (a folder added by
+hand since).
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .folder_cache import folder_cache
+from .result_index import FOLDER_MIME_TYPE, normalize_class_name, normalize_session, normalize_term, parse_term
+
+FOLDER_FIELDS = "id, name, parents"
+
+# Parent folders OR-ed into one files().list query
+PARENTS_PER_QUERY = 50
+
+
+class FolderSnapshot:
+    def __init__(self, terms, classes, problems, folder_count, query_count):
+        self.terms = terms        # (session, term) -> folder ID
+        self.classes = classes    # (session, term, class) -> folder ID
+        self.problems = problems
+        self.folder_count = folder_count
+        self.query_count = query_count
+        self.built_at = time.time()
+
+    def term_folder(self, session, term):
+        return self.terms.get((normalize_session(session), normalize_term(term)))
+
+    def class_folder(self, session, term, class_name):
+        return self.classes.get((normalize_session(session), normalize_term(term), normalize_class_name(class_name)))
+
+    def age(self):
+        return time.time() - self.built_at
+
+
+def _list_folders_under(drive_service, parent_ids, label, counter):
+    """Every folder directly inside any of parent_ids, PARENTS_PER_QUERY parents per paged query"""
+    for start in range(0, len(parent_ids), PARENTS_PER_QUERY):
+        parents = ' or '.join(f"'{parent_id}' in parents" for parent_id in parent_ids[start:start + PARENTS_PER_QUERY])
+        listing = drive_service.list_files(f"({parents}) and mimeType='{FOLDER_MIME_TYPE}' and trashed=false",
+                                           FOLDER_FIELDS, label=label)
+        yield from listing
+        counter['queries'] += listing.pages
+
+
+def _index(items, key_for, describe, problems):
+    """
+    {key: folder ID}; unkeyed and duplicate names go to problems
+    Of folders with the same key the shortest name wins ('JSS 1' over 'JSS1 REPORT OLD').
+    """
+    index, names = {}, {}
+    for item in sorted(items, key=lambda item: (len(item['name']), item['name'])):
+        key = key_for(item)
+        if not key:
+            problems.append(f"'{item['name']}' is not recognised as a {describe(None)} folder")
+        elif key in index:
+            problems.append(f"'{item['name']}' and '{names[key]}' are both {describe(key)}; using '{names[key]}'")
+        else:
+            index[key] = item['id']
+            names[key] = item['name']
+    return index
+
+
+def build_folder_snapshot(drive_service, log=print):
+    """Fetch the term and class folders under main_folder_id and index them by canonical key"""
+    counter = {'queries': 0}
+    problems = []
+
+    term_items = list(_list_folders_under(drive_service, [drive_service.main_folder_id], 'snapshot_terms', counter))
+
+    def term_key(item):
+        session, term = normalize_session(item['name']), parse_term(item['name'])
+        return (session, term) if session and term else None
+
+    terms = _index(term_items, term_key,
+                   lambda key: f"Term {key[1]} {key[0]}" if key else 'term', problems)
+    term_keys = {folder_id: key for key, folder_id in terms.items()}
+
+    class_items = list(_list_folders_under(drive_service, list(term_keys), 'snapshot_classes', counter))
+
+    def class_key(item):
+        parent_id = next(parent for parent in item.get('parents', []) if parent in term_keys)
+        class_name = normalize_class_name(item['name'])
+        return (*term_keys[parent_id], class_name) if class_name else None
+
+    classes = _index(class_items, class_key,
+                     lambda key: f"{key[2]} in Term {key[1]} {key[0]}" if key else 'class', problems)
+
+    for problem in problems:
+        log(f"⚠️  {problem}")
+    log(f"📂 Folder snapshot: {len(terms)} term and {len(classes)} class folder(s) "
+        f"from {counter['queries']} query page(s)")
+    return FolderSnapshot(terms, classes, problems, len(term_items) + len(class_items), counter['queries'])
+
+
+class FolderSnapshotStore:
+    """
+    The current snapshot, stored in the folder cache under its generation
+    Each process keeps the copy it loaded until the generation changes or it is
+    older than DRIVE_FOLDER_SNAPSHOT_TTL, so most lookups read no cache entry
+    beyond the generation number.
+    """
+
+    def __init__(self, cache=None, ttl=None):
+        self.cache = cache or folder_cache
+        self.ttl = ttl or getattr(settings, 'DRIVE_FOLDER_SNAPSHOT_TTL', 60 * 60)
+        self._loaded = None  # (generation, snapshot)
+        self._build_lock = threading.Lock()
+
+    def get(self):
+        """The current snapshot, or None if there is none (or it is too old)"""
+        generation = self.cache.generation()
+        loaded = self._loaded
+        if loaded is None or loaded[0] != generation or loaded[1].age() >= self.ttl:
+            snapshot = self.cache.get_snapshot(generation)
+            if snapshot is None or snapshot.age() >= self.ttl:
+                return None
+            loaded = self._loaded = (generation, snapshot)
+        return loaded[1]
+
+    def rebuild(self, drive_service, log=print):
+        generation = self.cache.generation()
+        snapshot = build_folder_snapshot(drive_service, log=log)
+        self.cache.set_snapshot(generation, snapshot, ttl=self.ttl)
+        self._loaded = (generation, snapshot)
+        return snapshot
+
+    def get_or_build(self, drive_service, log=print):
+        """The current snapshot; the first caller after it expires rebuilds it, others wait for that"""
+        snapshot = self.get()
+        if snapshot is None:
+            with self._build_lock:
+                snapshot = self.get() or self.rebuild(drive_service, log=log)
+        return snapshot
+
+    def refresh(self, drive_service, older_than, log=print):
+        """The current snapshot, rebuilt first if it is older than `older_than` seconds"""
+        with self._build_lock:
+            snapshot = self.get()
+            if snapshot is None or snapshot.age() > older_than:
+                snapshot = self.rebuild(drive_service, log=log)
+        return snapshot
+
+
+folder_snapshots = FolderSnapshotStore()
@@ -0,0 +1,200 @@
+# grading.py - VECTORIZED GRADING FOR A WHOLE CLASS (SAME RULES AS THE EXAM RESULT PAGES)
+"""
+Grade a whole class in one pass with NumPy
+
+Scores are arrays shaped (students, subjects). NaN means the student does not
+offer that subject; inside an offered subject an empty test counts as 0, as in
+updateTotal() on the exam result pages.
+
+    results = grade_class(test1, test2, exam)
+    results['grades'][0, 3]      # 'B'
+    results['positions'][0]      # 4 (4th in class)
+"""
+import numpy as np
+
+# Maximum marks per component (the max= attributes on the exam result inputs)
+TEST1_MAX = 20
+TEST2_MAX = 20
+EXAM_MAX = 60
+SUBJECT_MAX = TEST1_MAX + TEST2_MAX + EXAM_MAX
+
+# calculateGrade / calculateRemark / calculateLetterGrade: (lowest score, grade, remark)
+GRADE_BOUNDARIES = [
+    (0, 'F', 'POOR'),
+    (40, 'E', 'FAIR'),
+    (45, 'D', 'FAIR'),
+    (50, 'C', 'GOOD'),
+    (60, 'B', 'VERY GOOD'),
+    (70, 'A', 'EXCELLENT'),
+]
+NO_GRADE = '--'
+
+_THRESHOLDS = np.array([boundary[0] for boundary in GRADE_BOUNDARIES], dtype=float)
+# Index 0 is "below every boundary / no score"; boundaries follow in order
+_GRADES = np.array([NO_GRADE] + [boundary[1] for boundary in GRADE_BOUNDARIES], dtype=object)
+_REMARKS = np.array([NO_GRADE] + [boundary[2] for boundary in GRADE_BOUNDARIES], dtype=object)
+
+
+class GradingError(ValueError):
+    """Scores are missing, mis-shaped or outside the allowed marks"""
+
+
+def _as_scores(values, name, maximum):
+    scores = np.asarray(values, dtype=float)
+    if scores.ndim != 2:
+        raise GradingError(f"{name} must be a (students x subjects) table")
+    offered = ~np.isnan(scores)
+    if np.any(scores[offered] < 0) or np.any(scores[offered] > maximum):
+        raise GradingError(f"{name} scores must be between 0 and {maximum}")
+    return scores
+
+
+def _band_index(scores):
+    """Position in _GRADES/_REMARKS for every score (0 for NaN or out of range)"""
+    missing = np.isnan(scores)
+    band = np.searchsorted(_THRESHOLDS, np.where(missing, -1.0, scores), side='right')
+    band[missing | (scores > SUBJECT_MAX)] = 0
+    return band
+
+
+def grade_labels(scores):
+    """Letter grades for an array of totals or percentages"""
+    return _GRADES[_band_index(np.asarray(scores, dtype=float))]
+
+
+def remark_labels(scores):
+    """Remarks (EXCELLENT, VERY GOOD, ...) for an array of totals"""
+    return _REMARKS[_band_index(np.asarray(scores, dtype=float))]
+
+
+def competition_rank(values):
+    """
+    Position of every value in its column, highest first, ties sharing a position
+    (1, 2, 2, 4). NaN (not offered / no score) gets position 0.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return np.zeros(values.shape, dtype=int)
+    table = values.reshape(len(values), -1)
+    students, columns = table.shape
+
+    # Shift every column into its own value range so one sort ranks all columns at once
+    missing = np.isnan(table)
+    filled = np.where(missing, np.nanmin(table, initial=0) - 1, table)
+    span = filled.max() - filled.min() + 1
+    shifted = filled + np.arange(columns) * span
+    above = np.searchsorted(np.sort(shifted, axis=None), shifted, side='right')
+    column_end = (np.arange(columns) + 1) * students
+
+    positions = 1 + (column_end - above)
+    positions[missing] = 0
+    return positions.reshape(values.shape)
+
+
+def grade_class(test1, test2, exam):
+    """
+    Totals, grades, remarks, percentages and positions for a whole class
+    Every argument is a (students x subjects) array-like; returns a dict of arrays.
+    """
+    test1 = _as_scores(test1, 'test1', TEST1_MAX)
+    test2 = _as_scores(test2, 'test2', TEST2_MAX)
+    exam = _as_scores(exam, 'exam', EXAM_MAX)
+    if not test1.shape == test2.shape == exam.shape:
+        raise GradingError("test1, test2 and exam must have the same shape")
+
+    components = np.stack([test1, test2, exam])
+    offered = ~np.all(np.isnan(components), axis=0)
+
+    totals = np.nansum(components, axis=0)
+    totals[~offered] = np.nan
+
+    grand_totals = np.nansum(totals, axis=1)
+    subjects_offered = offered.sum(axis=1)
+    obtainable = subjects_offered * SUBJECT_MAX
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentages = np.round(grand_totals / obtainable * 100, 2)
+    percentages[obtainable == 0] = np.nan
+
+    bands = _band_index(totals)
+    return {
+        'totals': totals,
+        'grades': _GRADES[bands],
+        'remarks': _REMARKS[bands],
+        'subject_positions': competition_rank(totals),
+        'grand_totals': grand_totals,
+        'obtainable': obtainable,
+        'percentages': percentages,
+        'results': grade_labels(percentages),
+        'positions': competition_rank(percentages),
+    }
+
+
+def _score_table(students, subjects, component):
+    """(students x subjects) float array for one component; missing entries become NaN"""
+    return np.array(
+        [[(student.get('scores') or {}).get(subject, {}).get(component) for subject in subjects]
+         for student in students],
+        dtype=float,
+    ).reshape(len(students), len(subjects))
+
+
+def _clean(value):
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def grade_class_payload(payload):
+    """
+    Grade a class sent as JSON
+        {"subjects": ["MATHEMATICS", ...],
+         "students": [{"id": "...", "name": "...",
+                       "scores": {"MATHEMATICS": {"test1": 15, "test2": 12, "exam": 40}}}]}
+    Returns the same students with per-subject total/grade/remark/position and
+    overall total, obtainable, percentage, result and position.
+    """
+    if not isinstance(payload, dict):
+        raise GradingError("Grading data must be an object")
+    subjects = payload.get('subjects')
+    students = payload.get('students')
+    if not isinstance(subjects, list) or not isinstance(students, list):
+        raise GradingError("'subjects' and 'students' must be lists")
+    if not all(isinstance(student, dict) for student in students):
+        raise GradingError("Every student must be an object")
+
+    try:
+        tables = [_score_table(students, subjects, component) for component in ('test1', 'test2', 'exam')]
+    except (TypeError, ValueError, AttributeError):
+        raise GradingError("Scores must be numbers (or null for not offered)")
+
+    results = grade_class(*tables)
+
+    graded = []
+    for row, student in enumerate(students):
+        subject_results = {}
+        for column, subject in enumerate(subjects):
+            if np.isnan(results['totals'][row, column]):
+                continue
+            subject_results[subject] = {
+                'test1': _clean(tables[0][row, column]),
+                'test2': _clean(tables[1][row, column]),
+                'exam': _clean(tables[2][row, column]),
+                'total': _clean(results['totals'][row, column]),
+                'grade': results['grades'][row, column],
+                'remark': results['remarks'][row, column],
+                'position': _clean(results['subject_positions'][row, column]),
+            }
+        graded.append({
+            'id': student.get('id'),
+            'name': student.get('name'),
+            'subjects': subject_results,
+            'total_obtained': _clean(results['grand_totals'][row]),
+            'total_obtainable': _clean(results['obtainable'][row]),
+            'percentage': _clean(results['percentages'][row]),
+            'result': results['results'][row],
+            'position': _clean(results['positions'][row]),
+        })
+    return graded
@@ -0,0 +1,208 @@
+# id_filter.py - STUDENT ID PRE-CHECKS: FORMAT, CHECKSUM AND A BLOOM FILTER OF KNOWN IDS
+"""
+Answer hopeless searches locally, before the result index or Drive is touched
+
+    check_student_id('EMFHS-2025-A7K-B9')   # None: worth searching
+    check_student_id('hello there')         # 'malformed'
+    check_student_id('EMFHS-2027-K7Q-M4')   # 'checksum' (see student_ids.fails_checksum)
+    check_student_id('EMFHS-2025-ZZZ-ZZ')   # 'unknown': never issued, never seen in Drive
+
+The Bloom filter holds the short ID (YYYY-XXX, what searches match on) of every
+ID the school knows: the student ID registry, saved report cards and every ID
+in the name of a PDF in the result index. A Bloom filter never reports an added
+ID as absent, but the index leaves out PDFs in folders it does not walk (arm
+folders such as SS1/SS1A, 'Senior Secondary One'). So 'unknown' is only
+returned while result_index.index_covers_every_folder() holds: change tracking
+(sync_drive_changes) keeps the index current and no folder was skipped. Then it
+can only be wrong for a PDF that reached Drive after the filter was built; it is
+rebuilt every STUDENT_ID_FILTER_MAX_AGE seconds. Otherwise an ID missing from
+the filter is searched like any other.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+
+from .id_matcher import FILENAME_ID_PATTERN, normalize_name
+from .result_index import index_covers_every_folder, parse_search_id
+from .student_ids import checksum_from_year, fails_checksum
+
+REJECT_MALFORMED = 'malformed'
+REJECT_CHECKSUM = 'checksum'
+REJECT_UNKNOWN = 'unknown'
+
+# Longest ID the models store; anything longer is rejected before the regex runs
+MAX_ID_LENGTH = 32
+
+# The formats _extract_year_from_id knows, as one whole-string match:
+# EMFHS-2025-A7K-B9, EMFHS-2025-001-T8, 2025-A7K-B9, 2025-A7K, 2025/001, EMIFORPHS-2025-A7K
+# (space, underscore and slash count as '-', like id_matcher.normalize_name)
+WELL_FORMED_ID = re.compile(r'(?:[A-Z]{2,}[-\s_/]+)?\d{4}[-\s_/]+[A-Z0-9]{3}(?:[-\s_/]+[A-Z0-9]{2})?',
+                            re.IGNORECASE)
+
+
+def is_well_formed(student_id):
+    """True if the ID has one of the supported formats (no normalizing copies are made)"""
+    if not student_id or len(student_id) > MAX_ID_LENGTH:
+        return False
+    return WELL_FORMED_ID.fullmatch(student_id.strip()) is not None
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings with no false negatives
+    Sized for `capacity` keys at `error_rate` false positives; uses double hashing
+    over one blake2b digest, so each lookup hashes the key once.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+    def fill_ratio(self):
+        return int.from_bytes(self.bits, 'little').bit_count() / self.size
+
+    def estimated_error_rate(self):
+        """False positive rate implied by the bits actually set"""
+        return self.fill_ratio() ** self.hash_count
+
+
+def known_short_ids():
+    """Short IDs of every registered, saved or indexed student ID"""
+    from .models import ReportCard, ReportCardFile, StudentRecord
+
+    short_ids = set()
+    # Every ID in a name, not just the one it is indexed under: searches also match the others
+    for name in ReportCardFile.objects.values_list('name', flat=True).iterator():
+        for match in FILENAME_ID_PATTERN.finditer(normalize_name(name)):
+            short_ids.add(f"{match.group(2)}-{match.group(3)}")
+    for model in (StudentRecord, ReportCard):
+        for student_id in model.objects.exclude(student_id='').values_list('student_id', flat=True).distinct():
+            short_id = parse_search_id(student_id)
+            if short_id:
+                short_ids.add(short_id)
+    return short_ids
+
+
+class KnownIdFilter:
+    """
+    Per-process Bloom filter of known student IDs, rebuilt when older than max_age
+    Until change tracking has been started, or while some folders are not indexed,
+    the index may be missing report cards, so the filter is built but never used
+    to reject an ID (authoritative=False).
+    """
+
+    def __init__(self, max_age=None, error_rate=None):
+        self.max_age = max_age if max_age is not None else getattr(settings, 'STUDENT_ID_FILTER_MAX_AGE', 300)
+        self.error_rate = error_rate or getattr(settings, 'STUDENT_ID_FILTER_ERROR_RATE', 0.001)
+        self.bloom = None
+        self.authoritative = False
+        self.checksum_from_year = None  # Read with the filter, so searches make no extra query
+        self.built_at = 0.0
+        self.build_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def needs_refresh(self):
+        return time.monotonic() - self.built_at > self.max_age
+
+    def refresh(self):
+        """Rebuild from the database (one thread at a time; the others keep the old filter)"""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            start = time.perf_counter()
+            try:
+                short_ids = known_short_ids()
+                authoritative = index_covers_every_folder()
+                self.checksum_from_year = checksum_from_year()
+            except Exception as e:
+                print(f"⚠️  Known student ID filter not rebuilt: {str(e)}")
+                self.bloom, self.authoritative, self.checksum_from_year = None, False, None
+            else:
+                # Headroom so the error rate holds until the next rebuild
+                bloom = BloomFilter(max(len(short_ids) * 5 // 4, 1024), self.error_rate)
+                for short_id in short_ids:
+                    bloom.add(short_id)
+                self.bloom, self.authoritative = bloom, authoritative
+            self.built_at = time.monotonic()
+            self.build_seconds = time.perf_counter() - start
+        finally:
+            self._lock.release()
+
+    def might_exist(self, student_id, refresh=True):
+        """
+        False only when the ID is certainly unknown and the filter can be trusted
+        Async callers refresh through sync_to_async first and pass refresh=False.
+        """
+        if refresh and self.needs_refresh():
+            self.refresh()
+        bloom = self.bloom
+        if bloom is None or not self.authoritative:
+            return True
+        short_id = parse_search_id(student_id)
+        return not short_id or short_id in bloom
+
+    def stats(self):
+        bloom = self.bloom
+        if bloom is None:
+            return {'built': False}
+        return {
+            'built': True,
+            'authoritative': self.authoritative,
+            'checksum_from_year': self.checksum_from_year,
+            'ids': len(bloom),
+            'capacity': bloom.capacity,
+            'bits': bloom.size,
+            'hash_count': bloom.hash_count,
+            'memory_bytes': bloom.memory_bytes,
+            'fill_ratio': round(bloom.fill_ratio(), 4),
+            'target_error_rate': bloom.error_rate,
+            'estimated_error_rate': bloom.estimated_error_rate(),
+            'build_seconds': round(self.build_seconds, 3),
+            'age_seconds': round(time.monotonic() - self.built_at, 1),
+        }
+
+
+def check_student_id(student_id, refresh=True):
+    """Why a search for this ID cannot find anything (REJECT_*), or None to go ahead"""
+    if not is_well_formed(student_id):
+        return REJECT_MALFORMED
+    if refresh and known_ids.needs_refresh():
+        known_ids.refresh()
+    if fails_checksum(student_id, known_ids.checksum_from_year):
+        return REJECT_CHECKSUM
+    if not known_ids.might_exist(student_id, refresh=False):
+        return REJECT_UNKNOWN
+    return None
+
+
+known_ids = KnownIdFilter()
@@ -0,0 +1,97 @@
+# id_matcher.py - PRECOMPILED STRICT STUDENT ID MATCHING
+import re
+from functools import lru_cache
+
+# Space, underscore and slash all count as '-' when comparing IDs
+SEPARATOR_PATTERN = re.compile(r'[\s_/]+')
+
+# Student ID inside a filename, after separators are normalized to '-'
+# Matches EMFHS-YYYY-XXX-XX, EMFHS-YYYY-XXX, YYYY-XXX-XX and YYYY-XXX
+FILENAME_ID_PATTERN = re.compile(
+    r'(?<![A-Z0-9])(?:(EMFHS)-)?(\d{4})-([A-Z0-9]{3})(?:-([A-Z0-9]{2}))?(?![A-Z0-9])'
+)
+BASE_ID_PATTERN = re.compile(r'(EMFHS-\d{4}-[A-Z0-9]{3})-[A-Z0-9]{2}')
+SHORT_ID_PATTERN = re.compile(r'\d{4}-[A-Z0-9]{3}')
+
+MATCH_EXACT = 'exact'          # Whole ID, e.g. EMFHS-2025-A7K-B9
+MATCH_COMPONENT = 'component'  # Base ID EMFHS-2025-A7K or short ID 2025-A7K
+MATCH_ANYWHERE = 'anywhere'    # Raw ID text somewhere in the filename
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name):
+    """Upper-case a filename or ID and turn every separator run into '-'"""
+    return SEPARATOR_PATTERN.sub('-', name.upper().strip())
+
+
+@lru_cache(maxsize=65536)
+def parse_filename_id(filename):
+    """
+    Extract the student ID from a PDF filename
+    Returns (student_id, short_id), e.g. ('EMFHS-2025-A7K-B9', '2025-A7K')
+    """
+    matches = list(FILENAME_ID_PATTERN.finditer(normalize_name(filename)))
+    if not matches:
+        return '', ''
+
+    # Prefer full IDs over bare YYYY-XXX runs (e.g. '2026-ADA' in '2025-2026 ADA')
+    match = max(matches, key=lambda m: (m.group(1) is not None, m.group(4) is not None))
+    prefix, year, code, checksum = match.groups()
+    short_id = f"{year}-{code}"
+    parts = [p for p in (prefix, year, code, checksum) if p]
+    return '-'.join(parts), short_id
+
+
+class StudentIdMatcher:
+    """
+    Strict ID matcher built once per searched student ID
+    classify() scans a normalized filename once and reports the strongest match:
+    MATCH_EXACT, MATCH_COMPONENT, MATCH_ANYWHERE or None.
+    """
+
+    def __init__(self, student_id):
+        self.student_id = student_id.upper().strip()
+        self.normalized_id = normalize_name(self.student_id)
+
+        base_match = BASE_ID_PATTERN.search(self.normalized_id)
+        short_match = SHORT_ID_PATTERN.search(self.normalized_id)
+        self.base_id = base_match.group(1) if base_match else ''
+        self.short_id = short_match.group(0) if short_match else ''
+
+        if not self.normalized_id:
+            self._pattern = None
+            return
+
+        # Exact ID as a whole token first, then base/short ID anywhere
+        alternatives = [rf'(?P<exact>(?<![A-Z0-9]){re.escape(self.normalized_id)}(?![A-Z0-9]))']
+        components = [re.escape(c) for c in (self.base_id, self.short_id) if c]
+        if components:
+            alternatives.append(f"(?P<component>{'|'.join(components)})")
+        self._pattern = re.compile('|'.join(alternatives))
+
+    def classify(self, filename):
+        """Strongest kind of match between this ID and a filename, or None"""
+        if self._pattern is None:
+            return None
+
+        found = None
+        for match in self._pattern.finditer(normalize_name(filename)):
+            if match.group('exact'):
+                return MATCH_EXACT
+            found = MATCH_COMPONENT
+        if found:
+            return found
+
+        if self.student_id and self.student_id in filename.upper():
+            return MATCH_ANYWHERE
+        return None
+
+    def matches(self, filename):
+        return self.classify(filename) is not None
+
+    def filter(self, files):
+        """Yield (match kind, file) for every Drive file dict whose name matches"""
+        for item in files:
+            kind = self.classify(item['name'])
+            if kind:
+                yield kind, item
@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.deep_search import SubfolderSearch
+from student_invoice.drive_service import GoogleDriveService
+from student_invoice.drive_transport import PooledHttp
+from student_invoice.fake_drive import FakeDrive
+from student_invoice.fake_drive_server import FakeDriveServer
+from student_invoice.file_metadata import FileMetadataCache
+from student_invoice.folder_cache import FolderCache
+from student_invoice.student_ids import ALPHABET
+
+
+class Command(BaseCommand):
+    help = ('Search report cards nested in class arm folders (SS1/SS1A/...) on a local fake Drive server: '
+            'one folder at a time, on the bounded pool, and on the pool with the subfolder tree memoized')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--arms', type=int, default=8, help='Arm folders in the class (default: 8)')
+        parser.add_argument('--subfolders', type=int, default=3, help='Subfolders in each arm (default: 3)')
+        parser.add_argument('--files', type=int, default=20, help='PDFs per subfolder, at most 30 (default: 20)')
+        parser.add_argument('--searches', type=int, default=20, help='Searches per strategy (default: 20)')
+        parser.add_argument('--workers', type=int, default=8, help='Deep search pool size (default: 8)')
+        parser.add_argument('--latency-ms', type=float, default=20, help='Added to every response (default: 20)')
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        drive = FakeDrive()
+        class_id = drive.add_folder('SS1', drive.main_folder_id)
+        student_ids = []
+        for arm in range(options['arms']):
+            arm_id = drive.add_folder(f"SS1{chr(ord('A') + arm)}", class_id)
+            for sub in range(options['subfolders']):
+                sub_id = drive.add_folder(f"BATCH {sub + 1}", arm_id)
+                for number in range(options['files']):
+                    code = ALPHABET[arm % len(ALPHABET)] + ALPHABET[sub % len(ALPHABET)] + ALPHABET[number % len(ALPHABET)]
+                    student_id = f"EMFHS-2025-{code}-Q{number % 10}"
+                    drive.add_file(f"{student_id}.pdf", sub_id)
+                    student_ids.append(student_id)
+        searched = rng.sample(student_ids, min(options['searches'], len(student_ids)))
+
+        server = FakeDriveServer(drive, latency=options['latency_ms'] / 1000)
+        with server:
+            service = GoogleDriveService()
+            service.service = server.client(http=PooledHttp(server.credentials(), pool_size=options['workers']))
+            service.metadata_cache = FileMetadataCache(alias='default')  # Keep the benchmark out of the shared cache
+            next(iter(service.list_files(f"'{class_id}' in parents", 'id', label='warm_up')))  # Token and connection
+
+            folders = 1 + options['arms'] * (1 + options['subfolders'])
+            self.stdout.write(f"{folders} folders, {len(student_ids)} PDFs, {len(searched)} searches, "
+                              f"{options['latency_ms']:.0f} ms per response")
+            runs = [
+                ('one folder at a time', SubfolderSearch(workers=1), True),
+                (f"pool of {options['workers']}", SubfolderSearch(workers=options['workers']), True),
+                (f"pool of {options['workers']}, memoized", SubfolderSearch(workers=options['workers']), False),
+            ]
+            results = {}
+            for label, search, forget in runs:
+                # Each strategy gets its own cache; "forget" drops the memoized tree before every search
+                search.cache = FolderCache(alias='default', prefix=f"benchmark_deep_{id(search)}")
+                # An unmeasured pass makes the server memoize every query the strategy sends,
+                # so the fake's own query matching stays out of the timings
+                self._measure(service, search, class_id, searched, forget)
+                results[label] = self._measure(service, search, class_id, searched, forget)
+
+        expected = [[student_id] for student_id in searched]
+        for label, run in results.items():
+            if run['found'] != expected:
+                raise CommandError(f"{label}: expected {expected}, found {run['found']}")
+            self.stdout.write(f"{label:<28} mean {run['mean_ms']:6.1f} ms  p95 {run['p95_ms']:6.1f} ms  "
+                              f"{run['queries']:5.1f} quer(ies)/search")
+        first, last = list(results.values())[0], list(results.values())[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f"All {len(searched)} report cards found by every strategy; "
+            f"{first['mean_ms'] / last['mean_ms']:.1f}x faster with the pool and the memoized tree"
+        ))
+
+    def _measure(self, service, search, class_id, student_ids, forget):
+        timings, found, queries = [], [], 0
+        for student_id in student_ids:
+            if forget:
+                search.cache.invalidate()
+            start = time.perf_counter()
+            matches, stats = search.search(service, class_id, student_id)
+            timings.append((time.perf_counter() - start) * 1000)
+            found.append(sorted(pdf['name'][:-len('.pdf')] for _, pdf in matches))
+            queries += stats['queries']
+        timings.sort()
+        return {
+            'found': found,
+            'queries': queries / len(student_ids),
+            'mean_ms': statistics.mean(timings),
+            'p95_ms': timings[int(len(timings) * 0.95) - 1],
+        }
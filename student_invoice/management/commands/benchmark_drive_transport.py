@@ -0,0 +1,94 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from student_invoice.drive_listing import DriveListing
+from student_invoice.drive_transport import PooledHttp
+from student_invoice.fake_drive import FakeDrive
+from student_invoice.fake_drive_server import FakeDriveServer
+
+
+class Command(BaseCommand):
+    help = ('List class folders from a local fake Drive server over the old httplib2 transport '
+            '(sequential, and one client per thread) and over the pooled transport')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classes', type=int, default=40, help='Class folders to list (default: 40)')
+        parser.add_argument('--files', type=int, default=250, help='PDFs per class (default: 250)')
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--threads', type=int, default=16, help='Parallel listings (default: 16)')
+        parser.add_argument('--pool-size', type=int, default=16, help='Pooled transport connections (default: 16)')
+        parser.add_argument('--latency-ms', type=float, default=20, help='Added to every response (default: 20)')
+        parser.add_argument('--connect-ms', type=float, default=60,
+                            help='Added to every new connection, standing in for a TLS handshake (default: 60)')
+
+    def handle(self, *args, **options):
+        drive = FakeDrive()
+        term = drive.add_folder('FIRST TERM 2025-2026', drive.main_folder_id)
+        folder_ids = []
+        for number in range(options['classes']):
+            folder_id = drive.add_folder(f"CLASS {number + 1}", term)
+            folder_ids.append(folder_id)
+            for student in range(options['files']):
+                drive.add_file(f"EMFHS-2025-{number:03d}-{student:03d}.pdf", folder_id)
+
+        expected = options['classes'] * options['files']
+        server = FakeDriveServer(drive, latency=options['latency_ms'] / 1000, connect_delay=options['connect_ms'] / 1000)
+        with server:
+            server.warm(self._query(folder_id) for folder_id in folder_ids)
+            self.stdout.write(
+                f"{options['classes']} classes x {options['files']} PDFs, page size {options['page_size']}, "
+                f"{options['latency_ms']:.0f} ms per response, {options['connect_ms']:.0f} ms per new connection"
+            )
+            runs = [
+                ('httplib2, sequential', lambda: self._run_httplib2(server, folder_ids, options, threads=1)),
+                (f"httplib2, client per thread x{options['threads']}",
+                 lambda: self._run_httplib2(server, folder_ids, options, threads=options['threads'])),
+                (f"pooled ({options['pool_size']} conns) x{options['threads']}",
+                 lambda: self._run_pooled(server, folder_ids, options)),
+            ]
+            for label, run in runs:
+                server.reset_stats()
+                start = time.perf_counter()
+                listed = run()
+                elapsed = time.perf_counter() - start
+                stats = server.stats
+                line = (f"{label:<32} {elapsed:6.2f}s  {stats['connections']:3d} connection(s)  "
+                        f"{stats['requests']:4d} request(s)  {stats['token_refreshes']} token refresh(es)")
+                if listed != expected:
+                    self.stdout.write(self.style.WARNING(f"{line}  listed {listed}/{expected} files"))
+                else:
+                    self.stdout.write(line)
+
+    def _query(self, folder_id):
+        return f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false"
+
+    def _list(self, client, folder_id, options):
+        listing = DriveListing(client, self._query(folder_id), "id, name", page_size=options['page_size'])
+        return sum(1 for _ in listing)
+
+    def _run_httplib2(self, server, folder_ids, options, threads):
+        """The previous transport: an httplib2 client per thread, sharing only the credentials"""
+        import threading
+
+        credentials = server.credentials()
+        local = threading.local()
+
+        def list_class(folder_id):
+            if not hasattr(local, 'client'):
+                local.client = server.client(credentials=credentials)
+            return self._list(local.client, folder_id, options)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return sum(executor.map(list_class, folder_ids))
+
+    def _run_pooled(self, server, folder_ids, options):
+        """One client for every thread on PooledHttp (what GoogleDriveService now builds)"""
+        http = PooledHttp(server.credentials(), pool_size=options['pool_size'])
+        client = server.client(http=http)
+        try:
+            with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                return sum(executor.map(lambda folder_id: self._list(client, folder_id, options), folder_ids))
+        finally:
+            http.close()
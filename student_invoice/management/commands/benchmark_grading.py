@@ -0,0 +1,97 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from student_invoice.grading import EXAM_MAX, TEST1_MAX, TEST2_MAX, grade_class
+
+
+def calculate_grade(total):
+    """calculateGrade() from the exam result pages"""
+    if 70 <= total <= 100:
+        return 'A'
+    if 60 <= total < 70:
+        return 'B'
+    if 50 <= total < 60:
+        return 'C'
+    if 45 <= total < 50:
+        return 'D'
+    if 40 <= total < 45:
+        return 'E'
+    if 0 <= total < 40:
+        return 'F'
+    return '--'
+
+
+def calculate_remark(total):
+    """calculateRemark() from the exam result pages"""
+    return {'A': 'EXCELLENT', 'B': 'VERY GOOD', 'C': 'GOOD', 'D': 'FAIR', 'E': 'FAIR', 'F': 'POOR'}.get(
+        calculate_grade(total), '--')
+
+
+def rank(values):
+    """1 + how many values are higher (ties share a position)"""
+    ordered = sorted(values, reverse=True)
+    first_position = {}
+    for index, value in enumerate(ordered):
+        first_position.setdefault(value, index + 1)
+    return [first_position[value] for value in values]
+
+
+def grade_class_loop(test1, test2, exam):
+    """One student and one subject at a time, the way the pages grade today"""
+    totals, grades, remarks, percentages = [], [], [], []
+    for row_test1, row_test2, row_exam in zip(test1, test2, exam):
+        row_totals = [a + b + c for a, b, c in zip(row_test1, row_test2, row_exam)]
+        totals.append(row_totals)
+        grades.append([calculate_grade(total) for total in row_totals])
+        remarks.append([calculate_remark(total) for total in row_totals])
+        percentages.append(round(sum(row_totals) / (len(row_totals) * 100) * 100, 2))
+
+    subject_positions = list(zip(*[rank(list(column)) for column in zip(*totals)]))
+    positions = rank(percentages)
+    return totals, grades, remarks, subject_positions, percentages, positions
+
+
+class Command(BaseCommand):
+    help = 'Compare vectorized class grading with a per-student Python loop over synthetic scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=60, help='Students in the class (default: 60)')
+        parser.add_argument('--subjects', type=int, default=15, help='Subjects per student (default: 15)')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs of each implementation (default: 50)')
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        shape = (options['students'], options['subjects'])
+
+        def table(maximum):
+            return [[rng.randint(0, maximum) for _ in range(shape[1])] for _ in range(shape[0])]
+
+        test1, test2, exam = table(TEST1_MAX), table(TEST2_MAX), table(EXAM_MAX)
+        arrays = [np.array(scores, dtype=float) for scores in (test1, test2, exam)]
+
+        timings = {}
+        for label, run in [('python loop', lambda: grade_class_loop(test1, test2, exam)),
+                           ('numpy', lambda: grade_class(*arrays))]:
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                result = run()
+            timings[label] = (time.perf_counter() - start) * 1000 / options['repeat']
+            self.stdout.write(f"{label:<12} {timings[label]:8.3f} ms per {shape[0]}x{shape[1]} class")
+
+        (loop_totals, loop_grades, loop_remarks, loop_subject_positions,
+         loop_percentages, loop_positions) = grade_class_loop(test1, test2, exam)
+        graded = grade_class(*arrays)
+        same = (
+            np.array_equal(graded['totals'], np.array(loop_totals, dtype=float))
+            and graded['grades'].tolist() == loop_grades
+            and graded['remarks'].tolist() == loop_remarks
+            and np.array_equal(graded['subject_positions'], np.array(loop_subject_positions))
+            and np.allclose(graded['percentages'], loop_percentages)
+            and graded['positions'].tolist() == loop_positions
+        )
+        self.stdout.write(f"Speed-up: {timings['python loop'] / timings['numpy']:.1f}x")
+        self.stdout.write(f"Results identical: {same}")
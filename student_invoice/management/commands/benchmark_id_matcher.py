@@ -0,0 +1,214 @@
+import random
+import re
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from student_invoice.id_matcher import StudentIdMatcher, normalize_name, parse_filename_id
+
+ALPHANUMERIC = string.ascii_uppercase + string.digits
+FIRST_NAMES = ['ADA', 'CHIDI', 'EMEKA', 'FUNKE', 'IBRAHIM', 'NGOZI', 'SEUN', 'TOLU']
+LAST_NAMES = ['ADEYEMI', 'BELLO', 'EZE', 'OKAFOR', 'OKON', 'USMAN']
+
+
+def synthetic_id(rng):
+    """Random new-format (EMFHS-YYYY-XXX-XX) or old-format (EMFHS-YYYY-NNN-XX) ID"""
+    year = rng.choice(range(2018, 2027))
+    if rng.random() < 0.7:
+        code = ''.join(rng.choices(ALPHANUMERIC, k=3))
+    else:
+        code = f"{rng.randint(1, 999):03d}"
+    checksum = ''.join(rng.choices(ALPHANUMERIC, k=2))
+    return f"EMFHS-{year}-{code}-{checksum}"
+
+
+def synthetic_filename(rng, student_id):
+    """Report card filename in one of the layouts staff actually upload"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    separator = rng.choice(['-', ' ', '_'])
+    id_text = student_id.replace('-', separator) if rng.random() < 0.2 else student_id
+    layout = rng.choice([
+        "{name} {id}.pdf",
+        "{id} {name}.pdf",
+        "{id}_{name}_REPORT.pdf",
+        "{name} - {id} - FIRST TERM 2025-2026.pdf",
+    ])
+    return layout.format(name=name, id=id_text)
+
+
+# ============ LEGACY MATCHERS ============
+# The regex-per-call matchers GoogleDriveService used before StudentIdMatcher,
+# kept here only as the baseline the benchmark (and its test) compares against
+
+def exact_id_match(search_id, filename):
+    """
+    Check for EXACT ID match in filename
+    Returns True if the exact student ID appears in the filename
+    Supports NEW format: EMFHS-YYYY-XXX-XX
+    """
+    # Normalize both
+    search_id_clean = search_id.upper().strip()
+    filename_upper = filename.upper()
+
+    # Method 1: Direct exact match
+    if search_id_clean in filename_upper:
+        # Check if it's a whole word match (not part of another ID)
+        # Look for patterns like " EMFHS-2025-A7K-B9 " or "EMFHS-2025-A7K-B9.pdf"
+        pattern1 = f"\\b{re.escape(search_id_clean)}\\b"
+        if re.search(pattern1, filename_upper):
+            return True
+
+        # Also check for ID at start/end of filename
+        if filename_upper.startswith(search_id_clean) or filename_upper.endswith(search_id_clean):
+            return True
+
+    # Method 2: Check variations (with/without spaces, dashes, etc.)
+    variations = [
+        search_id_clean,
+        search_id_clean.replace('-', ' '),
+        search_id_clean.replace(' ', '-'),
+        search_id_clean.replace('_', '-'),
+        search_id_clean.replace('-', '_'),
+    ]
+
+    for variation in variations:
+        if len(variation) > 5:  # Ensure meaningful length
+            pattern = f"\\b{re.escape(variation)}\\b"
+            if re.search(pattern, filename_upper):
+                return True
+
+    return False
+
+
+def id_components_match(search_id, filename):
+    """
+    Check if ID components match 
+    Supports:
+    1. NEW format: EMFHS-2025-A7K matches EMFHS-2025-A7K-B9
+    2. OLD format: EMFHS-2025-001 matches EMFHS-2025-001-T8
+    3. Year+code: 2025-A7K matches EMFHS-2025-A7K-B9
+    """
+    search_id_clean = search_id.upper().strip()
+    filename_upper = filename.upper()
+
+    # Pattern for NEW format: EMFHS-YYYY-XXX-XX (XXX = mixed alphanumeric)
+    pattern_new = r'(EMFHS-\d{4}-[A-Z0-9]{3})-[A-Z0-9]{2}'
+    match_new = re.search(pattern_new, search_id_clean)
+
+    if match_new:
+        base_id = match_new.group(1)  # E.g., EMFHS-2025-A7K
+        # Check if this base ID appears in filename
+        if base_id in filename_upper:
+            return True
+
+    # Pattern for OLD format: EMFHS-YYYY-NNN-XX (backwards compatibility)
+    pattern_old = r'(EMFHS-\d{4}-\d{3})-[A-Z0-9]{2}'
+    match_old = re.search(pattern_old, search_id_clean)
+
+    if match_old:
+        base_id = match_old.group(1)  # E.g., EMFHS-2025-001
+        if base_id in filename_upper:
+            return True
+
+    # Pattern for YYYY-XXX-XX (new format without EMFHS prefix)
+    pattern_short_new = r'(\d{4}-[A-Z0-9]{3})-[A-Z0-9]{2}'
+    match_short_new = re.search(pattern_short_new, search_id_clean)
+
+    if match_short_new:
+        base_id = match_short_new.group(1)  # E.g., 2025-A7K
+        if base_id in filename_upper:
+            return True
+
+    # Pattern for YYYY-NNN-XX (old format without EMFHS prefix)
+    pattern_short_old = r'(\d{4}-\d{3})-[A-Z0-9]{2}'
+    match_short_old = re.search(pattern_short_old, search_id_clean)
+
+    if match_short_old:
+        base_id = match_short_old.group(1)  # E.g., 2025-001
+        if base_id in filename_upper:
+            return True
+
+    # Check for partial matches (e.g., 2025-A7K, 2025-001)
+    # Extract year and code from search ID
+    year_match = re.search(r'(\d{4})-[A-Z0-9]{3}', search_id_clean)  # New format
+    if not year_match:
+        year_match = re.search(r'(\d{4})-\d{3}', search_id_clean)    # Old format
+
+    if year_match:
+        year = year_match.group(1)
+        # Try to get the code part
+        code_match_new = re.search(r'\d{4}-([A-Z0-9]{3})', search_id_clean)  # New format
+        code_match_old = re.search(r'\d{4}-(\d{3})', search_id_clean)        # Old format
+
+        if code_match_new:
+            code = code_match_new.group(1)
+            # Look for YEAR-CODE pattern in filename
+            if f"{year}-{code}" in filename_upper:
+                return True
+        elif code_match_old:
+            code = code_match_old.group(1)
+            # Look for YEAR-CODE pattern in filename
+            if f"{year}-{code}" in filename_upper:
+                return True
+
+    return False
+
+
+def id_appears_anywhere(search_id, filename):
+    """
+    Check if ID appears anywhere in filename (least strict)
+    """
+    search_id_clean = search_id.upper().strip()
+    filename_upper = filename.upper()
+
+    return search_id_clean in filename_upper
+
+
+def legacy_matches(search_id, filename):
+    """The legacy search: exact, then ID components, then the ID anywhere in the name"""
+    search_upper = search_id.upper().strip()
+    filename_upper = filename.upper()
+    return (exact_id_match(search_upper, filename_upper)
+            or id_components_match(search_upper, filename_upper)
+            or id_appears_anywhere(search_upper, filename_upper))
+
+
+class Command(BaseCommand):
+    help = 'Compare StudentIdMatcher with the legacy per-call regex matchers over synthetic filenames'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=10000, help='Synthetic filenames (default: 10000)')
+        parser.add_argument('--searches', type=int, default=20, help='Search IDs to classify against (default: 20)')
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        ids = [synthetic_id(rng) for _ in range(options['files'])]
+        filenames = [synthetic_filename(rng, student_id) for student_id in ids]
+        search_ids = rng.sample(ids, options['searches'])
+
+        def legacy_scan(search_id):
+            return [name for name in filenames if legacy_matches(search_id, name)]
+
+        def matcher_scan(search_id):
+            matcher = StudentIdMatcher(search_id)
+            return [name for name in filenames if matcher.matches(name)]
+
+        normalize_name.cache_clear()
+        parse_filename_id.cache_clear()
+
+        results = {}
+        for label, scan in [('legacy', legacy_scan), ('matcher (cold cache)', matcher_scan),
+                            ('matcher (warm cache)', matcher_scan)]:
+            start = time.perf_counter()
+            results[label] = [scan(search_id) for search_id in search_ids]
+            elapsed = time.perf_counter() - start
+            per_scan_ms = elapsed * 1000 / len(search_ids)
+            self.stdout.write(f"{label:<22} {per_scan_ms:8.2f} ms per {len(filenames)}-file scan")
+
+        mismatches = sum(
+            1 for legacy_found, matcher_found in zip(results['legacy'], results['matcher (warm cache)'])
+            if set(legacy_found) != set(matcher_found)
+        )
+        self.stdout.write(f"Searches with different results: {mismatches}/{len(search_ids)}")
@@ -0,0 +1,114 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.drive_service import GoogleDriveService
+from student_invoice.drive_transport import PooledHttp
+from student_invoice.fake_drive import FakeDrive
+from student_invoice.fake_drive_server import FakeDriveServer
+from student_invoice.file_metadata import FileMetadataCache
+from student_invoice.id_matcher import StudentIdMatcher
+from student_invoice.student_ids import ALPHABET
+
+# How report cards are named in the class folders: the current format, the
+# space-separated format some staff type, and the legacy short form
+FILENAME_FORMATS = (
+    (0.7, "{prefix}-{year}-{code}-{check}.pdf"),
+    (0.2, "{name} {prefix} {year} {code} {check}.pdf"),
+    (0.1, "{name} {year}_{code}.pdf"),
+)
+
+
+class Command(BaseCommand):
+    help = ('Search a class on a local fake Drive server by listing the whole class (before) and by pushing '
+            '"name contains" down to Drive (after); reports bytes, requests and latency per search')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=300, help='PDFs in the class folder (default: 300)')
+        parser.add_argument('--searches', type=int, default=50, help='Searches per strategy (default: 50)')
+        parser.add_argument('--latency-ms', type=float, default=20, help='Added to every response (default: 20)')
+        parser.add_argument('--bandwidth-kbps', type=float, default=4000,
+                            help='Response body speed in kilobits/s, 0 for unlimited (default: 4000)')
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        drive = FakeDrive()
+        folder_id = drive.add_folder('JSS1', drive.main_folder_id)
+        student_ids = self._fill_class(drive, folder_id, options['students'], rng)
+        searched = rng.sample(student_ids, min(options['searches'], len(student_ids)))
+
+        bandwidth = options['bandwidth_kbps'] * 1000 / 8 or None
+        server = FakeDriveServer(drive, latency=options['latency_ms'] / 1000, bandwidth=bandwidth)
+        with server:
+            service = GoogleDriveService()
+            service.service = server.client(http=PooledHttp(server.credentials()))
+            service.metadata_cache = FileMetadataCache(alias='default')  # Keep the benchmark out of the shared cache
+
+            full_query = f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false"
+            server.warm([full_query] + [service._name_query(folder_id, StudentIdMatcher(student_id))
+                                        for student_id in searched])
+            next(iter(service.list_files(full_query, 'id', label='warm_up')))  # Token and connection
+
+            link = f"{options['bandwidth_kbps']:.0f} kbit/s" if bandwidth else "unlimited bandwidth"
+            self.stdout.write(f"{options['students']} PDFs in the class, {len(searched)} searches, "
+                              f"{options['latency_ms']:.0f} ms per response, {link}")
+            before = self._measure(server, searched, lambda student_id: self._full_listing(service, folder_id, student_id))
+            after = self._measure(server, searched,
+                                  lambda student_id: service._search_by_name_with_strict_id(folder_id, student_id))
+
+        for student_id, old, new in zip(searched, before['results'], after['results']):
+            if old != new:
+                raise CommandError(f"{student_id}: full listing found {old}, name query found {new}")
+
+        for label, run in (('full class listing', before), ('name contains', after)):
+            self.stdout.write(
+                f"{label:<20} {run['bytes']:>9,.0f} bytes/search  {run['requests']:.1f} request(s)/search  "
+                f"mean {run['mean_ms']:6.1f} ms  p95 {run['p95_ms']:6.1f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Same results for all {len(searched)} searches; "
+            f"{before['bytes'] / after['bytes']:.0f}x fewer bytes, "
+            f"{before['mean_ms'] / after['mean_ms']:.1f}x faster"
+        ))
+
+    def _fill_class(self, drive, folder_id, students, rng):
+        student_ids = []
+        weights = [weight for weight, _ in FILENAME_FORMATS]
+        formats = [filename for _, filename in FILENAME_FORMATS]
+        while len(student_ids) < students:
+            parts = {
+                'prefix': 'EMFHS', 'year': rng.choice(range(2019, 2026)),
+                'code': ''.join(rng.choices(ALPHABET, k=3)), 'check': ''.join(rng.choices(ALPHABET, k=2)),
+                'name': f"STUDENT {len(student_ids) + 1}",
+            }
+            student_id = f"EMFHS-{parts['year']}-{parts['code']}-{parts['check']}"
+            if student_id in student_ids:
+                continue
+            drive.add_file(rng.choices(formats, weights)[0].format(**parts), folder_id)
+            student_ids.append(student_id)
+        return student_ids
+
+    def _full_listing(self, service, folder_id, student_id):
+        """What search_student_pdf did before: every PDF in the class, filtered here"""
+        matcher = StudentIdMatcher(student_id)
+        return [pdf for _, pdf in matcher.filter(service.list_class_pdfs(folder_id))]
+
+    def _measure(self, server, student_ids, search):
+        server.reset_stats()
+        timings, results = [], []
+        for student_id in student_ids:
+            start = time.perf_counter()
+            found = search(student_id)
+            timings.append((time.perf_counter() - start) * 1000)
+            results.append(sorted(pdf['id'] for pdf in found))
+        timings.sort()
+        return {
+            'results': results,
+            'bytes': server.stats['bytes_sent'] / len(student_ids),
+            'requests': server.stats['requests'] / len(student_ids),
+            'mean_ms': statistics.mean(timings),
+            'p95_ms': timings[int(len(timings) * 0.95) - 1],
+        }
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.folder_snapshot import folder_snapshots
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the snapshot of every term/class folder in Google Drive and report folder names '
+            'that are ambiguous or not recognised')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help='Print every indexed folder key')
+
+    def handle(self, *args, **options):
+        from student_invoice.drive_service import drive_service
+
+        try:
+            snapshot = folder_snapshots.rebuild(drive_service, log=self.stdout.write)
+        except Exception as e:
+            raise CommandError(f"Folder snapshot failed: {str(e)}")
+
+        if options['list']:
+            for (session, term), folder_id in sorted(snapshot.terms.items()):
+                self.stdout.write(f"Term {term} {session}: {folder_id}")
+                for (class_session, class_term, class_name), class_id in sorted(snapshot.classes.items()):
+                    if (class_session, class_term) == (session, term):
+                        self.stdout.write(f"   {class_name}: {class_id}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(snapshot.terms)} term and {len(snapshot.classes)} class folder(s) "
+            f"from {snapshot.folder_count} folder(s) in {snapshot.query_count} query page(s)"
+        ))
+        if snapshot.problems:
+            self.stdout.write(self.style.WARNING(
+                f"{len(snapshot.problems)} folder name(s) need attention (listed above)"
+            ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from student_invoice.folder_cache import folder_cache
+
+
+class Command(BaseCommand):
+    help = 'Forget every cached Drive term/class folder ID (e.g. after renaming folders in Drive)'
+
+    def handle(self, *args, **options):
+        generation = folder_cache.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Drive folder cache cleared (cache '{folder_cache.alias}', generation {generation})"
+        ))
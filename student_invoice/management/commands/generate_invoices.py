@@ -0,0 +1,134 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from student_invoice.billing import (
+    BANK_DETAILS, INVOICE_KINDS, PAYMENT_NOTES, BillingError, build_invoice, iter_invoice_csv, load_roster,
+    load_schedule, render_job,
+)
+from student_invoice.fee_ledger import LedgerError, save_invoice
+from student_invoice.models import StudentRecord
+
+SAFE_NAME = str.maketrans({'/': '-', '\\': '-', ':': '-'})
+
+
+class Command(BaseCommand):
+    help = 'Generate every term bill or term-end account for a roster: one PDF per class plus a CSV summary'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedule', required=True, help='Fee schedule JSON (see student_invoice/billing.py)')
+        parser.add_argument('--roster', help='Roster CSV: name, class, student_id, optional fee columns')
+        parser.add_argument('--class', dest='class_name',
+                            help='Only this class (also selects the class from the student ID registry)')
+        parser.add_argument('--year', type=int,
+                            help='Without --roster: bill registered students of this enrollment year')
+        parser.add_argument('--output', help='Output root (default: settings.INVOICE_OUTPUT_DIR)')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count)')
+        parser.add_argument('--per-student', action='store_true',
+                            help='One PDF per student (named like the pages do) instead of one per class')
+        parser.add_argument('--record', action='store_true',
+                            help='Also save every invoice to the fee ledger (replacing earlier ones for the term)')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['schedule'], encoding='utf-8') as schedule_file:
+                schedule = load_schedule(json.load(schedule_file))
+            students = self._load_students(options)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        if not students:
+            raise CommandError("The roster has no students")
+
+        start = time.perf_counter()
+        try:
+            invoices = [build_invoice(student, schedule) for student in students]
+        except BillingError as e:
+            raise CommandError(str(e))
+
+        if options['record']:
+            self._record(invoices)
+
+        label = f"{INVOICE_KINDS[schedule['kind']][1]} {schedule['term']} {schedule['session']}".strip()
+        batch_dir = Path(options['output'] or settings.INVOICE_OUTPUT_DIR) / label.translate(SAFE_NAME)
+        batch_dir.mkdir(parents=True, exist_ok=True)
+
+        with open(batch_dir / 'invoices.csv', 'w', encoding='utf-8', newline='') as csv_file:
+            for line in iter_invoice_csv(invoices):
+                csv_file.write(line)
+
+        jobs = self._jobs(invoices, batch_dir, options['per_student'])
+        rendered = failed = total_bytes = 0
+        workers = min(options['workers'] or os.cpu_count() or 1, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(render_job, job): job for job in jobs}
+            for future in as_completed(futures):
+                path = Path(futures[future]['path'])
+                try:
+                    _, count, size = future.result()
+                except Exception as e:
+                    failed += len(futures[future]['invoices'])
+                    self.stderr.write(f"❌ {path.name}: {str(e)}")
+                    continue
+                rendered += count
+                total_bytes += size
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"🧾 {path.name}: {count} invoice(s), {size / 1024:.1f} KB")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{batch_dir}: {rendered} invoice(s) in {len(jobs)} PDF(s), {failed} failed, "
+            f"{total_bytes / 1024 / 1024:.1f} MB in {elapsed:.1f}s"
+        ))
+
+    def _record(self, invoices):
+        try:
+            with transaction.atomic():
+                for invoice in invoices:
+                    save_invoice(
+                        invoice['kind'], invoice['session'], invoice['term'], invoice['class'], invoice['name'],
+                        student_id=invoice['student_id'], items=invoice['items'], due_date=invoice['due_date'],
+                        late_fee=invoice['late_fee'], bank_details=BANK_DETAILS, payment_notes=PAYMENT_NOTES,
+                    )
+        except LedgerError as e:
+            raise CommandError(f"Not recorded in the fee ledger: {str(e)}")
+        self.stdout.write(f"📒 Recorded {len(invoices)} invoice(s) in the fee ledger")
+
+    def _load_students(self, options):
+        class_filter = (options['class_name'] or '').strip().upper()
+        if options['roster']:
+            with open(options['roster'], encoding='utf-8-sig', newline='') as roster_file:
+                students = load_roster(csv.DictReader(roster_file))
+            if class_filter:
+                students = [student for student in students if student['class'] == class_filter]
+            return students
+
+        if not options['year']:
+            raise CommandError("Give --roster, or --year to bill students from the ID registry")
+        records = StudentRecord.objects.filter(year=options['year']).order_by('class_name', 'name')
+        if class_filter:
+            records = records.filter(class_name__iexact=class_filter)
+        return [
+            {'name': record.name, 'class': record.class_name.upper(), 'student_id': record.student_id, 'items': []}
+            for record in records.iterator()
+        ]
+
+    def _jobs(self, invoices, batch_dir, per_student):
+        if per_student:
+            return [
+                {'invoices': [invoice],
+                 'path': str(batch_dir / (invoice['class'] or 'NO CLASS').translate(SAFE_NAME) / invoice['filename'])}
+                for invoice in invoices
+            ]
+
+        classes = {}
+        for invoice in invoices:
+            classes.setdefault(invoice['class'] or 'NO CLASS', []).append(invoice)
+        return [{'invoices': class_invoices, 'path': str(batch_dir / f"{class_name.translate(SAFE_NAME)}.pdf")}
+                for class_name, class_invoices in classes.items()]
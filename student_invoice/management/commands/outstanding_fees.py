@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.billing import format_currency
+from student_invoice.fee_ledger import LedgerError, outstanding_balances, outstanding_summary, rebuild_balances
+
+
+class Command(BaseCommand):
+    help = 'List students who still owe fees for a term, with per-class totals, from the fee ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', required=True, help="Session, e.g. '2025/2026'")
+        parser.add_argument('--term', required=True, help="Term: 1, 2, 3 or '2ND TERM'")
+        parser.add_argument('--class', dest='class_name', help='Only this class')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute the balances from the invoices first (after edits in the admin)')
+
+    def handle(self, *args, **options):
+        session, term = options['session'], options['term']
+        try:
+            if options['rebuild']:
+                rows = rebuild_balances(session, term)
+                self.stdout.write(f"Rebuilt {rows} balance(s) from the invoices")
+            balances = outstanding_balances(session, term, options['class_name'] or '')
+            summary = outstanding_summary(session, term)
+        except LedgerError as e:
+            raise CommandError(str(e))
+
+        if options['verbosity'] > 0:
+            for balance in balances.iterator():
+                self.stdout.write(f"{balance.class_name:<8} {balance.student_name:<40} "
+                                  f"{balance.student_id:<20} {format_currency(balance.balance):>16}")
+
+        for row in summary:
+            self.stdout.write(self.style.WARNING(
+                f"{row['class_name']}: {row['students']} student(s) owe {format_currency(row['owed'])}"
+            ))
+        total = sum((row['owed'] for row in summary), 0)
+        self.stdout.write(self.style.SUCCESS(
+            f"Total outstanding: {format_currency(total)} from {sum(row['students'] for row in summary)} student(s)"
+        ))
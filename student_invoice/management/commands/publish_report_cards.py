@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.drive_publisher import DrivePublisher, PublishError
+from student_invoice.result_index import normalize_class_name, normalize_session
+
+
+class Command(BaseCommand):
+    help = 'Upload rendered report cards into the Drive term/class folders (only changed files are sent)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', required=True, help='Term number: 1, 2 or 3')
+        parser.add_argument('--session', required=True, help="Session, e.g. '2025/2026'")
+        parser.add_argument('--class', dest='class_names', action='append',
+                            help='Class to publish, e.g. JSS1 (repeatable; default: every rendered class)')
+        parser.add_argument('--source', help='Rendered tree (default: settings.REPORT_CARD_RENDER_DIR)')
+        parser.add_argument('--workers', type=int, default=8, help='Parallel uploads (default: 8)')
+
+    def handle(self, *args, **options):
+        from student_invoice.drive_service import GoogleDriveService
+
+        term = str(options['term']).strip()
+        session = normalize_session(options['session'])
+        if term not in ('1', '2', '3') or not session:
+            raise CommandError("Use --term 1/2/3 and --session like 2025/2026")
+
+        class_names = None
+        if options['class_names']:
+            class_names = [normalize_class_name(name) for name in options['class_names']]
+            if not all(class_names):
+                raise CommandError(f"Unknown class in: {', '.join(options['class_names'])}")
+
+        drive = GoogleDriveService(scopes=GoogleDriveService.PUBLISH_SCOPES)
+        publisher = DrivePublisher(drive, max_workers=max(1, options['workers']), log=self.stdout.write)
+        try:
+            summary = publisher.publish(
+                options['source'] or settings.REPORT_CARD_RENDER_DIR, term, session, class_names
+            )
+        except PublishError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['created']} created, {summary['updated']} updated, {summary['unchanged']} unchanged, "
+            f"{summary['failed']} failed; {summary['bytes'] / 1024 / 1024:.2f} MB sent "
+            f"with {summary.get('retries', 0)} retried chunk(s) in {summary.get('seconds', 0)}s"
+        ))
+        if summary['failed']:
+            raise CommandError(f"{summary['failed']} report card(s) failed to upload; run again to retry them")
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.models import ReportCard
+from student_invoice.report_pdf import RENDERER_VERSION, render_job, report_filename, term_folder_name
+from student_invoice.result_index import normalize_class_name, normalize_session
+
+MANIFEST_NAME = '.render_manifest.json'
+
+
+def content_hash(report):
+    """Changes whenever the card would render differently"""
+    payload = json.dumps([RENDERER_VERSION, report.class_name, report.data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path) as manifest_file:
+            return json.load(manifest_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    tmp_path = f"{path}.part"
+    with open(tmp_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class Command(BaseCommand):
+    help = 'Render stored report cards to vector PDFs in a term/class folder tree, in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', required=True, help='Term number: 1, 2 or 3')
+        parser.add_argument('--session', required=True, help="Session, e.g. '2025/2026'")
+        parser.add_argument('--class', dest='class_name', help='Class, e.g. JSS1 or SS2 (default: every class)')
+        parser.add_argument('--output', help='Output root (default: settings.REPORT_CARD_RENDER_DIR)')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Re-render every card, even unchanged ones')
+
+    def handle(self, *args, **options):
+        term = str(options['term']).strip()
+        session = normalize_session(options['session'])
+        if term not in ('1', '2', '3') or not session:
+            raise CommandError("Use --term 1/2/3 and --session like 2025/2026")
+
+        reports = ReportCard.objects.filter(session=session, term=term).order_by('class_name', 'student_name')
+        if options['class_name']:
+            class_name = normalize_class_name(options['class_name'])
+            if not class_name:
+                raise CommandError(f"Unknown class: {options['class_name']}")
+            reports = reports.filter(class_name=class_name)
+
+        output_root = Path(options['output'] or settings.REPORT_CARD_RENDER_DIR)
+        term_dir = output_root / term_folder_name(term, session)
+
+        # Same layout the Drive tree uses: <term folder>/<class folder>/<student>.pdf
+        jobs, manifests, seen, skipped = [], {}, {}, 0
+        for report in reports.iterator():
+            class_dir = term_dir / report.class_name
+            if class_dir not in manifests:
+                manifests[class_dir] = load_manifest(class_dir / MANIFEST_NAME)
+                seen[class_dir] = set()
+            manifest = manifests[class_dir]
+
+            key = str(report.pk)
+            seen[class_dir].add(key)
+            digest = content_hash(report)
+            path = class_dir / report_filename(report.student_name, report.student_id)
+            entry = manifest.get(key)
+            if (not options['force'] and entry and entry['hash'] == digest
+                    and entry['file'] == path.name and path.exists()):
+                skipped += 1
+                continue
+
+            if entry and entry['file'] != path.name:
+                # Student renamed (or given an ID): drop the card under the old name
+                (class_dir / entry['file']).unlink(missing_ok=True)
+            jobs.append({
+                'report_id': key,
+                'data': report.data,
+                'class_name': report.class_name,
+                'path': str(path),
+                'hash': digest,
+            })
+
+        rendered = failed = total_bytes = 0
+        start = time.perf_counter()
+        if jobs:
+            workers = min(options['workers'] or os.cpu_count() or 1, len(jobs))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(render_job, job): job for job in jobs}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    path = Path(job['path'])
+                    try:
+                        _, _, size = future.result()
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f"❌ {path.name}: {str(e)}")
+                        continue
+                    rendered += 1
+                    total_bytes += size
+                    manifests[path.parent][job['report_id']] = {'hash': job['hash'], 'file': path.name}
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f"📄 {path.parent.name}/{path.name} ({size / 1024:.1f} KB)")
+
+        for class_dir, manifest in manifests.items():
+            # Reports deleted from the store since the last run
+            for key in set(manifest) - seen[class_dir]:
+                (class_dir / manifest.pop(key)['file']).unlink(missing_ok=True)
+            class_dir.mkdir(parents=True, exist_ok=True)
+            save_manifest(class_dir / MANIFEST_NAME, manifest)
+
+        elapsed = time.perf_counter() - start
+        average_kb = total_bytes / rendered / 1024 if rendered else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{term_dir}: {rendered} rendered, {skipped} unchanged, {failed} failed "
+            f"in {elapsed:.1f}s (avg {average_kb:.1f} KB per card)"
+        ))
@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from student_invoice.id_filter import check_student_id, known_ids, known_short_ids
+from student_invoice.student_ids import ALPHABET
+
+
+def random_short_id(rng):
+    return f"{rng.choice(range(2018, 2031))}-{''.join(rng.choices(ALPHABET, k=3))}"
+
+
+class Command(BaseCommand):
+    help = 'Build the known student ID Bloom filter and report its memory, false positive rate and check speed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--probes', type=int, default=100000,
+                            help='Unknown IDs used to measure the false positive rate (default: 100000)')
+        parser.add_argument('--seed', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        known_ids.refresh()
+        stats = known_ids.stats()
+        if not stats['built']:
+            self.stderr.write("❌ The filter could not be built (see the warning above)")
+            return
+
+        self.stdout.write(f"Known IDs:           {stats['ids']} (capacity {stats['capacity']})")
+        self.stdout.write(f"Memory:              {stats['memory_bytes']:,} bytes "
+                          f"({stats['bits']:,} bits, {stats['hash_count']} hashes)")
+        self.stdout.write(f"Build time:          {stats['build_seconds'] * 1000:.1f} ms")
+        self.stdout.write(f"Bits set:            {stats['fill_ratio']:.2%}")
+        self.stdout.write(f"Target FP rate:      {stats['target_error_rate']:.4%}")
+        self.stdout.write(f"Estimated FP rate:   {stats['estimated_error_rate']:.4%}")
+
+        # Measured rate: random IDs that are certainly not known, and how many the filter lets through
+        rng = random.Random(options['seed'])
+        known = known_short_ids()
+        bloom = known_ids.bloom
+        probes = 0
+        false_positives = 0
+        while probes < options['probes']:
+            short_id = random_short_id(rng)
+            if short_id in known:
+                continue
+            probes += 1
+            false_positives += short_id in bloom
+        self.stdout.write(f"Measured FP rate:    {false_positives / probes:.4%} "
+                          f"({false_positives}/{probes} unknown IDs let through)")
+
+        samples = [
+            ('malformed', ['HELLO', 'EMFHS-25-A7K', '<script>', 'x' * 40]),
+            ('unknown', [f"EMFHS-{random_short_id(rng)}-AB" for _ in range(4)]),
+            ('known', [f"EMFHS-{short_id}-AB" for short_id in list(known)[:4]] or ['EMFHS-2025-A7K-B9']),
+        ]
+        for label, student_ids in samples:
+            rounds = 20000
+            start = time.perf_counter()
+            for i in range(rounds):
+                check_student_id(student_ids[i % len(student_ids)], refresh=False)
+            per_check = (time.perf_counter() - start) * 1e6 / rounds
+            self.stdout.write(f"Check ({label + ' ID'}):{'':<{11 - len(label)}}{per_check:.2f} µs")
+
+        if not stats['authoritative']:
+            self.stdout.write(self.style.WARNING(
+                "Change tracking has not been started (manage.py sync_drive_changes) or some folders "
+                "are not indexed (see manage.py sync_result_index), so unknown IDs are still searched in Drive"
+            ))
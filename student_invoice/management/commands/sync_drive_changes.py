@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.result_index import start_change_tracking, sync_changes
+
+
+class Command(BaseCommand):
+    help = 'Apply Drive changes since the last run to the local result index (incremental sync)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true',
+                            help='Keep running and poll for changes every --interval seconds')
+        parser.add_argument('--interval', type=int, default=30,
+                            help='Seconds between polls in --watch mode (default: 30)')
+        parser.add_argument('--reset', action='store_true',
+                            help='Take a new start page token and rebuild the index from scratch')
+
+    def handle(self, *args, **options):
+        from student_invoice.drive_service import drive_service
+
+        if options['reset']:
+            self._start(drive_service)
+
+        while True:
+            try:
+                summary = sync_changes(drive_service, log=self.stdout.write)
+            except Exception as e:
+                if not options['watch']:
+                    raise CommandError(f"Incremental sync failed: {str(e)}")
+                self.stderr.write(f"❌ Incremental sync failed: {str(e)}")
+                summary = {}
+
+            if summary is None:
+                self.stdout.write("No saved page token - running a full sync first")
+                self._start(drive_service)
+            elif summary.get('changes'):
+                self.stdout.write(self.style.SUCCESS(
+                    f"Applied {summary['changes']} change(s): {summary['pdf']} PDF(s), "
+                    f"{summary['folder']} folder(s), {summary['removed']} removed, "
+                    f"{summary['skipped']} outside the result tree"
+                ))
+
+            if not options['watch']:
+                break
+            time.sleep(options['interval'])
+
+    def _start(self, drive_service):
+        try:
+            summary = start_change_tracking(drive_service, log=self.stdout.write)
+        except Exception as e:
+            raise CommandError(f"Full sync failed: {str(e)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {summary['pdfs']} PDF(s) in {summary['class_folders']} class folder(s); "
+            f"change tracking started"
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.result_index import sync_result_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the local index of term/class folders and report card PDFs from Google Drive'
+
+    def handle(self, *args, **options):
+        from student_invoice.drive_service import drive_service
+
+        try:
+            summary = sync_result_index(drive_service, log=self.stdout.write)
+        except Exception as e:
+            raise CommandError(f"Result index sync failed: {str(e)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {summary['pdfs']} PDF(s) in {summary['class_folders']} class folder(s) "
+            f"across {summary['term_folders']} term folder(s)"
+        ))
+        if summary['skipped_folders']:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {len(summary['skipped_folders'])} folder(s) with unrecognised names"
+            ))
+        if summary['incomplete_folders']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(summary['incomplete_folders'])} folder(s) hold folders that are not indexed; "
+                f"their classes are searched in Drive"
+            ))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from student_invoice.pdf_cache import pdf_cache
+
+
+class Command(BaseCommand):
+    help = 'Prefetch every report card PDF of a class folder into the local PDF cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', required=True, help='Term number: 1, 2 or 3')
+        parser.add_argument('--session', required=True, help="Session, e.g. '2025/2026'")
+        parser.add_argument('--class', dest='class_name', required=True, help='Class, e.g. JSS1 or SS2')
+
+    def handle(self, *args, **options):
+        from student_invoice.drive_service import drive_service
+
+        term, session, class_name = options['term'], options['session'], options['class_name']
+        try:
+            folder_id = drive_service.find_class_folder(term, session, class_name)
+        except Exception as e:
+            raise CommandError(f"Class folder not found: {str(e)}")
+
+        query = f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false"
+        pdfs = drive_service.list_files(query, "id, name, md5Checksum", label='cache_warmup')
+
+        fetched = cached = failed = 0
+        for pdf in pdfs:
+            md5_checksum = pdf.get('md5Checksum', '')
+            if pdf_cache.get(pdf['id'], md5_checksum):
+                cached += 1
+                continue
+            try:
+                path = pdf_cache.store(pdf['id'], md5_checksum, drive_service.iter_file_content(pdf['id']))
+            except Exception as e:
+                self.stderr.write(f"❌ {pdf['name']}: {str(e)}")
+                failed += 1
+                continue
+            if path:
+                fetched += 1
+                self.stdout.write(f"📥 {pdf['name']}")
+            else:
+                failed += 1
+                self.stderr.write(f"❌ {pdf['name']}: checksum mismatch, not cached")
+
+        files, total_bytes = pdf_cache.usage()
+        self.stdout.write(self.style.SUCCESS(
+            f"{class_name} Term {term} {session}: {fetched} fetched, {cached} already cached, {failed} failed. "
+            f"Cache holds {files} PDF(s), {total_bytes / 1024 ** 2:.1f} MB"
+        ))
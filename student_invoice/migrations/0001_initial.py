@@ -0,0 +1,66 @@
+# Generated by Django 4.2.13 on 2026-10-18 12:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriveFolder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('drive_id', models.CharField(max_length=128, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('parent_id', models.CharField(blank=True, db_index=True, max_length=128)),
+                ('kind', models.CharField(choices=[('term', 'Term folder'), ('class', 'Class folder')], max_length=10)),
+                ('session', models.CharField(blank=True, max_length=9)),
+                ('term', models.CharField(blank=True, max_length=1)),
+                ('class_name', models.CharField(blank=True, max_length=10)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['session', 'term', 'class_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportCardFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('drive_id', models.CharField(max_length=128, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('session', models.CharField(max_length=9)),
+                ('term', models.CharField(max_length=1)),
+                ('class_name', models.CharField(max_length=10)),
+                ('student_id', models.CharField(blank=True, max_length=32)),
+                ('short_id', models.CharField(blank=True, max_length=16)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('md5_checksum', models.CharField(blank=True, max_length=32)),
+                ('modified_time', models.DateTimeField(blank=True, null=True)),
+                ('web_view_link', models.URLField(blank=True, max_length=500)),
+                ('web_content_link', models.URLField(blank=True, max_length=500)),
+                ('folder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_cards', to='student_invoice.drivefolder')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='drivefolder',
+            index=models.Index(fields=['kind', 'session', 'term', 'class_name'], name='student_inv_kind_8a27ea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportcardfile',
+            index=models.Index(fields=['folder', 'short_id'], name='student_inv_folder__e8280b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportcardfile',
+            index=models.Index(fields=['session', 'term', 'class_name', 'short_id'], name='student_inv_session_295474_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.13 on 2026-10-18 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_invoice', '0002_drivesyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('class_name', models.CharField(max_length=10)),
+                ('session', models.CharField(blank=True, max_length=9)),
+                ('term', models.CharField(blank=True, max_length=1)),
+                ('student_name', models.CharField(max_length=255)),
+                ('student_id', models.CharField(blank=True, max_length=32)),
+                ('client_id', models.CharField(blank=True, db_index=True, max_length=255)),
+                ('data', models.JSONField(default=dict)),
+                ('subject_count', models.PositiveSmallIntegerField(default=0)),
+                ('total_obtained', models.CharField(blank=True, max_length=20)),
+                ('total_obtainable', models.CharField(blank=True, max_length=20)),
+                ('result', models.CharField(blank=True, max_length=10)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+                'indexes': [models.Index(fields=['class_name', '-updated_at'], name='student_inv_class_n_b3c7ad_idx'), models.Index(fields=['session', 'term', 'class_name', 'student_id'], name='student_inv_session_06edd0_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reportcard',
+            constraint=models.UniqueConstraint(fields=('class_name', 'session', 'term', 'student_name'), name='unique_report_card_per_student'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.13 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_invoice', '0003_reportcard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.CharField(max_length=20, unique=True)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('sequence', models.PositiveIntegerField(blank=True, null=True)),
+                ('name', models.CharField(max_length=255)),
+                ('class_name', models.CharField(blank=True, max_length=20)),
+                ('admission_date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['year', 'class_name', 'name'], name='student_inv_year_e1f318_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='studentrecord',
+            constraint=models.UniqueConstraint(fields=('year', 'sequence'), name='unique_student_id_sequence'),
+        ),
+    ]
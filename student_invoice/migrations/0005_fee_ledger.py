@@ -0,0 +1,107 @@
+# Generated by Django 4.2.13 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_invoice', '0004_student_id_registry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session', models.CharField(max_length=9)),
+                ('term', models.CharField(max_length=1)),
+                ('class_name', models.CharField(max_length=10)),
+                ('student_name', models.CharField(max_length=255)),
+                ('student_id', models.CharField(blank=True, max_length=32)),
+                ('billed', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['class_name', 'student_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Invoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('term_bill', 'Term bill'), ('term_end_account', 'Term-end account')], default='term_bill', max_length=20)),
+                ('session', models.CharField(max_length=9)),
+                ('term', models.CharField(max_length=1)),
+                ('class_name', models.CharField(max_length=10)),
+                ('student_name', models.CharField(max_length=255)),
+                ('student_id', models.CharField(blank=True, max_length=32)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('late_fee', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('bank_details', models.JSONField(blank=True, default=dict)),
+                ('payment_notes', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['class_name', 'student_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('paid_on', models.DateField()),
+                ('method', models.CharField(blank=True, max_length=30)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='student_invoice.invoice')),
+            ],
+            options={
+                'ordering': ['-paid_on', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InvoiceItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('description', models.CharField(max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='student_invoice.invoice')),
+            ],
+            options={
+                'ordering': ['invoice', 'position'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['session', 'term', 'class_name', 'student_id'], name='student_inv_session_263242_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('session', 'term', 'class_name', 'student_name', 'kind'), name='unique_invoice_per_student'),
+        ),
+        migrations.AddIndex(
+            model_name='feebalance',
+            index=models.Index(fields=['session', 'term', 'class_name', 'student_id'], name='student_inv_session_58676d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feebalance',
+            index=models.Index(condition=models.Q(('balance__gt', 0)), fields=['session', 'term', 'class_name', 'balance'], name='fee_balance_outstanding'),
+        ),
+        migrations.AddConstraint(
+            model_name='feebalance',
+            constraint=models.UniqueConstraint(fields=('session', 'term', 'class_name', 'student_name'), name='unique_fee_balance_per_student'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['invoice', 'paid_on'], name='student_inv_invoice_bf5965_idx'),
+        ),
+    ]
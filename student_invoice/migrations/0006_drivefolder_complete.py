@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-18 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_invoice', '0005_fee_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drivefolder',
+            name='complete',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -1,3 +1,265 @@
 from django.db import models
 
 # Create your models here.
+
+
+class DriveFolder(models.Model):
+    """Term or class folder of the "Emilia Report Card" Drive tree"""
+    KIND_TERM = 'term'
+    KIND_CLASS = 'class'
+    KIND_CHOICES = [
+        (KIND_TERM, 'Term folder'),
+        (KIND_CLASS, 'Class folder'),
+    ]
+
+    drive_id = models.CharField(max_length=128, unique=True)
+    name = models.CharField(max_length=255)
+    parent_id = models.CharField(max_length=128, blank=True, db_index=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    session = models.CharField(max_length=9, blank=True)
+    term = models.CharField(max_length=1, blank=True)
+    class_name = models.CharField(max_length=10, blank=True)
+    # False when the folder holds folders the index does not walk (arm folders
+    # such as SS1/SS1A, or names like 'Senior Secondary One'), so searches go to Drive
+    complete = models.BooleanField(default=True)
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['session', 'term', 'class_name']
+        indexes = [
+            models.Index(fields=['kind', 'session', 'term', 'class_name']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ReportCardFile(models.Model):
+    """Report card PDF in a class folder, keyed by the student ID in its filename"""
+    drive_id = models.CharField(max_length=128, unique=True)
+    name = models.CharField(max_length=255)
+    folder = models.ForeignKey(DriveFolder, on_delete=models.CASCADE, related_name='report_cards')
+    session = models.CharField(max_length=9)
+    term = models.CharField(max_length=1)
+    class_name = models.CharField(max_length=10)
+    student_id = models.CharField(max_length=32, blank=True)
+    short_id = models.CharField(max_length=16, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    md5_checksum = models.CharField(max_length=32, blank=True)
+    modified_time = models.DateTimeField(null=True, blank=True)
+    web_view_link = models.URLField(max_length=500, blank=True)
+    web_content_link = models.URLField(max_length=500, blank=True)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['folder', 'short_id']),
+            models.Index(fields=['session', 'term', 'class_name', 'short_id']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def as_file_info(self):
+        """Same shape as the Drive metadata returned by GoogleDriveService"""
+        file_info = {
+            'id': self.drive_id,
+            'name': self.name,
+            'size': str(self.size) if self.size is not None else None,
+            'modifiedTime': self.modified_time.isoformat() if self.modified_time else '',
+        }
+        if self.web_view_link:
+            file_info['webViewLink'] = self.web_view_link
+        if self.web_content_link:
+            file_info['webContentLink'] = self.web_content_link
+        return file_info
+
+
+class DriveSyncState(models.Model):
+    """Saved Drive changes page token, so a sync only fetches what changed since the last run"""
+    name = models.CharField(max_length=50, unique=True)
+    page_token = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.page_token}"
+
+
+class ReportCard(models.Model):
+    """
+    Report card being written on an exam result page (replaces the per-browser
+    localStorage arrays). `data` is the page's report document, unchanged;
+    the summary fields are copied out of it so lists never load the documents.
+    """
+    class_name = models.CharField(max_length=10)
+    session = models.CharField(max_length=9, blank=True)
+    term = models.CharField(max_length=1, blank=True)
+    student_name = models.CharField(max_length=255)
+    student_id = models.CharField(max_length=32, blank=True)
+    client_id = models.CharField(max_length=255, blank=True, db_index=True)
+    data = models.JSONField(default=dict)
+    subject_count = models.PositiveSmallIntegerField(default=0)
+    total_obtained = models.CharField(max_length=20, blank=True)
+    total_obtainable = models.CharField(max_length=20, blank=True)
+    result = models.CharField(max_length=10, blank=True)
+    version = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['class_name', 'session', 'term', 'student_name'],
+                                    name='unique_report_card_per_student'),
+        ]
+        indexes = [
+            models.Index(fields=['class_name', '-updated_at']),
+            models.Index(fields=['session', 'term', 'class_name', 'student_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.class_name} {self.student_name}"
+
+
+class StudentIdSequence(models.Model):
+    """Last sequence number handed out for an enrollment year (see student_ids.py)"""
+    year = models.PositiveSmallIntegerField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+
+
+class StudentRecord(models.Model):
+    """
+    A student ID issued by the school: the server-side registry that replaces
+    the student ID maker's per-browser list. IDs imported from browsers keep
+    their (random) checksum; `sequence` is null for them.
+    """
+    student_id = models.CharField(max_length=20, unique=True)
+    year = models.PositiveSmallIntegerField()
+    sequence = models.PositiveIntegerField(null=True, blank=True)
+    name = models.CharField(max_length=255)
+    class_name = models.CharField(max_length=20, blank=True)
+    admission_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'sequence'], name='unique_student_id_sequence'),
+        ]
+        indexes = [
+            models.Index(fields=['year', 'class_name', 'name']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} {self.name}"
+
+
+class Invoice(models.Model):
+    """
+    Term bill or term-end account issued to one student (see fee_ledger.py)
+    `total` is the sum of the items; `amount_paid` is kept up to date by each
+    recorded payment, so neither needs the items or payments to be read.
+    """
+    KIND_TERM_BILL = 'term_bill'
+    KIND_TERM_END_ACCOUNT = 'term_end_account'
+    KIND_CHOICES = [(KIND_TERM_BILL, 'Term bill'), (KIND_TERM_END_ACCOUNT, 'Term-end account')]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=KIND_TERM_BILL)
+    session = models.CharField(max_length=9)
+    term = models.CharField(max_length=1)
+    class_name = models.CharField(max_length=10)
+    student_name = models.CharField(max_length=255)
+    student_id = models.CharField(max_length=32, blank=True)
+    due_date = models.DateField(null=True, blank=True)
+    late_fee = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    amount_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    bank_details = models.JSONField(default=dict, blank=True)
+    payment_notes = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['class_name', 'student_name']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'term', 'class_name', 'student_name', 'kind'],
+                                    name='unique_invoice_per_student'),
+        ]
+        indexes = [
+            models.Index(fields=['session', 'term', 'class_name', 'student_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.class_name} {self.student_name}"
+
+    @property
+    def balance(self):
+        return self.total - self.amount_paid
+
+
+class InvoiceItem(models.Model):
+    """One fee line of an invoice, in the order it is printed"""
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='items')
+    position = models.PositiveSmallIntegerField()
+    description = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        ordering = ['invoice', 'position']
+
+    def __str__(self):
+        return f"{self.description}: {self.amount}"
+
+
+class Payment(models.Model):
+    """Money received against an invoice"""
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='payments')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    paid_on = models.DateField()
+    method = models.CharField(max_length=30, blank=True)
+    reference = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-paid_on', '-id']
+        indexes = [
+            models.Index(fields=['invoice', 'paid_on']),
+        ]
+
+    def __str__(self):
+        return f"{self.amount} for {self.invoice}"
+
+
+class FeeBalance(models.Model):
+    """
+    What one student owes for a term, across all their invoices: a running
+    total updated by every invoice save and payment, so "who still owes" is one
+    indexed query (the partial index only holds rows with something owing)
+    """
+    session = models.CharField(max_length=9)
+    term = models.CharField(max_length=1)
+    class_name = models.CharField(max_length=10)
+    student_name = models.CharField(max_length=255)
+    student_id = models.CharField(max_length=32, blank=True)
+    billed = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['class_name', 'student_name']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'term', 'class_name', 'student_name'],
+                                    name='unique_fee_balance_per_student'),
+        ]
+        indexes = [
+            models.Index(fields=['session', 'term', 'class_name', 'student_id']),
+            models.Index(fields=['session', 'term', 'class_name', 'balance'],
+                         condition=models.Q(balance__gt=0), name='fee_balance_outstanding'),
+        ]
+
+    def __str__(self):
+        return f"{self.class_name} {self.student_name}: {self.balance}"
@@ -0,0 +1,138 @@
+# pdf_cache.py - ON-DISK, SIZE-BOUNDED CACHE OF DOWNLOADED REPORT CARD PDFS
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+
+class PdfBlobCache:
+    """
+    Content-addressed PDF store: one file per (Drive file ID, md5Checksum)
+    A new md5 (corrected report card) is a new key, so stale copies are never served.
+    File mtimes record last use; once the cache is over max_bytes the least
+    recently used PDFs are deleted.
+
+    Each process keeps a running total of the bytes in the cache, so a fill
+    costs nothing extra until the total passes max_bytes. Only then (or when
+    the total is older than rescan_interval seconds, to pick up what other
+    workers added) is the directory scanned.
+    """
+
+    def __init__(self, root=None, max_bytes=None, rescan_interval=5 * 60):
+        self.root = Path(root or getattr(settings, 'REPORT_CARD_CACHE_DIR',
+                                         Path(settings.BASE_DIR) / 'report_card_cache'))
+        self.max_bytes = max_bytes or getattr(settings, 'REPORT_CARD_CACHE_MAX_BYTES', 2 * 1024 ** 3)
+        self.rescan_interval = rescan_interval
+        self._evict_lock = threading.Lock()
+        self._total = None  # Bytes in the cache as of the last scan plus what this process added since
+        self._scanned_at = 0.0
+        self.scans = 0
+
+    def path_for(self, file_id, md5_checksum):
+        key = hashlib.sha256(f"{file_id}:{md5_checksum}".encode()).hexdigest()
+        return self.root / key[:2] / f"{key}.pdf"
+
+    def get(self, file_id, md5_checksum):
+        """Path of the cached PDF (and mark it as recently used), or None"""
+        if not md5_checksum:
+            return None
+        path = self.path_for(file_id, md5_checksum)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def tee(self, file_id, md5_checksum, chunks):
+        """
+        Pass chunks through unchanged while writing them to the cache
+        The copy is kept only if the stream completes and its md5 matches Drive's
+        """
+        if not md5_checksum:
+            yield from chunks
+            return
+
+        path = self.path_for(file_id, md5_checksum)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.part')
+        digest = hashlib.md5()
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in chunks:
+                    tmp_file.write(chunk)
+                    digest.update(chunk)
+                    yield chunk
+            complete = digest.hexdigest() == md5_checksum
+            if complete:
+                size = os.path.getsize(tmp_path)
+                os.replace(tmp_path, path)
+        finally:
+            if not complete:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+        if complete:
+            self._added(size)
+
+    def _added(self, size):
+        """Count a new PDF; scan and evict only when the running total says the cache is full"""
+        with self._evict_lock:
+            stale = time.monotonic() - self._scanned_at > self.rescan_interval
+            if self._total is not None and not stale:
+                self._total += size
+                if self._total <= self.max_bytes:
+                    return
+        self.evict()
+
+    def store(self, file_id, md5_checksum, chunks):
+        """Download chunks straight into the cache, returns the cached path or None"""
+        for _ in self.tee(file_id, md5_checksum, chunks):
+            pass
+        return self.get(file_id, md5_checksum)
+
+    def usage(self):
+        """(file count, total bytes) currently in the cache"""
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def evict(self):
+        """Delete least recently used PDFs until the cache fits in max_bytes"""
+        with self._evict_lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            if total > self.max_bytes:
+                for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    removed += 1
+            self._total = total
+            self._scanned_at = time.monotonic()
+            return removed
+
+    def _entries(self):
+        self.scans += 1
+        entries = []
+        if not self.root.exists():
+            return entries
+        for path in self.root.glob('*/*.pdf'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+
+pdf_cache = PdfBlobCache()
@@ -0,0 +1,148 @@
+# report_pdf.py - VECTOR PDF REPORT CARDS FROM SAVED REPORT DATA (NO BROWSER NEEDED)
+"""
+Draw a report card with reportlab from the document the exam result pages save
+(studentName, subjects, totals, remarks, ...; see report_store.py)
+
+Text and table lines stay vectors, so a card is a few KB instead of the
+multi-MB screenshot html2canvas + jsPDF produce. Nothing here touches Django,
+so render_job() can run in worker processes.
+"""
+import os
+import re
+import tempfile
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+SCHOOL_NAME = 'EMILIA – FOREMOST HIGH SCHOOL'
+TERM_NAMES = {'1': 'FIRST TERM', '2': 'SECOND TERM', '3': 'THIRD TERM'}
+SUBJECT_COLUMNS = ['SUBJECT', 'TEST 1', 'TEST 2', 'EXAM', 'TOTAL', 'CLASS-AVE', 'GRADE', 'REMARKS']
+UNSAFE_FILENAME_CHARACTERS = re.compile(r'[\\/:*?"<>|\s]+')
+
+# Bump when the layout changes so incremental runs re-render every card
+RENDERER_VERSION = 1
+
+
+def term_folder_name(term, session):
+    """'FIRST TERM 2025-2026': a name GoogleDriveService.find_term_folder() recognises"""
+    return f"{TERM_NAMES.get(str(term), f'TERM {term}')} {session.replace('/', '-')}"
+
+
+def report_filename(student_name, student_id=''):
+    """'ADA OBI EMFHS-2025-A7K-B9.pdf': the student ID is what searches match on"""
+    parts = [student_name.strip().upper(), student_id.strip().upper()]
+    stem = UNSAFE_FILENAME_CHARACTERS.sub(' ', ' '.join(part for part in parts if part)).strip()
+    return f"{stem or 'UNTITLED REPORT'}.pdf"
+
+
+def _text(value):
+    return str(value if value is not None else '').strip()
+
+
+def _field(pdf, x, y, label, value, width):
+    """LABEL ........ value, like the underlined fields on the page"""
+    pdf.setFont('Helvetica-Bold', 8)
+    pdf.drawString(x, y, label)
+    label_width = pdf.stringWidth(label, 'Helvetica-Bold', 8) + 2 * mm
+    pdf.setDash(1, 2)
+    pdf.line(x + label_width, y - 1, x + width, y - 1)
+    pdf.setDash()
+    pdf.setFont('Helvetica-Bold', 9)
+    pdf.drawString(x + label_width + 1 * mm, y + 0.5, _text(value).upper()[:60])
+
+
+def draw_report_card(pdf, data, class_name):
+    """Draw one report card on the current page of a reportlab canvas"""
+    page_width, page_height = A4
+    left, right = 15 * mm, page_width - 15 * mm
+    width = right - left
+    y = page_height - 20 * mm
+
+    pdf.setFont('Helvetica-Bold', 18)
+    pdf.drawCentredString(page_width / 2, y, SCHOOL_NAME)
+    y -= 7 * mm
+    pdf.setFont('Helvetica-Bold', 11)
+    pdf.drawCentredString(page_width / 2, y, _text(data.get('reportTitle')) or 'Report Sheet')
+    y -= 12 * mm
+
+    half = width / 2 - 3 * mm
+    rows = [
+        [('REPORT FOR', data.get('reportFor')), ('TERM OF', data.get('termOf'))],
+        [('NAME (SURNAME FIRST)', data.get('studentName')), ('SEX', data.get('studentSex'))],
+        [('CLASS', class_name), ('STUDENT ID', data.get('studentId'))],
+        [('NUMBER OF TIMES PRESENT', data.get('timesPresent')), ('TIMES ABSENT', data.get('timesAbsent'))],
+        [('PERCENTAGE', data.get('percentageValue')), ('RESULT', data.get('resultValue'))],
+    ]
+    for (left_label, left_value), (right_label, right_value) in rows:
+        _field(pdf, left, y, left_label, left_value, half)
+        _field(pdf, left + half + 6 * mm, y, right_label, right_value, half)
+        y -= 8 * mm
+
+    subjects = [subject for subject in data.get('subjects') or [] if isinstance(subject, dict)]
+    table_rows = [SUBJECT_COLUMNS] + [
+        [_text(subject.get(key)).upper() for key in ('name', 'test1', 'test2', 'exam', 'total', 'classAve', 'grade', 'remark')]
+        for subject in subjects
+    ]
+    table_rows.append(['TOTAL', '', '', '', _text(data.get('totalMarksObtained')), '', '', ''])
+
+    table = Table(
+        table_rows,
+        colWidths=[width * share for share in (0.28, 0.08, 0.08, 0.08, 0.09, 0.11, 0.08, 0.20)],
+        rowHeights=6.5 * mm,
+    )
+    table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.6, colors.black),
+        ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 8),
+        ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
+        ('FONT', (0, -1), (-1, -1), 'Helvetica-Bold', 8),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e5e7eb')),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('SPAN', (0, -1), (3, -1)),
+    ]))
+    _, table_height = table.wrapOn(pdf, width, y)
+    y -= table_height
+    table.drawOn(pdf, left, y)
+    y -= 10 * mm
+
+    _field(pdf, left, y, 'TOTAL MARKS OBTAINED', data.get('totalMarksObtained'), half)
+    _field(pdf, left + half + 6 * mm, y, 'TOTAL MARKS OBTAINABLE', data.get('totalMarksObtainable'), half)
+    y -= 10 * mm
+    _field(pdf, left, y, "CLASS TEACHER'S REMARKS", data.get('teacherRemarks'), width)
+    y -= 10 * mm
+    _field(pdf, left, y, "PRINCIPAL'S REMARKS", data.get('principalRemarks'), width)
+    y -= 10 * mm
+    if _text(data.get('tuitionFees')):
+        _field(pdf, left, y, 'SCHOOL FEES FOR NEXT TERM', data.get('tuitionFees'), half)
+
+
+def render_report_card(data, class_name, path):
+    """Write one report card PDF to path (atomically: readers never see half a file)"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    os.close(fd)
+    try:
+        pdf = canvas.Canvas(tmp_path, pagesize=A4, pageCompression=1)
+        pdf.setTitle(f"{_text(data.get('studentName'))} - {class_name} Report Card")
+        pdf.setAuthor(SCHOOL_NAME)
+        draw_report_card(pdf, data, class_name)
+        pdf.showPage()
+        pdf.save()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+
+def render_job(job):
+    """
+    ProcessPoolExecutor entry point
+    job: {'report_id', 'data', 'class_name', 'path'} -> (report_id, path, size)
+    """
+    size = render_report_card(job['data'], job['class_name'], job['path'])
+    return job['report_id'], job['path'], size
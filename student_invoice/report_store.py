@@ -0,0 +1,223 @@
+# report_store.py - SERVER-SIDE STORE FOR REPORT CARDS WRITTEN ON THE EXAM RESULT PAGES
+"""
+Saving, patching and importing ReportCard documents
+
+The exam result pages build one report document per student (studentName,
+subjects, remarks, ...). A full save upserts it by (class, session, term, name),
+the same "update instead of duplicate" rule the pages used in localStorage.
+Autosaves send only what changed:
+
+    {"version": 4, "changes": {"timesPresent": "58", "subjects.2.exam": "41"}}
+
+Keys are dotted paths into the document; numeric parts index lists.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ReportCard
+from .result_index import normalize_class_name, normalize_session, parse_term
+
+UNTITLED_REPORT = 'Untitled Report'
+
+
+class ReportStoreError(ValueError):
+    """The report document or patch is malformed"""
+
+
+class VersionConflict(Exception):
+    """The report changed on the server since the client last loaded it"""
+
+    def __init__(self, report):
+        super().__init__(f"Report {report.pk} is at version {report.version}")
+        self.report = report
+
+
+class DuplicateReport(Exception):
+    """Another report already exists for this student in the same class, session and term"""
+
+
+def _identity(class_name, data):
+    """Canonical (class, session, term, student name) of a report document"""
+    clean_class = normalize_class_name(class_name or data.get('classType', ''))
+    if not clean_class:
+        raise ReportStoreError("Unknown class (expected JSS1-JSS3 or SS1-SS3)")
+
+    header = f"{data.get('reportFor', '')} {data.get('termOf', '')}"
+    student_name = str(data.get('studentName') or '').strip() or UNTITLED_REPORT
+    return clean_class, normalize_session(header), parse_term(header), student_name[:255]
+
+
+def _apply_document(report, data):
+    """Copy a document and its identity/summary fields onto a ReportCard"""
+    if not isinstance(data, dict):
+        raise ReportStoreError("Report data must be an object")
+
+    report.class_name, report.session, report.term, report.student_name = _identity(report.class_name, data)
+    report.student_id = str(data.get('studentId') or '')[:32]
+    report.data = data
+    subjects = data.get('subjects')
+    report.subject_count = len(subjects) if isinstance(subjects, list) else 0
+    report.total_obtained = str(data.get('totalMarksObtained') or '')[:20]
+    report.total_obtainable = str(data.get('totalMarksObtainable') or '')[:20]
+    report.result = str(data.get('resultValue') or '')[:10]
+
+
+def apply_patch(document, changes):
+    """Return a copy of document with every dotted path in changes set to its value"""
+    if not isinstance(changes, dict):
+        raise ReportStoreError("'changes' must be an object of path -> value")
+
+    document = dict(document)
+    for path, value in changes.items():
+        parts = str(path).split('.')
+        if not all(parts):
+            raise ReportStoreError(f"Invalid path: {path!r}")
+
+        target = document
+        for depth, part in enumerate(parts):
+            last = depth == len(parts) - 1
+            if isinstance(target, list):
+                if not part.isdigit() or int(part) > len(target):
+                    raise ReportStoreError(f"Invalid list index in path: {path!r}")
+                index = int(part)
+                if index == len(target):
+                    target.append(None if last else {})
+                if last:
+                    target[index] = value
+                else:
+                    target[index] = _copy_container(target[index])
+                    target = target[index]
+            elif isinstance(target, dict):
+                if last:
+                    target[part] = value
+                else:
+                    target[part] = _copy_container(target.get(part, {}))
+                    target = target[part]
+            else:
+                raise ReportStoreError(f"Path goes through a value: {path!r}")
+    return document
+
+
+def _copy_container(value):
+    # Copy-on-write so a failed patch never leaves the stored document half-changed
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+def save_report(class_name, data, client_id=''):
+    """Create or replace the report for this student (class, session, term, name)"""
+    report = ReportCard(class_name=class_name, client_id=client_id)
+    _apply_document(report, data)
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                existing = ReportCard.objects.select_for_update().filter(
+                    class_name=report.class_name,
+                    session=report.session,
+                    term=report.term,
+                    student_name=report.student_name,
+                ).first()
+                if existing:
+                    _apply_document(existing, data)
+                    existing.version += 1
+                    existing.save()
+                    return existing, False
+                report.save()
+                return report, True
+        except IntegrityError:
+            # Two first saves for the same student raced; the retry updates the winner
+            if attempt:
+                raise
+            report.pk = None
+
+
+def patch_report(report_id, version, changes):
+    """Apply a delta to one report; raises VersionConflict if version is stale"""
+    try:
+        with transaction.atomic():
+            report = ReportCard.objects.select_for_update().get(pk=report_id)
+            if version is not None and int(version) != report.version:
+                raise VersionConflict(report)
+            _apply_document(report, apply_patch(report.data, changes))
+            report.version += 1
+            report.save()
+            return report
+    except IntegrityError:
+        # The patch renamed the student to one that already has a report
+        raise DuplicateReport("A report for this student already exists")
+
+
+def import_reports(class_name, entries, batch_size=500):
+    """
+    Bulk import a localStorage dump: the array saved under savedReports_<CLASS>
+    Entries ({id, name, date, data}) are upserted by student; for duplicates
+    within the dump, the last one wins, as it did in localStorage.
+    Returns (created, updated)
+    """
+    if not isinstance(entries, list):
+        raise ReportStoreError("'reports' must be the saved reports array")
+
+    reports = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ReportStoreError("Every saved report must be an object")
+        data = entry.get('data', entry)
+        report = ReportCard(class_name=class_name, client_id=str(entry.get('id') or '')[:255])
+        _apply_document(report, data if isinstance(data, dict) else {})
+        reports[(report.class_name, report.session, report.term, report.student_name)] = report
+
+    with transaction.atomic():
+        existing = {}
+        for clean_class in {key[0] for key in reports}:
+            for report in ReportCard.objects.filter(class_name=clean_class).only(
+                    'pk', 'class_name', 'session', 'term', 'student_name', 'version'):
+                existing[(report.class_name, report.session, report.term, report.student_name)] = report
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for key, report in reports.items():
+            current = existing.get(key)
+            if current is None:
+                to_create.append(report)
+                continue
+            report.pk = current.pk
+            report.version = current.version + 1
+            report.updated_at = now  # bulk_update() skips auto_now
+            to_update.append(report)
+
+        ReportCard.objects.bulk_create(to_create, batch_size=batch_size)
+        ReportCard.objects.bulk_update(
+            to_update,
+            ['client_id', 'student_id', 'data', 'subject_count', 'total_obtained',
+             'total_obtainable', 'result', 'version', 'updated_at'],
+            batch_size=batch_size,
+        )
+    return len(to_create), len(to_update)
+
+
+def report_summary(report):
+    """What the saved reports list shows (no document)"""
+    return {
+        'id': report.pk,
+        'name': report.student_name,
+        'class_name': report.class_name,
+        'session': report.session,
+        'term': report.term,
+        'student_id': report.student_id,
+        'subject_count': report.subject_count,
+        'total_obtained': report.total_obtained,
+        'total_obtainable': report.total_obtainable,
+        'result': report.result,
+        'version': report.version,
+        'updated_at': report.updated_at.isoformat() if report.updated_at else None,
+    }
+
+
+def report_detail(report):
+    detail = report_summary(report)
+    detail['data'] = report.data
+    return detail
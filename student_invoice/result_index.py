@@ -0,0 +1,406 @@
+# result_index.py - LOCAL INDEX OF THE "Emilia Report Card" DRIVE TREE
+import re
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .drive_listing import DriveListing
+from .folder_cache import folder_cache
+from .id_matcher import SEPARATOR_PATTERN, parse_filename_id
+from .models import DriveFolder, DriveSyncState, ReportCardFile
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+PDF_MIME_TYPE = 'application/pdf'
+
+# Term keywords, checked in priority order (years are stripped from the name first)
+TERM_PATTERNS = [
+    ('1', re.compile(r'\b(?:FIRST|1ST)\s+TERM\b|\bTERM\s*(?:1|ONE)\b')),
+    ('2', re.compile(r'\b(?:SECOND|2ND)\s+TERM\b|\bTERM\s*(?:2|TWO)\b')),
+    ('3', re.compile(r'\b(?:THIRD|3RD)\s+TERM\b|\bTERM\s*(?:3|THREE)\b')),
+    ('1', re.compile(r'\b(?:FIRST|1ST)\b|\b1\s+TERM\b')),
+    ('2', re.compile(r'\b(?:SECOND|2ND)\b|\b2\s+TERM\b')),
+    ('3', re.compile(r'\b(?:THIRD|3RD)\b|\b3\s+TERM\b')),
+]
+SESSION_PATTERN = re.compile(r'(20\d{2})\s*[-/ ]?\s*(20\d{2})')
+YEAR_PATTERN = re.compile(r'20\d{2}')
+CLASS_PATTERN = re.compile(r'(?<![A-Z])(J\s*S\s*S|S\s*S)\s*-?\s*([1-3])')
+
+
+def normalize_session(session):
+    """Normalize '2025-2026', '2025 2026' or '2025/2026' to '2025/2026'"""
+    match = SESSION_PATTERN.search(str(session).upper())
+    if not match:
+        return ''
+    return f"{match.group(1)}/{match.group(2)}"
+
+
+def normalize_class_name(class_name):
+    """Normalize 'JSS 1', 'jss1', 'SS1 REPORT' or 'SS1A' to 'JSS1' / 'SS1'"""
+    match = CLASS_PATTERN.search(str(class_name).upper())
+    if not match:
+        return ''
+    return f"{match.group(1).replace(' ', '')}{match.group(2)}"
+
+
+def parse_term(folder_name):
+    """Get the term number ('1', '2', '3') from a term folder name"""
+    name_upper = YEAR_PATTERN.sub(' ', folder_name.upper())
+    name_upper = SEPARATOR_PATTERN.sub(' ', name_upper.replace('-', ' '))
+    for term, pattern in TERM_PATTERNS:
+        if pattern.search(name_upper):
+            return term
+    return ''
+
+
+def normalize_term(term):
+    """Normalize 2, '2', '2ND TERM' or 'Second Term' to '2' ('' if there is no term)"""
+    term = str(term or '').strip()
+    return term if term in ('1', '2', '3') else parse_term(term)
+
+
+def parse_search_id(student_id):
+    """Get the short ID (YYYY-XXX) a searched student ID is indexed under"""
+    return parse_filename_id(student_id)[1]
+
+
+def _list_children(service, folder_id, query_filter, fields):
+    """List every child of a folder, following page tokens"""
+    query = f"'{folder_id}' in parents and {query_filter} and trashed=false"
+    return DriveListing(service, query, fields)
+
+
+def _report_card_from_file(pdf, folder):
+    """Build an (unsaved) ReportCardFile from Drive file metadata"""
+    student_id, short_id = parse_filename_id(pdf['name'])
+    modified_time = parse_datetime(pdf['modifiedTime']) if pdf.get('modifiedTime') else None
+    return ReportCardFile(
+        drive_id=pdf['id'],
+        name=pdf['name'],
+        folder=folder,
+        session=folder.session,
+        term=folder.term,
+        class_name=folder.class_name,
+        student_id=student_id,
+        short_id=short_id,
+        size=int(pdf['size']) if pdf.get('size') else None,
+        md5_checksum=pdf.get('md5Checksum', ''),
+        modified_time=modified_time,
+        web_view_link=pdf.get('webViewLink', ''),
+        web_content_link=pdf.get('webContentLink', ''),
+    )
+
+
+def sync_class_folder(service, folder):
+    """
+    Replace the indexed PDFs of one class folder with its current Drive contents
+    PDFs in its subfolders (e.g. SS1/SS1A) are not indexed; a folder that has
+    any is marked incomplete, so searches of the class go to Drive.
+    """
+    fields = "id, name, mimeType, size, md5Checksum, modifiedTime, webViewLink, webContentLink"
+    wanted = f"(mimeType='{PDF_MIME_TYPE}' or mimeType='{FOLDER_MIME_TYPE}')"
+    items = list(_list_children(service, folder.drive_id, wanted, fields))
+    report_cards = [
+        _report_card_from_file(pdf, folder)
+        for pdf in items if pdf.get('mimeType') != FOLDER_MIME_TYPE
+    ]
+
+    with transaction.atomic():
+        folder.report_cards.all().delete()
+        ReportCardFile.objects.filter(drive_id__in=[r.drive_id for r in report_cards]).delete()
+        ReportCardFile.objects.bulk_create(report_cards)
+        folder.complete = len(report_cards) == len(items)
+        folder.save(update_fields=['complete'])
+
+    return len(report_cards)
+
+
+def _save_term_folder(item, main_folder_id, session, term, synced_at):
+    """Insert or update a term folder row"""
+    term_folder, _ = DriveFolder.objects.update_or_create(
+        drive_id=item['id'],
+        defaults={
+            'name': item['name'],
+            'parent_id': main_folder_id,
+            'kind': DriveFolder.KIND_TERM,
+            'session': session,
+            'term': term,
+            'class_name': '',
+            'synced_at': synced_at,
+        }
+    )
+    return term_folder
+
+
+def _save_class_folder(item, term_folder, class_name, synced_at):
+    """Insert or update a class folder row (session and term come from its term folder)"""
+    class_folder, _ = DriveFolder.objects.update_or_create(
+        drive_id=item['id'],
+        defaults={
+            'name': item['name'],
+            'parent_id': term_folder.drive_id,
+            'kind': DriveFolder.KIND_CLASS,
+            'session': term_folder.session,
+            'term': term_folder.term,
+            'class_name': class_name,
+            'synced_at': synced_at,
+        }
+    )
+    return class_folder
+
+
+def sync_result_index(drive_service, log=print):
+    """
+    Walk main folder -> term folders -> class folders -> PDFs and rebuild the index
+    Returns a summary dict with folder and PDF counts
+    """
+    service = drive_service.service
+    synced_at = timezone.now()
+    summary = {'term_folders': 0, 'class_folders': 0, 'pdfs': 0, 'skipped_folders': [], 'incomplete_folders': []}
+    seen_folder_ids = []
+
+    folder_filter = f"mimeType='{FOLDER_MIME_TYPE}'"
+    for term_item in _list_children(service, drive_service.main_folder_id, folder_filter, "id, name"):
+        session = normalize_session(term_item['name'])
+        term = parse_term(term_item['name'])
+        if not session or not term:
+            log(f"⚠️  Skipping folder without session/term: '{term_item['name']}'")
+            summary['skipped_folders'].append(term_item['name'])
+            continue
+
+        term_folder = _save_term_folder(term_item, drive_service.main_folder_id, session, term, synced_at)
+        seen_folder_ids.append(term_folder.drive_id)
+        summary['term_folders'] += 1
+        log(f"📁 Term {term} {session}: '{term_item['name']}'")
+
+        term_folder.complete = True
+        for class_item in _list_children(service, term_folder.drive_id, folder_filter, "id, name"):
+            class_name = normalize_class_name(class_item['name'])
+            if not class_name:
+                log(f"⚠️  Skipping folder without class name: '{class_item['name']}'")
+                summary['skipped_folders'].append(class_item['name'])
+                term_folder.complete = False
+                continue
+
+            class_folder = _save_class_folder(class_item, term_folder, class_name, synced_at)
+            seen_folder_ids.append(class_folder.drive_id)
+            pdf_count = sync_class_folder(service, class_folder)
+            summary['class_folders'] += 1
+            summary['pdfs'] += pdf_count
+            log(f"   📄 {class_name}: {pdf_count} PDF(s)")
+            if not class_folder.complete:
+                log(f"   ⚠️  '{class_item['name']}' has subfolders; {class_name} searches go to Drive")
+                summary['incomplete_folders'].append(class_item['name'])
+
+        term_folder.save(update_fields=['complete'])
+        if not term_folder.complete:
+            summary['incomplete_folders'].append(term_item['name'])
+
+    # Folders that disappeared from Drive take their PDFs with them
+    DriveFolder.objects.exclude(drive_id__in=seen_folder_ids).delete()
+    return summary
+
+
+# ============ INCREMENTAL SYNC (DRIVE CHANGES API) ============
+CHANGES_STATE_NAME = 'drive_changes'
+CHANGE_FIELDS = (
+    "nextPageToken, newStartPageToken, changes(fileId, removed, "
+    "file(id, name, mimeType, parents, trashed, size, md5Checksum, modifiedTime, webViewLink, webContentLink))"
+)
+
+
+def _remove_from_index(file_id):
+    """Drop a file or folder (and anything indexed below it) from the index"""
+    ReportCardFile.objects.filter(drive_id=file_id).delete()
+    DriveFolder.objects.filter(parent_id=file_id).delete()
+    DriveFolder.objects.filter(drive_id=file_id).delete()
+
+
+def _apply_folder_change(service, item, main_folder_id, synced_at, log):
+    """Index, re-label or drop a folder after it was added, renamed or moved"""
+    parents = item.get('parents', [])
+
+    if main_folder_id in parents:
+        session = normalize_session(item['name'])
+        term = parse_term(item['name'])
+        if not session or not term:
+            _remove_from_index(item['id'])
+            return 'skipped'
+
+        is_new = not DriveFolder.objects.filter(drive_id=item['id']).exists()
+        term_folder = _save_term_folder(item, main_folder_id, session, term, synced_at)
+        if is_new:
+            # A folder moved into the tree arrives as one change; its contents do not
+            for class_item in _list_children(service, term_folder.drive_id, f"mimeType='{FOLDER_MIME_TYPE}'", "id, name"):
+                _apply_folder_change(service, {**class_item, 'parents': [term_folder.drive_id]},
+                                     main_folder_id, synced_at, log)
+        else:
+            DriveFolder.objects.filter(parent_id=term_folder.drive_id).update(session=session, term=term)
+            ReportCardFile.objects.filter(folder__parent_id=term_folder.drive_id).update(session=session, term=term)
+        log(f"📁 Term {term} {session}: '{item['name']}'")
+        return 'folder'
+
+    term_folder = DriveFolder.objects.filter(drive_id__in=parents, kind=DriveFolder.KIND_TERM).first()
+    class_name = normalize_class_name(item['name'])
+    if not term_folder or not class_name:
+        _remove_from_index(item['id'])
+        # An arm folder in a class, or an unrecognised one in a term: the indexed
+        # folder it sits in no longer holds every PDF (until the next full sync)
+        DriveFolder.objects.filter(drive_id__in=parents).update(complete=False)
+        return 'skipped'
+
+    is_new = not DriveFolder.objects.filter(drive_id=item['id']).exists()
+    class_folder = _save_class_folder(item, term_folder, class_name, synced_at)
+    if is_new:
+        pdf_count = sync_class_folder(service, class_folder)
+        log(f"   📄 {class_name}: {pdf_count} PDF(s)")
+    else:
+        class_folder.report_cards.update(
+            session=class_folder.session, term=class_folder.term, class_name=class_name
+        )
+    return 'folder'
+
+
+def _apply_pdf_change(item):
+    """Index a PDF that was added, renamed or moved, or drop it if it left the tree"""
+    folder = DriveFolder.objects.filter(
+        drive_id__in=item.get('parents', []), kind=DriveFolder.KIND_CLASS
+    ).first()
+    if not folder:
+        _remove_from_index(item['id'])
+        return 'skipped'
+
+    report_card = _report_card_from_file(item, folder)
+    with transaction.atomic():
+        ReportCardFile.objects.filter(drive_id=item['id']).delete()
+        report_card.save()
+    return 'pdf'
+
+
+def apply_change(service, change, main_folder_id, synced_at=None, log=print):
+    """Apply one entry of a changes.list response to the index, returns what it did"""
+    synced_at = synced_at or timezone.now()
+    item = change.get('file')
+
+    if change.get('removed') or not item or item.get('trashed'):
+        if DriveFolder.objects.filter(drive_id=change['fileId']).exists():
+            folder_cache.invalidate()
+        _remove_from_index(change['fileId'])
+        return 'removed'
+
+    if item.get('mimeType') == FOLDER_MIME_TYPE:
+        # Renamed or moved folders must not keep resolving to cached IDs
+        folder_cache.invalidate()
+        return _apply_folder_change(service, item, main_folder_id, synced_at, log)
+    if item.get('mimeType') == PDF_MIME_TYPE:
+        return _apply_pdf_change(item)
+    return 'skipped'
+
+
+def get_saved_page_token():
+    """Page token stored by the last incremental sync, or '' if there was none"""
+    state = DriveSyncState.objects.filter(name=CHANGES_STATE_NAME).first()
+    return state.page_token if state else ''
+
+
+def save_page_token(page_token):
+    DriveSyncState.objects.update_or_create(
+        name=CHANGES_STATE_NAME, defaults={'page_token': page_token}
+    )
+
+
+def index_covers_every_folder():
+    """
+    True when every report card searches can reach is indexed: change tracking
+    keeps the index current and no indexed folder holds folders it skips
+    """
+    return bool(get_saved_page_token()) and not DriveFolder.objects.filter(complete=False).exists()
+
+
+def start_change_tracking(drive_service, log=print):
+    """
+    Store a fresh startPageToken and rebuild the index once
+    The token is taken first so nothing that changes during the full sync is lost
+    """
+    service = drive_service.service
+    start_token = service.changes().getStartPageToken().execute()['startPageToken']
+    summary = sync_result_index(drive_service, log=log)
+    save_page_token(start_token)
+    return summary
+
+
+def sync_changes(drive_service, log=print):
+    """
+    Apply every Drive change since the saved page token to the index
+    Returns counts of applied changes, or None if change tracking has not been started
+    """
+    page_token = get_saved_page_token()
+    if not page_token:
+        return None
+
+    service = drive_service.service
+    synced_at = timezone.now()
+    summary = {'changes': 0, 'pdf': 0, 'folder': 0, 'removed': 0, 'skipped': 0}
+
+    while page_token:
+        results = service.changes().list(
+            pageToken=page_token,
+            fields=CHANGE_FIELDS,
+            pageSize=1000,
+            spaces='drive',
+            includeRemoved=True
+        ).execute()
+
+        for change in results.get('changes', []):
+            outcome = apply_change(service, change, drive_service.main_folder_id, synced_at, log)
+            summary['changes'] += 1
+            summary[outcome] += 1
+
+        if 'newStartPageToken' in results:
+            save_page_token(results['newStartPageToken'])
+            break
+
+        # Save progress per page so an interrupted run resumes where it stopped
+        page_token = results.get('nextPageToken')
+        if page_token:
+            save_page_token(page_token)
+
+    return summary
+
+
+def lookup_report_cards(term_number, session, class_name):
+    """
+    Candidate PDFs for a class from the index, keyed by short ID
+    Returns None when the class folder has never been indexed, or when it or
+    its term folder holds folders the index skips (see DriveFolder.complete)
+    """
+    session_key = normalize_session(session)
+    class_key = normalize_class_name(class_name)
+    term_key = str(term_number).strip()
+
+    folders = DriveFolder.objects.filter(
+        kind=DriveFolder.KIND_CLASS, session=session_key, term=term_key, class_name=class_key
+    )
+    if not folders.exists():
+        return None
+    parents = DriveFolder.objects.filter(drive_id__in=folders.values('parent_id'))
+    if folders.filter(complete=False).exists() or parents.filter(complete=False).exists():
+        return None
+    return ReportCardFile.objects.filter(folder__in=folders)
+
+
+def search_index(term_number, session, class_name, student_id):
+    """
+    Find indexed PDFs whose filename carries the student's ID
+    Returns None when the index cannot answer (class not fully indexed or unparseable ID)
+    """
+    short_id = parse_search_id(student_id)
+    if not short_id:
+        return None
+
+    report_cards = lookup_report_cards(term_number, session, class_name)
+    if report_cards is None:
+        return None
+    # The raw ID anywhere in the name also counts, as it does in a Drive search
+    return list(report_cards.filter(Q(short_id=short_id) | Q(name__icontains=student_id.strip())))
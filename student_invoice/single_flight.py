@@ -0,0 +1,105 @@
+# single_flight.py - ONE DRIVE CALL FOR MANY IDENTICAL CONCURRENT REQUESTS
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class _Call:
+    """One in-flight execution that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution
+    - threads in this process wait for the leader and share its result (or exception)
+    - with cache_alias set, processes also coordinate through a cache lock: the
+      process holding the lock runs the call and publishes the result for
+      result_ttl seconds; the others poll for it instead of calling Drive
+    Results are shared, so callers must not mutate them.
+    """
+
+    def __init__(self, cache_alias=None, lock_ttl=None, result_ttl=None, wait_timeout=None,
+                 poll_interval=0.05, prefix='single_flight'):
+        self.cache_alias = cache_alias if cache_alias is not None else getattr(settings, 'DRIVE_SINGLE_FLIGHT_CACHE', None)
+        self.lock_ttl = lock_ttl or getattr(settings, 'DRIVE_SINGLE_FLIGHT_LOCK_TTL', 30)
+        self.result_ttl = result_ttl or getattr(settings, 'DRIVE_SINGLE_FLIGHT_RESULT_TTL', 5)
+        self.wait_timeout = wait_timeout or self.lock_ttl
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'remote_hits': 0, 'lock_timeouts': 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """Return func(*args, **kwargs), sharing the execution with identical in-flight calls"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats['hits'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.cache_alias:
+                call.result = self._do_across_processes(key, func, args, kwargs)
+            else:
+                self._count('misses')
+                call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _do_across_processes(self, key, func, args, kwargs):
+        cache = caches[self.cache_alias]
+        lock_key = f"{self.prefix}:lock:{key}"
+        result_key = f"{self.prefix}:result:{key}"
+
+        deadline = time.monotonic() + self.wait_timeout
+        token = uuid.uuid4().hex
+        while True:
+            published = cache.get(result_key)
+            if published is not None:
+                self._count('remote_hits')
+                return published
+
+            if cache.add(lock_key, token, timeout=self.lock_ttl):
+                try:
+                    self._count('misses')
+                    result = func(*args, **kwargs)
+                    cache.set(result_key, result, timeout=self.result_ttl)
+                    return result
+                finally:
+                    if cache.get(lock_key) == token:
+                        cache.delete(lock_key)
+
+            if time.monotonic() >= deadline:
+                # The lock holder is stuck or died: stop waiting and call Drive ourselves
+                self._count('lock_timeouts')
+                self._count('misses')
+                return func(*args, **kwargs)
+            time.sleep(self.poll_interval)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
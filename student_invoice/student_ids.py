@@ -0,0 +1,270 @@
+# student_ids.py - SERVER-SIDE STUDENT ID ALLOCATION: EMFHS-YYYY-XXX-XX
+"""
+Issue student IDs from one atomic per-year sequence instead of per-browser counters
+
+    EMFHS-2027-K7Q-M3
+          |    |   +-- checksum of year + code (2 characters)
+          |    +------ sequence number, scrambled into 3 characters
+          +----------- enrollment year
+
+The code is an affine permutation of the sequence number, so codes look random
+but two sequence numbers can never produce the same code. The checksum is a
+polynomial hash mod the prime 1021: it catches every single mistyped character
+and every swap of two neighbouring characters, and drive_service checks it
+before searching Drive.
+"""
+import re
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Max, Min
+
+from .models import StudentIdSequence, StudentRecord
+
+PREFIX = 'EMFHS'
+# Same characters the student ID maker used: no 0/O or 1/I
+ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+CODE_LENGTH = 3
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH  # 32,768 IDs per enrollment year
+
+# code = (sequence * MULTIPLIER + OFFSET) mod CODE_SPACE; an odd multiplier makes it a bijection
+CODE_MULTIPLIER = 20021
+CODE_OFFSET = 7919
+
+CHECKSUM_MODULUS = 1021  # Prime, and < 32 * 32 so it fits in two characters
+_CHECK_VALUES = {char: value for value, char in enumerate('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')}
+
+STUDENT_ID_PATTERN = re.compile(rf'^{PREFIX}-(\d{{4}})-([{ALPHABET}]{{3}})-([{ALPHABET}]{{2}})$')
+
+
+class StudentIdError(ValueError):
+    """Bad allocation request (year, count or names)"""
+
+
+def encode_sequence(sequence):
+    """Sequence number (1 .. CODE_SPACE) -> 3-character code"""
+    if not 1 <= sequence <= CODE_SPACE:
+        raise StudentIdError(f"Sequence {sequence} is outside 1-{CODE_SPACE}")
+    value = (sequence * CODE_MULTIPLIER + CODE_OFFSET) % CODE_SPACE
+    code = ''
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        code = ALPHABET[digit] + code
+    return code
+
+
+def checksum(year, code):
+    """Two check characters for year + code"""
+    value = 0
+    for char in f"{year}{code}":
+        value = (value * 37 + _CHECK_VALUES[char]) % CHECKSUM_MODULUS
+    return ALPHABET[value // len(ALPHABET)] + ALPHABET[value % len(ALPHABET)]
+
+
+def format_student_id(year, sequence):
+    code = encode_sequence(sequence)
+    return f"{PREFIX}-{year}-{code}-{checksum(year, code)}"
+
+
+def parse_student_id(student_id):
+    """(year, code, check) of a well-formed ID, else None"""
+    match = STUDENT_ID_PATTERN.match(str(student_id or '').strip().upper())
+    if not match:
+        return None
+    return int(match.group(1)), match.group(2), match.group(3)
+
+
+def has_valid_checksum(student_id):
+    parts = parse_student_id(student_id)
+    return parts is not None and checksum(parts[0], parts[1]) == parts[2]
+
+
+def checksum_from_year():
+    """
+    First enrollment year whose IDs must carry a server checksum, or None (check nothing)
+    STUDENT_ID_CHECKSUM_FROM_YEAR when set; otherwise the first year the allocator
+    issued IDs, moved past the last year with browser-minted IDs registered
+    (register_existing_ids), since those checksums are random.
+    """
+    configured = getattr(settings, 'STUDENT_ID_CHECKSUM_FROM_YEAR', None)
+    if configured:
+        return int(configured)
+    first_issued = StudentIdSequence.objects.filter(last_value__gt=0).aggregate(year=Min('year'))['year']
+    if first_issued is None:
+        return None
+    last_imported = StudentRecord.objects.filter(sequence__isnull=True).aggregate(year=Max('year'))['year']
+    return first_issued if last_imported is None else max(first_issued, last_imported + 1)
+
+
+def fails_checksum(student_id, from_year):
+    """
+    True only for an ID that should carry a server checksum and does not
+    IDs from years before from_year (see checksum_from_year) were minted in
+    browsers with random checksums, so they (and other formats) are never rejected here.
+    """
+    parts = parse_student_id(student_id)
+    if parts is None or from_year is None or parts[0] < from_year:
+        return False
+    return checksum(parts[0], parts[1]) != parts[2]
+
+
+def _validate_year(year):
+    try:
+        year = int(year)
+    except (TypeError, ValueError):
+        raise StudentIdError("Enrollment year must be a number")
+    if not 2000 <= year <= 9999:
+        raise StudentIdError("Enrollment year must be between 2000 and 9999")
+    return year
+
+
+def _reserve(year, count):
+    """Atomically take the next `count` sequence numbers for a year; returns the first"""
+    with transaction.atomic():
+        updated = StudentIdSequence.objects.filter(year=year).update(last_value=F('last_value') + count)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    StudentIdSequence.objects.create(year=year, last_value=count)
+                return 1
+            except IntegrityError:
+                # Another request created the year's row first
+                StudentIdSequence.objects.filter(year=year).update(last_value=F('last_value') + count)
+        last_value = StudentIdSequence.objects.get(year=year).last_value
+        if last_value > CODE_SPACE:
+            # Raised inside the transaction, so the counter is not moved
+            raise StudentIdError(f"All {CODE_SPACE} IDs for {year} have been issued")
+    return last_value - count + 1
+
+
+def _lock_year(year):
+    """
+    Hold the year's sequence row until the transaction ends, so two intakes
+    for the same year cannot both miss a name in the duplicate check
+    """
+    StudentIdSequence.objects.get_or_create(year=year)
+    if connection.features.has_select_for_update:
+        StudentIdSequence.objects.select_for_update().get(year=year)
+    else:
+        # SQLite has no FOR UPDATE; a write takes its database lock instead
+        StudentIdSequence.objects.filter(year=year).update(last_value=F('last_value'))
+
+
+def allocate_ids(year, names, class_name='', admission_date=None):
+    """
+    Issue IDs for a list of names (one request for a whole intake)
+    A name already registered for the same year and class is not issued a second
+    ID; its existing record comes back with created=False, as the page's duplicate
+    check did. Returns [(record, created)] in the order of names.
+    """
+    year = _validate_year(year)
+    if not isinstance(names, list) or not names:
+        raise StudentIdError("'names' must be a non-empty list")
+    if len(names) > settings.STUDENT_ID_BULK_LIMIT:
+        raise StudentIdError(f"At most {settings.STUDENT_ID_BULK_LIMIT} names per request")
+
+    clean_names = [' '.join(str(name or '').split())[:255] for name in names]
+    if not all(clean_names):
+        raise StudentIdError("Student names cannot be blank")
+    class_name = str(class_name or '').strip()[:20]
+
+    with transaction.atomic():
+        _lock_year(year)
+        return _allocate(year, clean_names, class_name, admission_date)
+
+
+def _allocate(year, clean_names, class_name, admission_date):
+    existing = {}
+    for record in StudentRecord.objects.filter(year=year, class_name=class_name):
+        existing.setdefault(record.name.lower(), record)
+
+    results, pending = [], []
+    for name in clean_names:
+        record = existing.get(name.lower())
+        if record is None:
+            record = StudentRecord(year=year, name=name, class_name=class_name, admission_date=admission_date)
+            existing[name.lower()] = record
+            pending.append(record)
+            results.append((record, True))
+        else:
+            results.append((record, False))
+
+    while pending:
+        first = _reserve(year, len(pending))
+        for offset, record in enumerate(pending):
+            record.sequence = first + offset
+            record.student_id = format_student_id(year, record.sequence)
+
+        # Skip codes already taken by IDs imported from browsers
+        taken = set(StudentRecord.objects.filter(
+            student_id__in=[record.student_id for record in pending]
+        ).values_list('student_id', flat=True))
+        ready = [record for record in pending if record.student_id not in taken]
+        StudentRecord.objects.bulk_create(ready)
+        pending = [record for record in pending if record.student_id in taken]
+
+    return results
+
+
+def register_existing_ids(entries):
+    """
+    Record IDs the student ID maker already issued in a browser, so the
+    allocator never hands out the same ID. entries: [{id, name, class, year, dateObj}]
+    Returns (registered, already_known)
+    """
+    if not isinstance(entries, list):
+        raise StudentIdError("'students' must be the saved students array")
+
+    max_length = StudentRecord._meta.get_field('student_id').max_length
+    records = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise StudentIdError("Every saved student must be an object")
+        student_id = str(entry.get('id') or '').strip().upper()
+        if len(student_id) > max_length:
+            raise StudentIdError(f"Student ID {student_id!r} is longer than {max_length} characters")
+        if not student_id or student_id in records:
+            continue
+        try:
+            year = _validate_year(entry.get('year'))
+        except StudentIdError:
+            parts = parse_student_id(student_id)
+            if parts is None:
+                continue
+            year = parts[0]
+        records[student_id] = StudentRecord(
+            student_id=student_id,
+            year=year,
+            name=' '.join(str(entry.get('name') or '').split())[:255] or student_id,
+            class_name=str(entry.get('class') or '').strip()[:20],
+            admission_date=_parse_date(entry.get('dateObj')),
+        )
+
+    known = set(StudentRecord.objects.filter(student_id__in=list(records)).values_list('student_id', flat=True))
+    new_records = [record for student_id, record in records.items() if student_id not in known]
+    StudentRecord.objects.bulk_create(new_records, batch_size=500, ignore_conflicts=True)
+    return len(new_records), len(known)
+
+
+def _parse_date(value):
+    from django.utils.dateparse import parse_date
+
+    try:
+        return parse_date(str(value or '')[:10])
+    except ValueError:
+        return None
+
+
+def student_record_json(record, created=None):
+    """Same fields the student ID maker keeps for each student"""
+    data = {
+        'id': record.student_id,
+        'name': record.name,
+        'class': record.class_name,
+        'year': str(record.year),
+        'dateObj': record.admission_date.isoformat() if record.admission_date else '',
+        'timestamp': record.created_at.isoformat() if record.created_at else '',
+    }
+    if created is not None:
+        data['created'] = created
+    return data
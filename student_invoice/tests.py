@@ -1,3 +1,1345 @@
-from django.test import TestCase
+import hashlib
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from . import id_filter, views
+from .billing import amount_in_words, build_invoice, csv_row, load_roster, load_schedule, number_to_words
+from .broadsheet import Broadsheet, BroadsheetError
+from .deep_search import SubfolderSearch
+from .drive_publisher import DrivePublisher, PublishError
+from .downloads import (
+    RangeNotSatisfiable, allow_downloads, build_download_response, get_download_metadata, parse_range_header,
+)
+from .drive_service import DriveFileNotFound, FolderNotFound, GoogleDriveService
+from .drive_transport import PooledHttp
+from .fake_drive import FakeDrive, matches_query
+from .fake_drive_server import FakeDriveServer
+from .fee_ledger import delete_invoice, delete_payment, rebuild_balances, record_payment, save_invoice
+from .file_metadata import FileMetadataCache
+from .folder_cache import FolderCache
+from .folder_snapshot import FolderSnapshotStore
+from .grading import competition_rank
+from .id_filter import KnownIdFilter, check_student_id
+from .id_matcher import StudentIdMatcher, normalize_name
+from .management.commands.benchmark_id_matcher import legacy_matches, synthetic_filename, synthetic_id
+from .models import DriveFolder, FeeBalance, Invoice, Payment, ReportCard, ReportCardFile, StudentIdSequence, StudentRecord
+from .pdf_cache import PdfBlobCache
+from .report_pdf import term_folder_name
+from .single_flight import SingleFlight
+from .result_index import search_index, start_change_tracking, sync_changes, sync_result_index
+from .student_ids import (
+    CODE_SPACE, StudentIdError, allocate_ids, checksum_from_year, fails_checksum, format_student_id,
+    register_existing_ids,
+)
+
+
+# ============ STAFF API ACCESS ============
+class StaffApiTestCase(TestCase):
+    """Anonymous, logged-in non-staff and staff clients, the staff one enforcing CSRF"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('teacher', password='pass', is_staff=True)
+        cls.parent = User.objects.create_user('parent', password='pass')
+
+    def setUp(self):
+        self.anonymous = Client()
+        self.non_staff = Client()
+        self.non_staff.force_login(self.parent)
+        self.staff_client = Client(enforce_csrf_checks=True)
+        self.staff_client.force_login(self.staff)
+
+    def csrf_token(self):
+        """A CSRF token for staff_client, as the pages get it from the csrftoken cookie"""
+        self.staff_client.get('/api/report-cards/')
+        return self.staff_client.cookies['csrftoken'].value
+
+    def assertDenied(self, url, method='get', **kwargs):
+        self.assertEqual(getattr(self.anonymous, method)(url, **kwargs).status_code, 401)
+        self.assertEqual(getattr(self.non_staff, method)(url, **kwargs).status_code, 403)
+
+
+class ReportCardApiAccessTests(StaffApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report = ReportCard.objects.create(class_name='JSS1', student_name='ADA OBI', data={'subjects': []})
+
+    def test_anonymous_and_non_staff_cannot_read_or_delete(self):
+        self.assertDenied('/api/report-cards/')
+        self.assertDenied('/api/report-cards/?class_name=JSS1', method='delete')
+        self.assertDenied(f'/api/report-cards/{self.report.pk}/')
+        self.assertDenied(f'/api/report-cards/{self.report.pk}/', method='delete')
+        self.assertDenied('/api/report-cards/import/', method='post', data={}, content_type='application/json')
+        self.assertTrue(ReportCard.objects.filter(pk=self.report.pk).exists())
+
+    def test_staff_can_read(self):
+        response = self.staff_client.get('/api/report-cards/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_staff_writes_need_the_csrf_token(self):
+        url = f'/api/report-cards/{self.report.pk}/'
+        self.assertEqual(self.staff_client.delete(url).status_code, 403)
+        self.assertTrue(ReportCard.objects.filter(pk=self.report.pk).exists())
+
+        response = self.staff_client.delete(url, HTTP_X_CSRFTOKEN=self.csrf_token())
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ReportCard.objects.filter(pk=self.report.pk).exists())
+
+    def test_a_payload_that_is_not_an_object_is_a_bad_request(self):
+        token = self.csrf_token()
+        for method, url in (('post', '/api/report-cards/'), ('patch', f'/api/report-cards/{self.report.pk}/'),
+                            ('post', '/api/report-cards/import/')):
+            response = getattr(self.staff_client, method)(url, [1], content_type='application/json',
+                                                          HTTP_X_CSRFTOKEN=token)
+            self.assertEqual(response.status_code, 400, url)
+        self.assertEqual(ReportCard.objects.count(), 1)
+
+
+class StudentIdApiAccessTests(StaffApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.record = StudentRecord.objects.create(student_id='EMFHS-2025-A7K-B9', year=2025, name='ADA OBI')
+
+    def test_anonymous_and_non_staff_cannot_list_import_or_delete(self):
+        self.assertDenied('/api/student-ids/')
+        self.assertDenied('/api/student-ids/', method='post', data={'year': 2025, 'names': ['BOLA ADE']},
+                          content_type='application/json')
+        self.assertDenied('/api/student-ids/import/', method='post', data={'students': []},
+                          content_type='application/json')
+        self.assertDenied(f'/api/student-ids/{self.record.student_id}/')
+        self.assertDenied(f'/api/student-ids/{self.record.student_id}/', method='delete')
+        self.assertEqual(list(StudentRecord.objects.values_list('student_id', flat=True)), [self.record.student_id])
+
+    def test_staff_can_list(self):
+        response = self.staff_client.get('/api/student-ids/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([student['id'] for student in response.json()['students']],
+                         [self.record.student_id])
+
+    def test_a_payload_that_is_not_an_object_is_a_bad_request(self):
+        token = self.csrf_token()
+        for url in ('/api/student-ids/', '/api/student-ids/import/'):
+            response = self.staff_client.post(url, [1], content_type='application/json', HTTP_X_CSRFTOKEN=token)
+            self.assertEqual(response.status_code, 400, url)
+
+
+class FeeLedgerApiAccessTests(StaffApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.invoice = Invoice.objects.create(session='2025/2026', term='1', class_name='JSS1', student_name='ADA OBI',
+                                              total=50000)
+
+    def test_anonymous_and_non_staff_cannot_read_or_write(self):
+        self.assertDenied('/api/fees/invoices/')
+        self.assertDenied('/api/fees/invoices/', method='post', data={}, content_type='application/json')
+        self.assertDenied(f'/api/fees/invoices/{self.invoice.pk}/')
+        self.assertDenied(f'/api/fees/invoices/{self.invoice.pk}/', method='delete')
+        self.assertDenied('/api/fees/payments/', method='post', data={'invoice_id': self.invoice.pk, 'amount': '100'},
+                          content_type='application/json')
+        self.assertDenied('/api/fees/payments/1/', method='delete')
+        self.assertDenied('/api/fees/outstanding/?session=2025/2026&term=1')
+        self.assertTrue(Invoice.objects.filter(pk=self.invoice.pk).exists())
+        self.assertFalse(Payment.objects.exists())
+
+    def test_staff_can_read(self):
+        response = self.staff_client.get('/api/fees/invoices/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+
+class FeeLedgerApiTests(StaffApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.invoice, _ = save_invoice('term_bill', '2025/2026', '2ND TERM', 'JSS 1', 'Ada Obi',
+                                       items=[('TUITION FEE/TERM', 47000)])
+
+    def post(self, url, data):
+        return self.staff_client.post(url, data, content_type='application/json', HTTP_X_CSRFTOKEN=self.csrf_token())
+
+    def test_filters_match_the_stored_session_term_and_class(self):
+        for query in ('session=2025-2026', 'term=2nd term', 'term=2', 'class_name=jss 1',
+                      'session=2025/2026&term=2ND TERM&class_name=JSS1'):
+            response = self.staff_client.get(f'/api/fees/invoices/?{query}')
+            self.assertEqual(response.json()['count'], 1, query)
+        self.assertEqual(self.staff_client.get('/api/fees/invoices/?term=3').json()['count'], 0)
+
+    def test_a_payload_that_is_not_an_object_is_a_bad_request(self):
+        self.assertEqual(self.post('/api/fees/invoices/', [1]).status_code, 400)
+        self.assertEqual(self.post('/api/fees/payments/', [1]).status_code, 400)
+
+    def test_amounts_too_large_for_the_ledger_are_a_bad_request(self):
+        for amount in ('1e30', '99999999999', '-1e12'):
+            response = self.post('/api/fees/payments/', {'invoice_id': self.invoice.pk, 'amount': amount})
+            self.assertEqual(response.status_code, 400, amount)
+            response = self.post('/api/fees/invoices/', {
+                'session': '2025/2026', 'term': '2', 'class_name': 'JSS1', 'student_name': 'BOLA ADE',
+                'items': [{'description': 'TUITION FEE/TERM', 'amount': amount}],
+            })
+            self.assertEqual(response.status_code, 400, amount)
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(Invoice.objects.count(), 1)
+
+
+class AmountInWordsTests(SimpleTestCase):
+    def test_number_to_words(self):
+        cases = {
+            0: 'Zero', 7: 'Seven', 10: 'Ten', 11: 'Eleven', 15: 'Fifteen', 19: 'Nineteen', 20: 'Twenty',
+            21: 'Twenty One', 100: 'One Hundred', 115: 'One Hundred Fifteen', 999: 'Nine Hundred Ninety Nine',
+            1000: 'One Thousand', 1001: 'One Thousand One', 1019: 'One Thousand Nineteen',
+            999999: 'Nine Hundred Ninety Nine Thousand Nine Hundred Ninety Nine',
+            1000000: 'One Million', 1000010: 'One Million Ten', 47000: 'Forty Seven Thousand',
+            2013000: 'Two Million Thirteen Thousand', 1000000000: 'One Billion',
+        }
+        for number, words in cases.items():
+            self.assertEqual(number_to_words(number), words, number)
+
+    def test_amount_in_words_drops_kobo_and_sign(self):
+        self.assertEqual(amount_in_words(Decimal('47000.99')), 'Forty Seven Thousand Naira Only')
+        self.assertEqual(amount_in_words(Decimal('-40000.00')), 'Forty Thousand Naira Only')
+        self.assertEqual(amount_in_words(Decimal('0.50')), 'Zero Naira Only')
+
+
+class BuildInvoiceTests(SimpleTestCase):
+    def setUp(self):
+        self.schedule = load_schedule({
+            'kind': 'term_bill', 'term': '2ND TERM', 'session': '2025/2026', 'due_date': '2026-01-12',
+            'items': [{'description': 'TUITION FEE/TERM', 'amount': 47000}, {'description': 'MEDICAL', 'amount': 5000}],
+            'classes': {'SS 1': [{'description': 'Tuition Fee/Term', 'amount': '52,000'}]},
+        })
+        self.student = load_roster([{'name': ' Ada  Obi ', 'class': 'ss1', 'student_id': 'emfhs-2025-a7k-b9',
+                                     'CAUTION FEE': '2500'}])[0]
+
+    def test_class_and_student_lines_replace_the_schedule(self):
+        invoice = build_invoice(self.student, self.schedule, today=date(2026, 1, 5))
+        self.assertEqual(invoice['items'], [('TUITION FEE/TERM', Decimal('52000.00')), ('MEDICAL', Decimal('5000.00')),
+                                            ('CAUTION FEE', Decimal('2500.00'))])
+        self.assertEqual(invoice['subtotal'], Decimal('59500.00'))
+        self.assertEqual(invoice['amount_in_words'], 'Fifty Nine Thousand Five Hundred Naira Only')
+        self.assertEqual(invoice['filename'],
+                         'Tuition Invoice - Ada Obi - SS1 - 2nd Term - 2025-2026 - 05-01-2026.pdf')
+
+    def test_the_late_fee_applies_only_after_the_due_date(self):
+        for today, overdue in ((date(2026, 1, 11), False), (date(2026, 1, 12), False), (date(2026, 1, 13), True)):
+            invoice = build_invoice(self.student, self.schedule, today=today)
+            self.assertEqual(invoice['overdue'], overdue, today)
+            self.assertEqual(invoice['total_with_late_fee'], Decimal('64500.00'))
+            self.assertEqual(csv_row(invoice)[8], 'YES' if overdue else 'NO')
+
+        without_due_date = load_schedule({'items': [{'description': 'TUITION FEE/TERM', 'amount': 47000}]})
+        self.assertFalse(build_invoice(self.student, without_due_date, today=date(2030, 1, 1))['overdue'])
+
+    def test_a_term_end_credit_still_carries_the_late_fee(self):
+        schedule = load_schedule({'kind': 'term_end_account', 'late_fee': 1000,
+                                  'items': [{'description': 'OVERPAYMENT', 'amount': -3000}]})
+        invoice = build_invoice({'name': 'ADA OBI', 'class': 'SS1'}, schedule, today=date(2026, 1, 5))
+        self.assertEqual(invoice['subtotal'], Decimal('-3000.00'))
+        self.assertEqual(invoice['total_with_late_fee'], Decimal('4000.00'))
+
+
+class FeeBalanceTests(TestCase):
+    key = ('2025/2026', '2ND TERM', 'JSS 1', 'ADA OBI')
+
+    def totals(self):
+        return list(FeeBalance.objects.order_by('student_name').values_list('student_name', 'billed', 'paid', 'balance'))
+
+    def assertTotals(self, billed, paid):
+        self.assertEqual(self.totals(), [('ADA OBI', Decimal(billed), Decimal(paid), Decimal(billed) - Decimal(paid))])
+        # The running totals agree with a rebuild from the invoices
+        before = self.totals()
+        rebuild_balances()
+        self.assertEqual(self.totals(), before)
+
+    def test_running_totals_follow_every_change(self):
+        invoice, created = save_invoice('term_bill', *self.key, items=[('TUITION FEE/TERM', 47000)])
+        self.assertTrue(created)
+        self.assertTotals('47000', '0')
+
+        invoice, created = save_invoice('term_bill', *self.key, items=[('TUITION FEE/TERM', 47000), ('MEDICAL', 5000)])
+        self.assertFalse(created)
+        self.assertTotals('52000', '0')
+
+        first = record_payment(invoice.pk, 20000)
+        self.assertTotals('52000', '20000')
+
+        second = record_payment(invoice.pk, '40,000')
+        self.assertTotals('52000', '60000')
+        self.assertEqual(FeeBalance.objects.get().balance, Decimal('-8000'))
+
+        delete_payment(second.pk)
+        self.assertTotals('52000', '20000')
+
+        save_invoice('term_end_account', *self.key, items=[('OVERDUE BALANCE', 3000)])
+        self.assertTotals('55000', '20000')
+
+        delete_invoice(invoice.pk)
+        self.assertTotals('3000', '0')
+        self.assertFalse(Payment.objects.filter(pk=first.pk).exists())
+
+    def test_rebuild_corrects_an_invoice_edited_outside_the_ledger(self):
+        invoice, _ = save_invoice('term_bill', *self.key, items=[('TUITION FEE/TERM', 47000)])
+        record_payment(invoice.pk, 7000)
+        Invoice.objects.filter(pk=invoice.pk).update(total=50000)
+        self.assertEqual(rebuild_balances('2025-2026', '2'), 1)
+        self.assertEqual(self.totals(), [('ADA OBI', Decimal('50000'), Decimal('7000'), Decimal('43000'))])
+
+
+class BroadsheetApiAccessTests(StaffApiTestCase):
+    url = '/api/broadsheet/?class_name=SS1&session=2025/2026&term=1'
+
+    def setUp(self):
+        super().setUp()
+        ReportCard.objects.create(class_name='SS1', session='2025/2026', term='1', student_name='ADA OBI',
+                                  student_id='EMFHS-2025-A7K-B9',
+                                  data={'subjects': [{'name': 'MATHEMATICS', 'total': 71}]})
+
+    def test_anonymous_and_non_staff_cannot_read_or_export(self):
+        self.assertDenied(self.url)
+        self.assertDenied('/api/broadsheet/', method='post', data={'subjects': [], 'students': []},
+                          content_type='application/json')
+        self.assertDenied('/api/broadsheet/export/?class_name=SS1&session=2025/2026&term=1')
+        self.assertDenied('/api/broadsheet/export/', method='post', data={'subjects': [], 'students': []},
+                          content_type='application/json')
+
+    def test_staff_can_read_and_export(self):
+        response = self.staff_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([student['name'] for student in response.json()['students']], ['ADA OBI'])
+        response = self.staff_client.get('/api/broadsheet/export/?class_name=SS1&session=2025/2026&term=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ADA OBI', b''.join(response.streaming_content).decode())
+
+
+class BroadsheetPageTests(SimpleTestCase):
+    def test_the_benchmark_page_renders_with_the_grid_script(self):
+        response = Client().get('/general/staff_broadsheet/benchmark/?students=1000&subjects=20')
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'invoice/broadsheet_benchmark.html')
+        self.assertContains(response, 'id="runButton"')
+        self.assertContains(response, '/static/js/broadsheet_grid.js')
+        self.assertIn('csrftoken', response.cookies)
+        self.assertIsNotNone(finders.find('js/broadsheet_grid.js'))
+
+    def test_the_staff_broadsheet_uses_the_same_grid(self):
+        response = Client().get('/general/staff_broadsheet/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/static/js/broadsheet_grid.js')
+
+
+class GradingApiTests(StaffApiTestCase):
+    def post(self, url, data):
+        return self.staff_client.post(url, data, content_type='application/json', HTTP_X_CSRFTOKEN=self.csrf_token())
+
+    def test_anonymous_and_non_staff_cannot_grade(self):
+        self.assertDenied('/api/grading/', method='post', data={'subjects': [], 'students': []},
+                          content_type='application/json')
+
+    def test_an_empty_class_grades_to_nothing(self):
+        for url in ('/api/grading/', '/api/broadsheet/'):
+            response = self.post(url, {'subjects': ['MATHEMATICS'], 'students': []})
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.json()['count'], 0)
+
+    def test_a_term_with_no_saved_reports_has_an_empty_broadsheet(self):
+        response = self.staff_client.get('/api/broadsheet/?class_name=SS3&session=2025/2026&term=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['students'], [])
+
+    def test_a_payload_that_is_not_an_object_is_a_bad_request(self):
+        for url in ('/api/grading/', '/api/broadsheet/'):
+            self.assertEqual(self.post(url, [1]).status_code, 400, url)
+        self.assertEqual(self.post('/api/grading/', {'subjects': ['MATHEMATICS'], 'students': [1]}).status_code, 400)
+
+
+class CompetitionRankTests(SimpleTestCase):
+    def test_ties_share_a_position_and_skip_the_next(self):
+        self.assertEqual(competition_rank([90, 80, 80, 70]).tolist(), [1, 2, 2, 4])
+        self.assertEqual(competition_rank([55.5, 55.5, 55.5]).tolist(), [1, 1, 1])
+
+    def test_nan_gets_position_zero_and_is_not_counted(self):
+        self.assertEqual(competition_rank([np.nan, 50, 70, 50]).tolist(), [0, 2, 1, 2])
+        self.assertEqual(competition_rank([np.nan, np.nan]).tolist(), [0, 0])
+
+    def test_every_column_is_ranked_on_its_own(self):
+        table = [[90, 10, np.nan], [80, np.nan, np.nan], [80, 30, 5]]
+        self.assertEqual(competition_rank(table).tolist(), [[1, 2, 0], [2, 0, 0], [2, 1, 1]])
+
+    def test_matches_counting_the_higher_scores(self):
+        rng = np.random.default_rng(2025)
+        table = rng.integers(0, 20, size=(60, 7)).astype(float)
+        table[rng.random(table.shape) < 0.2] = np.nan
+        expected = np.zeros(table.shape, dtype=int)
+        for row, column in zip(*np.nonzero(~np.isnan(table))):
+            expected[row, column] = 1 + np.sum(table[:, column] > table[row, column])
+        self.assertEqual(competition_rank(table).tolist(), expected.tolist())
+
+
+class BroadsheetTests(SimpleTestCase):
+    def setUp(self):
+        self.sheet = Broadsheet.from_payload({
+            'subjects': ['MATHEMATICS', 'ENGLISH', 'FRENCH'],
+            'students': [
+                {'id': 'A', 'name': 'ADA OBI', 'scores': {'MATHEMATICS': 71, 'ENGLISH': 40}},
+                {'id': 'B', 'name': 'CHIDI EZE', 'scores': {'MATHEMATICS': 35, 'ENGLISH': None}},
+                {'id': 'C', 'name': 'FUNKE BELLO', 'scores': {'MATHEMATICS': '71', 'ENGLISH': 90}},
+                {'id': 'D', 'name': 'SEUN OKON', 'scores': {}},
+            ],
+        })
+
+    def test_positions_follow_the_average_over_subjects_offered(self):
+        students = self.sheet.as_json()['students']
+        self.assertEqual([student['average'] for student in students], [55.5, 35.0, 80.5, None])
+        self.assertEqual([student['position'] for student in students], [2, 3, 1, None])
+        self.assertEqual([student['grade'] for student in students], ['C', 'F', 'A', '--'])
+
+    def test_subject_statistics_count_only_the_students_who_take_it(self):
+        subjects = {subject['name']: subject for subject in self.sheet.as_json()['subjects']}
+        self.assertEqual(subjects['MATHEMATICS'], {'name': 'MATHEMATICS', 'takers': 3, 'mean': 59.0,
+                                                   'min': 35.0, 'max': 71.0, 'pass_rate': 66.7})
+        self.assertEqual(subjects['ENGLISH'], {'name': 'ENGLISH', 'takers': 2, 'mean': 65.0,
+                                               'min': 40.0, 'max': 90.0, 'pass_rate': 100.0})
+        self.assertEqual(subjects['FRENCH'], {'name': 'FRENCH', 'takers': 0, 'mean': None,
+                                              'min': None, 'max': None, 'pass_rate': None})
+
+    def test_scores_outside_the_marks_are_rejected(self):
+        for score in (-1, 101, 'seventy'):
+            with self.assertRaises(BroadsheetError, msg=score):
+                Broadsheet.from_payload({'subjects': ['MATHEMATICS'],
+                                         'students': [{'name': 'ADA OBI', 'scores': {'MATHEMATICS': score}}]})
+
+
+class ClassFilesApiAccessTests(StaffApiTestCase):
+    def test_anonymous_and_non_staff_cannot_list_a_class(self):
+        self.assertDenied('/api/drive/class-files/?term=1&session=2025/2026&class=JSS1')
+        self.assertDenied('/api/drive/class-files/?file_ids=abc')
+
+    def test_staff_requests_are_validated(self):
+        # Checked before Drive is called
+        response = self.staff_client.get('/api/drive/class-files/?term=1')
+        self.assertEqual(response.status_code, 400)
+
+
+# ============ DOWNLOADS ============
+@override_settings(DRIVE_CACHE_ALIAS='default')
+class CachedDownloadTests(TransactionTestCase):
+    """Downloads served from the local PDF cache stream asynchronously (metadata read on the Drive pool)"""
+
+    def setUp(self):
+        self.content = b'%PDF-1.4 ' + bytes(range(256)) * 600
+        md5_checksum = hashlib.md5(self.content).hexdigest()
+        drive = FakeDrive()
+        self.file_id = drive.add_file('EMFHS-2025-A7K-B9.pdf', drive.add_folder('JSS1', drive.main_folder_id),
+                                      content=self.content)
+        self.other_id = drive.add_file('staff salaries.pdf', drive.main_folder_id)
+        folder = DriveFolder.objects.create(drive_id='folder-1', name='JSS1', kind=DriveFolder.KIND_CLASS,
+                                            session='2025/2026', term='1', class_name='JSS1', synced_at=timezone.now())
+        ReportCardFile.objects.create(drive_id=self.file_id, name='EMFHS-2025-A7K-B9.pdf', folder=folder,
+                                      session='2025/2026', term='1', class_name='JSS1',
+                                      size=len(self.content), md5_checksum=md5_checksum)
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache = PdfBlobCache(root=cache_dir.name)
+        self.cache.store(self.file_id, md5_checksum, [self.content])
+        for name, value in (('pdf_cache', self.cache), ('drive_service', fake_drive_service(drive))):
+            patcher = mock.patch.object(views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_whole_file_cache_hit_is_an_async_stream(self):
+        response = await views.download_pdf(RequestFactory().get('/download/', {'file_id': self.file_id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.content)
+
+    async def test_range_cache_hit_is_an_async_stream(self):
+        request = RequestFactory().get('/download/', {'file_id': self.file_id}, HTTP_RANGE='bytes=10-19')
+        response = await views.download_pdf(request)
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.content[10:20])
+
+    async def test_a_drive_file_that_is_not_a_report_card_is_not_found(self):
+        response = await views.download_pdf(RequestFactory().get('/download/', {'file_id': self.other_id}))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(DRIVE_CACHE_ALIAS='default')
+class DownloadMetadataTests(TestCase):
+    def setUp(self):
+        self.drive = FakeDrive()
+        self.class_id = self.drive.add_folder('JSS1', self.drive.main_folder_id)
+        self.file_id = self.drive.add_file('EMFHS-2025-A7K-B9.pdf', self.class_id, content=b'%PDF-1.4 first')
+        self.service = fake_drive_service(self.drive)
+        folder = DriveFolder.objects.create(drive_id=self.class_id, name='JSS1', kind=DriveFolder.KIND_CLASS,
+                                            session='2025/2026', term='1', class_name='JSS1', synced_at=timezone.now())
+        ReportCardFile.objects.create(drive_id=self.file_id, name='EMFHS-2025-A7K-B9.pdf', folder=folder,
+                                      session='2025/2026', term='1', class_name='JSS1', size=14,
+                                      md5_checksum=hashlib.md5(b'%PDF-1.4 first').hexdigest())
+
+    def test_a_card_replaced_since_the_sync_is_described_as_drive_has_it(self):
+        replacement = b'%PDF-1.4 corrected report card'
+        self.drive.replace(self.file_id, replacement)
+        metadata = get_download_metadata(self.service, self.file_id)
+        self.assertEqual(metadata['size'], len(replacement))
+        self.assertEqual(metadata['md5Checksum'], hashlib.md5(replacement).hexdigest())
+
+    def test_only_indexed_or_searched_files_can_be_downloaded(self):
+        other_id = self.drive.add_file('staff salaries.pdf', self.drive.main_folder_id)
+        with self.assertRaises(DriveFileNotFound):
+            get_download_metadata(self.service, other_id)
+
+        allow_downloads([other_id])
+        self.assertEqual(get_download_metadata(self.service, other_id)['name'], 'staff salaries.pdf')
+        self.assertEqual(get_download_metadata(self.service, self.file_id)['name'], 'EMFHS-2025-A7K-B9.pdf')
+
+
+class ParseRangeHeaderTests(SimpleTestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range_header('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=900-5000', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=-5000', 1000), (0, 999))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=1000-', 'bytes=1000-1200', 'bytes=50-10', 'bytes=-0'):
+            with self.assertRaises(RangeNotSatisfiable, msg=header):
+                parse_range_header(header, 1000)
+
+    def test_missing_malformed_and_multi_ranges_mean_the_whole_file(self):
+        for header in (None, '', 'bytes=-', 'bytes=a-b', 'items=0-10', 'bytes=0-10,20-30'):
+            self.assertIsNone(parse_range_header(header, 1000), header)
+
+
+class BuildDownloadResponseTests(SimpleTestCase):
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.metadata = {'name': 'EMFHS-2025-A7K-B9.pdf', 'size': len(self.content),
+                         'md5Checksum': hashlib.md5(self.content).hexdigest(), 'modified_time': None}
+        self.etag = f'"{self.metadata["md5Checksum"]}"'
+
+    def respond(self, **headers):
+        request = RequestFactory().get('/download/', **headers)
+        return build_download_response(request, self.metadata, lambda start, end: [self.content[start:end + 1]])
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_no_range_is_the_whole_file(self):
+        response = self.respond()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(self.body(response), self.content)
+
+    def test_a_range_is_partial_content(self):
+        response = self.respond(HTTP_RANGE='bytes=-24')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f"bytes 1000-1023/{len(self.content)}")
+        self.assertEqual(response['Content-Length'], '24')
+        self.assertEqual(self.body(response), self.content[-24:])
+
+    def test_a_range_past_the_end_is_not_satisfiable(self):
+        response = self.respond(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f"bytes */{len(self.content)}")
+
+    def test_malformed_and_multi_ranges_get_the_whole_file(self):
+        for header in ('bytes=x-y', 'bytes=0-9,20-29'):
+            response = self.respond(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 200, header)
+            self.assertEqual(self.body(response), self.content)
+
+    def test_if_none_match_revalidates_without_a_body(self):
+        self.assertEqual(self.respond(HTTP_IF_NONE_MATCH=self.etag).status_code, 304)
+        self.assertEqual(self.respond(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_if_range_resumes_only_the_same_file(self):
+        response = self.respond(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=self.etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), self.content[10:20])
+        response = self.respond(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+
+
+# ============ RESULT INDEX ============
+class ResultIndexTestCase(TestCase):
+    """A FakeDrive with one term folder: FIRST TERM 2025-2026 / JSS1 / one report card"""
+
+    def setUp(self):
+        self.drive = FakeDrive()
+        self.term_id = self.drive.add_folder('FIRST TERM 2025-2026', self.drive.main_folder_id)
+        self.jss1_id = self.drive.add_folder('JSS1', self.term_id)
+        self.pdf_id = self.drive.add_file('EMFHS-2025-A7K-B9.pdf', self.jss1_id)
+        self.silence = lambda *args: None
+
+    def search(self, class_name, student_id):
+        return search_index(1, '2025/2026', class_name, student_id)
+
+    def names(self, report_cards):
+        return sorted(report_card.name for report_card in report_cards)
+
+
+class SearchIndexCoverageTests(ResultIndexTestCase):
+    def test_a_class_with_only_pdfs_is_answered_from_the_index(self):
+        sync_result_index(self.drive, log=self.silence)
+        self.assertEqual(self.names(self.search('JSS 1', 'EMFHS-2025-A7K-B9')), ['EMFHS-2025-A7K-B9.pdf'])
+        self.assertEqual(self.search('JSS1', 'EMFHS-2025-B2C-D3'), [])
+
+    def test_a_class_with_arm_folders_is_left_to_drive(self):
+        ss1_id = self.drive.add_folder('SS1', self.term_id)
+        self.drive.add_file('EMFHS-2025-B2C-D3.pdf', ss1_id)
+        self.drive.add_file('EMFHS-2025-C3D-E4.pdf', self.drive.add_folder('SS1A', ss1_id))
+        summary = sync_result_index(self.drive, log=self.silence)
+        self.assertEqual(summary['incomplete_folders'], ['SS1'])
+        self.assertIsNone(self.search('SS1', 'EMFHS-2025-C3D-E4'))
+        self.assertIsNotNone(self.search('JSS1', 'EMFHS-2025-A7K-B9'))
+
+    def test_a_term_with_an_unrecognised_folder_is_left_to_drive(self):
+        self.drive.add_file('EMFHS-2025-B2C-D3.pdf', self.drive.add_folder('Senior Secondary One', self.term_id))
+        summary = sync_result_index(self.drive, log=self.silence)
+        self.assertEqual(summary['skipped_folders'], ['Senior Secondary One'])
+        self.assertIsNone(self.search('JSS1', 'EMFHS-2025-A7K-B9'))
+
+    def test_an_arm_folder_added_later_leaves_the_class_to_drive(self):
+        start_change_tracking(self.drive, log=self.silence)
+        self.assertIsNotNone(self.search('JSS1', 'EMFHS-2025-A7K-B9'))
+        self.drive.add_folder('JSS1A', self.jss1_id)
+        sync_changes(self.drive, log=self.silence)
+        self.assertIsNone(self.search('JSS1', 'EMFHS-2025-A7K-B9'))
+
+    def test_the_raw_id_anywhere_in_a_name_is_a_candidate(self):
+        # Parsed as 2024-ZZZ, but it still carries the searched ID
+        self.drive.add_file('EMFHS-2024-ZZZ-Q1 EMFHS-2025-B2C-D3.pdf', self.jss1_id)
+        sync_result_index(self.drive, log=self.silence)
+        self.assertEqual(self.names(self.search('JSS1', 'EMFHS-2025-B2C-D3')),
+                         ['EMFHS-2024-ZZZ-Q1 EMFHS-2025-B2C-D3.pdf'])
+
+    def test_an_unparseable_id_is_left_to_drive(self):
+        sync_result_index(self.drive, log=self.silence)
+        self.assertIsNone(self.search('JSS1', 'ADA OBI'))
+
+
+class SyncChangesTests(ResultIndexTestCase):
+    """sync_changes replays the FakeDrive change feed into the index"""
+
+    def setUp(self):
+        super().setUp()
+        start_change_tracking(self.drive, log=self.silence)
+
+    def sync(self):
+        return sync_changes(self.drive, log=self.silence)
+
+    def indexed(self, **filters):
+        return sorted(ReportCardFile.objects.filter(**filters).values_list('name', flat=True))
+
+    def test_an_added_pdf_is_indexed(self):
+        self.drive.add_file('EMFHS-2025-B2C-D3.pdf', self.jss1_id)
+        self.assertEqual(self.sync()['pdf'], 1)
+        self.assertEqual(self.names(self.search('JSS1', 'EMFHS-2025-B2C-D3')), ['EMFHS-2025-B2C-D3.pdf'])
+
+    def test_a_renamed_pdf_is_indexed_under_its_new_id(self):
+        self.drive.rename(self.pdf_id, 'EMFHS-2025-B2C-D3.pdf')
+        self.sync()
+        self.assertEqual(self.search('JSS1', 'EMFHS-2025-A7K-B9'), [])
+        self.assertEqual(self.names(self.search('JSS1', 'EMFHS-2025-B2C-D3')), ['EMFHS-2025-B2C-D3.pdf'])
+
+    def test_a_pdf_moved_out_of_the_tree_is_dropped(self):
+        self.drive.move(self.pdf_id, self.drive.add_folder('Archive', 'elsewhere'))
+        self.sync()
+        self.assertEqual(self.indexed(), [])
+
+    def test_a_pdf_moved_between_classes_follows_its_folder(self):
+        jss2_id = self.drive.add_folder('JSS2', self.term_id)
+        self.sync()
+        self.drive.move(self.pdf_id, jss2_id)
+        self.sync()
+        self.assertEqual(self.search('JSS1', 'EMFHS-2025-A7K-B9'), [])
+        self.assertEqual(self.names(self.search('JSS2', 'EMFHS-2025-A7K-B9')), ['EMFHS-2025-A7K-B9.pdf'])
+
+    def test_a_pdf_moved_into_a_class_is_indexed(self):
+        pdf_id = self.drive.add_file('EMFHS-2025-B2C-D3.pdf', 'elsewhere')
+        self.drive.move(pdf_id, self.jss1_id)
+        self.sync()
+        self.assertEqual(self.indexed(class_name='JSS1'), ['EMFHS-2025-A7K-B9.pdf', 'EMFHS-2025-B2C-D3.pdf'])
+
+    def test_a_trashed_pdf_is_dropped(self):
+        self.drive.trash(self.pdf_id)
+        self.assertEqual(self.sync()['removed'], 1)
+        self.assertEqual(self.search('JSS1', 'EMFHS-2025-A7K-B9'), [])
+
+    def test_a_trashed_class_folder_takes_its_pdfs(self):
+        self.drive.trash(self.jss1_id)
+        self.sync()
+        self.assertIsNone(self.search('JSS1', 'EMFHS-2025-A7K-B9'))
+        self.assertEqual(self.indexed(), [])
+
+    def test_a_renamed_term_folder_relabels_its_classes_and_pdfs(self):
+        self.drive.rename(self.term_id, 'SECOND TERM 2025-2026')
+        self.assertEqual(self.sync()['folder'], 1)
+        self.assertIsNone(self.search('JSS1', 'EMFHS-2025-A7K-B9'))
+        self.assertEqual(self.names(search_index(2, '2025/2026', 'JSS1', 'EMFHS-2025-A7K-B9')),
+                         ['EMFHS-2025-A7K-B9.pdf'])
+        self.assertEqual(set(DriveFolder.objects.values_list('term', flat=True)), {'2'})
+
+    def test_nothing_to_apply_keeps_the_page_token_moving(self):
+        self.assertEqual(self.sync()['changes'], 0)
+        self.drive.add_file('EMFHS-2025-B2C-D3.pdf', self.jss1_id)
+        self.assertEqual(self.sync()['changes'], 1)
+        self.assertEqual(self.sync()['changes'], 0)
+
+
+class IndexedClassSearchTests(ResultIndexTestCase):
+    """search_student_pdf for a class that is in the result index"""
+
+    def setUp(self):
+        super().setUp()
+        self.service = fake_drive_service(self.drive)
+        self.service.folder_snapshots.rebuild(self.service, log=self.silence)
+        patcher = mock.patch.object(id_filter, 'known_ids', KnownIdFilter())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def search(self, student_id):
+        with mock.patch('builtins.print'):
+            return self.service.search_student_pdf(1, '2025/2026', 'JSS1', '', student_id)
+
+    def test_an_indexed_report_card_is_found_without_drive(self):
+        sync_result_index(self.drive, log=self.silence)
+        self.drive.calls.clear()
+        self.assertEqual([pdf['id'] for pdf in self.search('EMFHS-2025-A7K-B9')], [self.pdf_id])
+        self.assertEqual(self.drive.calls, [])
+
+    def test_a_report_card_in_an_arm_folder_added_since_the_sync_is_found(self):
+        sync_result_index(self.drive, log=self.silence)
+        arm_id = self.drive.add_folder('JSS1A', self.jss1_id)
+        pdf_id = self.drive.add_file('EMFHS-2025-B2C-D3.pdf', arm_id)
+        self.assertEqual([pdf['id'] for pdf in self.search('EMFHS-2025-B2C-D3')], [pdf_id])
+
+    def test_a_report_card_in_an_indexed_arm_folder_is_found(self):
+        pdf_id = self.drive.add_file('EMFHS-2025-B2C-D3.pdf', self.drive.add_folder('JSS1A', self.jss1_id))
+        sync_result_index(self.drive, log=self.silence)
+        self.assertEqual([pdf['id'] for pdf in self.search('EMFHS-2025-B2C-D3')], [pdf_id])
+
+
+# ============ DRIVE SERVICE ============
+def fake_drive_service(drive):
+    """A GoogleDriveService on a FakeDrive, with its caches in the local 'default' cache"""
+    caches['default'].clear()
+    service = GoogleDriveService()
+    service.service = drive.service
+    service.main_folder_id = drive.main_folder_id
+    service.folder_cache = FolderCache(alias='default', prefix='test_drive_folder')
+    service.folder_snapshots = FolderSnapshotStore(cache=service.folder_cache)
+    service.subfolder_search = SubfolderSearch(workers=2, cache=service.folder_cache)
+    service.metadata_cache = FileMetadataCache(alias='default')
+    return service
+
+
+class LazyDriveClientTests(SimpleTestCase):
+    def test_the_client_is_built_on_first_use_only(self):
+        with mock.patch.object(GoogleDriveService, '_authenticate', return_value='credentials') as authenticate, \
+                mock.patch.object(GoogleDriveService, '_build_client', return_value='client') as build_client:
+            service = GoogleDriveService()
+            authenticate.assert_not_called()
+            build_client.assert_not_called()
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                clients = list(pool.map(lambda _: service.service, range(32)))
+            self.assertEqual(set(clients), {'client'})
+            authenticate.assert_called_once_with()
+            build_client.assert_called_once_with('credentials')
+
+    def test_importing_the_views_does_not_load_the_google_client_libraries(self):
+        code = ("import sys, django; django.setup(); import student_invoice.views; "
+                "print(sorted(m for m in sys.modules if m.startswith(('googleapiclient', 'google.oauth2'))))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=Path(__file__).resolve().parent.parent,
+                                env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'invoice_maker.settings'})
+        self.assertEqual(result.stdout.strip().splitlines()[-1], '[]')
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        drive = FakeDrive()
+        self.class_id = drive.add_folder('JSS1', drive.main_folder_id)
+        for name in ('EMFHS-2025-A7K-B9.pdf', 'EMFHS-2025-B2C-D4.pdf'):
+            drive.add_file(name, self.class_id)
+        self.service = fake_drive_service(drive)
+        self.release = threading.Event()
+        self.listings = []
+        list_files = self.service.list_files
+
+        def slow_list_files(*args, **kwargs):
+            self.listings.append(args)
+            self.release.wait(5)
+            return list_files(*args, **kwargs)
+
+        patcher = mock.patch.object(self.service, 'list_files', slow_list_files)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wait_for_followers(self, count):
+        for _ in range(500):
+            if self.service.single_flight.stats['hits'] >= count:
+                return
+            time.sleep(0.01)
+        self.fail(f"only {self.service.single_flight.stats['hits']} of {count} callers joined the listing")
+
+    def test_concurrent_class_listings_share_one_drive_call(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(self.service.list_class_pdfs, self.class_id) for _ in range(8)]
+            self.wait_for_followers(7)
+            self.release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(len(self.listings), 1)
+        self.assertEqual(self.service.single_flight.stats['misses'], 1)
+        self.assertEqual(sorted(pdf['name'] for pdf in results[0]),
+                         ['EMFHS-2025-A7K-B9.pdf', 'EMFHS-2025-B2C-D4.pdf'])
+        self.assertTrue(all(result is results[0] for result in results))
+
+        # Once the listing is done the next request lists Drive again
+        self.service.list_class_pdfs(self.class_id)
+        self.assertEqual(len(self.listings), 2)
+
+    def test_a_failed_listing_fails_every_waiting_caller(self):
+        flight = SingleFlight(cache_alias='')
+        release = threading.Event()
+
+        def failing_listing():
+            release.wait(5)
+            raise RuntimeError('Drive is down')
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(flight.do, 'class_pdfs:x', failing_listing) for _ in range(4)]
+            for _ in range(500):
+                if flight.stats['hits'] >= 3:
+                    break
+                time.sleep(0.01)
+            release.set()
+            for future in futures:
+                with self.assertRaisesMessage(RuntimeError, 'Drive is down'):
+                    future.result()
+        self.assertEqual(flight.stats['misses'], 1)
+
+    def test_other_processes_reuse_a_published_result(self):
+        caches['default'].clear()
+        first = SingleFlight(cache_alias='default', prefix='test_single_flight')
+        second = SingleFlight(cache_alias='default', prefix='test_single_flight')
+        self.assertEqual(first.do('class_pdfs:x', lambda: ['a.pdf']), ['a.pdf'])
+        self.assertEqual(second.do('class_pdfs:x', lambda: self.fail('listed Drive again')), ['a.pdf'])
+        self.assertEqual(second.stats['remote_hits'], 1)
+
+
+class FolderCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.cache = FolderCache(alias='default', prefix='test_folder_cache')
+
+    def test_found_and_missing_folders_are_remembered(self):
+        self.assertEqual(self.cache.get('class', '1', '2025/2026', 'JSS1'), (False, None))
+        self.cache.set('class', ('1', '2025/2026', 'jss1'), 'folder-1')
+        self.cache.set_missing('class', ('1', '2025/2026', 'SS 3'))
+        self.assertEqual(self.cache.get('class', '1', '2025/2026', 'JSS1'), (True, 'folder-1'))
+        self.assertEqual(self.cache.get('class', '1', '2025/2026', 'SS 3'), (True, None))
+
+    def test_invalidate_bumps_the_generation_and_drops_every_entry(self):
+        generation = self.cache.generation()
+        self.cache.set('term', ('1', '2025/2026'), 'term-1')
+        self.cache.set_snapshot(generation, {'folders': []})
+        self.cache.set_subtree(generation, 'term-1', ['class-1'])
+
+        self.assertEqual(self.cache.invalidate(), generation + 1)
+        self.assertEqual(self.cache.generation(), generation + 1)
+        self.assertEqual(self.cache.get('term', '1', '2025/2026'), (False, None))
+        self.assertIsNone(self.cache.get_snapshot(self.cache.generation()))
+        self.assertIsNone(self.cache.get_subtree(self.cache.generation(), 'term-1'))
+
+    def test_invalidate_after_the_generation_was_evicted_still_moves_on(self):
+        self.cache.set('term', ('1', '2025/2026'), 'term-1')
+        self.cache.cache.delete('test_folder_cache:generation')
+        self.assertEqual(self.cache.invalidate(), 2)
+        self.assertEqual(self.cache.get('term', '1', '2025/2026'), (False, None))
+
+    def test_a_renamed_class_folder_is_found_after_invalidation(self):
+        drive = FakeDrive()
+        term_id = drive.add_folder('FIRST TERM 2025-2026', drive.main_folder_id)
+        jss1_id = drive.add_folder('JSS1', term_id)
+        service = fake_drive_service(drive)
+        self.assertEqual(service.find_class_folder('1', '2025/2026', 'JSS1'), jss1_id)
+
+        drive.calls.clear()
+        self.assertEqual(service.find_class_folder('1', '2025/2026', 'JSS1'), jss1_id)
+        self.assertEqual(drive.calls, [])
+
+        drive.rename(jss1_id, 'OLD JSS1')
+        new_id = drive.add_folder('JSS1', term_id)
+        self.assertEqual(service.find_class_folder('1', '2025/2026', 'JSS1'), jss1_id)  # Still cached
+        service.folder_cache.invalidate()
+        self.assertEqual(service.find_class_folder('1', '2025/2026', 'JSS1'), new_id)
+
+
+class FolderSnapshotLookupTests(SimpleTestCase):
+    def setUp(self):
+        self.drive = FakeDrive()
+        self.term_id = self.drive.add_folder('FIRST TERM 2025-2026', self.drive.main_folder_id)
+        self.jss1_id = self.drive.add_folder('JSS 1', self.term_id)
+        self.service = fake_drive_service(self.drive)
+
+    def listings(self):
+        return [call for call in self.drive.calls if call[0] == 'files.list']
+
+    def test_folders_are_found_in_the_snapshot(self):
+        self.assertEqual(self.service.find_class_folder('1', '2025/2026', 'JSS1'), self.jss1_id)
+        self.drive.calls.clear()
+        self.service.folder_cache.invalidate()  # Forget the folder IDs; the snapshot is rebuilt once
+        self.assertEqual(self.service.find_term_folder('1', '2025-2026'), self.term_id)
+        self.assertEqual(self.service.find_class_folder('1', '2025/2026', 'jss 1'), self.jss1_id)
+        self.assertEqual(len(self.listings()), 2)  # One page of term folders, one of class folders
+
+    def test_a_miss_in_a_fresh_snapshot_is_folder_not_found_without_scanning(self):
+        self.service.find_class_folder('1', '2025/2026', 'JSS1')
+        self.drive.calls.clear()
+        with self.assertRaises(FolderNotFound):
+            self.service.find_class_folder('1', '2025/2026', 'SS3')
+        with self.assertRaises(FolderNotFound):
+            self.service.find_term_folder('3', '2025/2026')
+        self.assertEqual(self.listings(), [])
+        self.assertEqual(self.service.folder_cache.get('class', '1', '2025/2026', 'SS3'), (True, None))
+
+    def test_a_miss_in_a_stale_snapshot_rebuilds_it_from_drive(self):
+        snapshot = self.service.folder_snapshots.get_or_build(self.service, log=lambda *args: None)
+        ss3_id = self.drive.add_folder('SS3', self.term_id)  # Added by hand after the snapshot
+        snapshot.built_at -= self.service.folder_cache.negative_ttl + 1
+        self.assertEqual(self.service.find_class_folder('1', '2025/2026', 'SS3'), ss3_id)
+        self.assertIsNot(self.service.folder_snapshots.get(), snapshot)
+
+    def test_an_unavailable_snapshot_falls_back_to_scanning_folders(self):
+        with mock.patch.object(self.service.folder_snapshots, 'get_or_build', side_effect=RuntimeError('quota')):
+            self.assertEqual(self.service.find_class_folder('1', '2025/2026', 'JSS1'), self.jss1_id)
+        self.assertIn('class_folders', self.service.listing_stats)
+
+
+class FakeDriveQueryTests(SimpleTestCase):
+    def test_name_contains_matches_the_start_of_a_word_like_drive(self):
+        query = "name contains '2025-A7K'"
+        self.assertTrue(matches_query({'name': 'EMFHS-2025-A7K-B9.pdf'}, query))
+        self.assertTrue(matches_query({'name': '2025-a7k report.pdf'}, query))
+        self.assertFalse(matches_query({'name': 'EMFHS2025-A7K-B9.pdf'}, query))
+
+
+class StudentIdMatcherTests(SimpleTestCase):
+    """StudentIdMatcher against the legacy regex matchers kept in the benchmark command"""
+
+    def setUp(self):
+        rng = random.Random(2025)
+        self.ids = [synthetic_id(rng) for _ in range(400)]
+        self.filenames = [synthetic_filename(rng, student_id) for student_id in self.ids] + [
+            'EMFHS-2025-A7K-B9.pdf', 'EMFHS-2025-A7K-C3.pdf', '2025-A7K ADA OBI.pdf', 'EMFHS-2025-A7KB9.pdf',
+            'ADA OBI FIRST TERM 2025-2026.pdf', 'EMFHS-2025-001-T8 CHIDI EZE.pdf', 'XEMFHS-2025-A7K-B9X.pdf',
+        ]
+        self.search_ids = rng.sample(self.ids, 40) + ['EMFHS-2025-A7K-B9', 'EMFHS-2025-001-T8', '2025-A7K-B9']
+
+    def test_the_matcher_agrees_with_the_legacy_matchers_once_separators_are_normalized(self):
+        for search_id in self.search_ids:
+            matcher = StudentIdMatcher(search_id)
+            for name in self.filenames:
+                self.assertEqual(matcher.matches(name), legacy_matches(search_id, normalize_name(name)),
+                                 f"{search_id} / {name}")
+
+    def test_the_matcher_finds_everything_the_legacy_matchers_found(self):
+        for search_id in self.search_ids:
+            matcher = StudentIdMatcher(search_id)
+            legacy_found = {name for name in self.filenames if legacy_matches(search_id, name)}
+            self.assertLessEqual(legacy_found, {name for name in self.filenames if matcher.matches(name)}, search_id)
+
+
+class SubfolderSearchTests(SimpleTestCase):
+    def setUp(self):
+        self.drive = FakeDrive()
+        self.service = fake_drive_service(self.drive)
+        self.class_id = self.drive.add_folder('SS1', self.drive.main_folder_id)
+        self.arm_id = self.drive.add_folder('SS1A', self.class_id)
+        self.drive.add_file('EMFHS-2025-B2C-D3.pdf', self.arm_id)
+
+    def search(self, student_id):
+        return self.service.subfolder_search.search(self.service, self.class_id, student_id, include_root=False)
+
+    def test_a_name_drive_finds_needs_no_full_listing(self):
+        self.drive.add_file('EMFHS-2025-A7K-B9.pdf', self.arm_id)
+        found, stats = self.search('EMFHS-2025-A7K-B9')
+        self.assertEqual([pdf['name'] for _, pdf in found], ['EMFHS-2025-A7K-B9.pdf'])
+        self.assertEqual(stats['full_listings'], 0)
+
+    def test_a_name_drive_cannot_match_is_found_by_listing_each_subfolder(self):
+        self.drive.add_file('EMFHS2025-A7K-B9.pdf', self.arm_id)
+        found, stats = self.search('EMFHS-2025-A7K-B9')
+        self.assertEqual([pdf['name'] for _, pdf in found], ['EMFHS2025-A7K-B9.pdf'])
+        self.assertEqual(stats['full_listings'], 1)
+
+
+class ListingStatsTests(SimpleTestCase):
+    def test_counters_are_exact_under_concurrent_listings(self):
+        service = GoogleDriveService()
+        listing = mock.Mock(pages=2, files_seen=5)
+
+        def record(_):
+            for _ in range(500):
+                service._record_listing('class_pdfs', listing)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(record, range(8)))
+        self.assertEqual(service.listing_stats['class_pdfs'], {'calls': 4000, 'pages': 8000, 'files': 20000})
+
+
+# ============ PDF CACHE ============
+class PdfBlobCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache = PdfBlobCache(root=cache_dir.name, max_bytes=3000)
+
+    def fill(self, file_id, size=1000):
+        content = file_id.encode().ljust(size, b'.')
+        return self.cache.store(file_id, hashlib.md5(content).hexdigest(), [content])
+
+    def test_fills_under_the_limit_do_not_scan_the_cache(self):
+        for number in range(3):
+            self.fill(f"file-{number}")
+        self.assertEqual(self.cache.scans, 1)  # Only the first fill, to learn the starting size
+
+    def test_going_over_the_limit_evicts_the_least_recently_used(self):
+        paths = [self.fill(f"file-{number}") for number in range(3)]
+        for age, path in enumerate(reversed(paths)):
+            os.utime(path, (1000 - age, 1000 - age))  # file-0 oldest
+        self.fill('file-3')
+        self.assertEqual(self.cache.scans, 2)
+        self.assertFalse(paths[0].exists())
+        self.assertTrue(all(path.exists() for path in paths[1:]))
+        self.assertEqual(self.cache.usage()[1], 3000)
+
+    def test_a_failed_fill_is_not_counted(self):
+        with self.assertRaises(StopIteration):
+            next(iter(self.cache.tee('file-0', 'not-the-md5', [])))
+        self.assertIsNone(self.cache._total)
+
+
+# ============ STUDENT IDS ============
+class AllocateIdsTests(TestCase):
+    def test_the_year_is_locked_before_the_duplicate_check(self):
+        with CaptureQueriesContext(connection) as queries:
+            allocate_ids(2025, ['ADA OBI'], class_name='JSS1')
+        sql = [query['sql'] for query in queries.captured_queries]
+        lock = next(index for index, statement in enumerate(sql)
+                    if 'student_invoice_studentidsequence' in statement
+                    and ('FOR UPDATE' in statement or statement.startswith('UPDATE')))
+        check = next(index for index, statement in enumerate(sql)
+                     if statement.startswith('SELECT') and 'student_invoice_studentrecord' in statement)
+        self.assertLess(lock, check)
+
+    def test_a_name_already_registered_is_not_issued_a_second_id(self):
+        [(first, created)] = allocate_ids(2025, ['ADA OBI'], class_name='JSS1')
+        self.assertTrue(created)
+        [(again, created)] = allocate_ids(2025, ['ada  obi'], class_name='JSS1')
+        self.assertFalse(created)
+        self.assertEqual(again.student_id, first.student_id)
+        self.assertEqual(StudentRecord.objects.count(), 1)
+
+    def test_a_full_year_issues_nothing(self):
+        StudentIdSequence.objects.create(year=2025, last_value=CODE_SPACE)
+        with self.assertRaises(StudentIdError):
+            allocate_ids(2025, ['ADA OBI', 'BOLA ADE'])
+        self.assertFalse(StudentRecord.objects.exists())
+
+
+class RegisterExistingIdsTests(TestCase):
+    def test_ids_are_registered_once(self):
+        entries = [{'id': 'emfhs-2025-a7k-b9', 'name': 'Ada  Obi', 'class': 'JSS1', 'year': '2025'},
+                   {'id': 'EMFHS-2025-A7K-B9', 'name': 'ADA OBI'},
+                   {'id': 'EMFHS-2024-B2C-D3', 'name': 'BOLA ADE', 'dateObj': '2024-09-16T08:00:00Z'}]
+        self.assertEqual(register_existing_ids(entries), (2, 0))
+        self.assertEqual(register_existing_ids(entries), (0, 2))
+        record = StudentRecord.objects.get(student_id='EMFHS-2024-B2C-D3')
+        self.assertEqual((record.year, record.sequence, record.admission_date), (2024, None, date(2024, 9, 16)))
+
+    def test_an_id_longer_than_the_registry_stores_is_rejected(self):
+        long_id = 'EMFHS-2025-A7K-B9-EXTRA'
+        StudentRecord.objects.create(student_id=long_id[:20], year=2025, name='BOLA ADE')
+        with self.assertRaisesMessage(StudentIdError, 'longer than 20 characters'):
+            register_existing_ids([{'id': 'EMFHS-2025-C3D-E4', 'name': 'CHI EZE'}, {'id': long_id, 'name': 'ADA OBI'}])
+        self.assertEqual(StudentRecord.objects.count(), 1)
+
+
+@override_settings(STUDENT_ID_CHECKSUM_FROM_YEAR=None)
+class ChecksumCutoverTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(id_filter, 'known_ids', KnownIdFilter(max_age=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def mistyped(self, year):
+        """A server-format ID for `year` with its last check character changed"""
+        student_id = format_student_id(year, 5)
+        return student_id[:-1] + ('A' if student_id[-1] != 'A' else 'B')
+
+    def test_nothing_is_checked_before_the_allocator_issues_an_id(self):
+        StudentIdSequence.objects.create(year=2026, last_value=0)  # Locked for an intake that issued nothing
+        self.assertIsNone(checksum_from_year())
+        self.assertFalse(fails_checksum(self.mistyped(2026), checksum_from_year()))
+
+    def test_the_cutover_is_the_first_year_the_allocator_issued(self):
+        allocate_ids(2028, ['ADA OBI'])
+        allocate_ids(2027, ['BOLA ADE'])
+        self.assertEqual(checksum_from_year(), 2027)
+        self.assertTrue(fails_checksum(self.mistyped(2027), 2027))
+        self.assertFalse(fails_checksum(self.mistyped(2026), 2027))
+        self.assertFalse(fails_checksum(format_student_id(2027, 5), 2027))
+        self.assertEqual(check_student_id(self.mistyped(2028)), id_filter.REJECT_CHECKSUM)
+
+    def test_years_with_browser_minted_ids_are_never_checked(self):
+        allocate_ids(2026, ['ADA OBI'])
+        register_existing_ids([{'id': 'EMFHS-2026-K7Q-ZZ', 'name': 'BOLA ADE', 'year': 2026}])
+        self.assertEqual(checksum_from_year(), 2027)
+        self.assertIsNone(check_student_id('EMFHS-2026-K7Q-ZZ'))
+
+    def test_the_setting_pins_the_cutover(self):
+        allocate_ids(2026, ['ADA OBI'])
+        with self.settings(STUDENT_ID_CHECKSUM_FROM_YEAR=2030):
+            self.assertEqual(checksum_from_year(), 2030)
+
+
+# ============ STUDENT ID FILTER ============
+class KnownIdFilterTests(ResultIndexTestCase):
+    def setUp(self):
+        super().setUp()
+        self.known_ids = KnownIdFilter(max_age=0)
+        patcher = mock.patch.object(id_filter, 'known_ids', self.known_ids)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unknown_ids_are_rejected_when_every_folder_is_indexed(self):
+        start_change_tracking(self.drive, log=self.silence)
+        self.assertIsNone(check_student_id('EMFHS-2025-A7K-B9'))
+        self.assertEqual(check_student_id('EMFHS-2025-B2C-D3'), id_filter.REJECT_UNKNOWN)
+
+    def test_ids_in_arm_folders_are_searched(self):
+        self.drive.add_file('EMFHS-2025-B2C-D3.pdf', self.drive.add_folder('JSS1A', self.jss1_id))
+        start_change_tracking(self.drive, log=self.silence)
+        self.assertFalse(self.known_ids.authoritative)
+        self.assertIsNone(check_student_id('EMFHS-2025-B2C-D3'))
+
+    def test_ids_in_unrecognised_folders_are_searched(self):
+        self.drive.add_file('EMFHS-2025-B2C-D3.pdf', self.drive.add_folder('Senior Secondary One', self.term_id))
+        start_change_tracking(self.drive, log=self.silence)
+        self.assertIsNone(check_student_id('EMFHS-2025-B2C-D3'))
+
+    def test_every_id_in_a_name_is_known(self):
+        self.drive.add_file('EMFHS-2024-ZZZ-Q1 EMFHS-2025-B2C-D3.pdf', self.jss1_id)
+        start_change_tracking(self.drive, log=self.silence)
+        self.assertIsNone(check_student_id('EMFHS-2025-B2C-D3'))
+
+
+# ============ PUBLISHING ============
+class RenderReportCardsTests(TestCase):
+    def setUp(self):
+        output = tempfile.TemporaryDirectory()
+        self.addCleanup(output.cleanup)
+        self.output = Path(output.name)
+        self.term_dir = self.output / 'FIRST TERM 2025-2026'
+        self.reports = [
+            ReportCard.objects.create(
+                class_name=class_name, session='2025/2026', term='1', student_name=name, student_id=student_id,
+                data={'studentName': name, 'studentId': student_id, 'totalMarksObtained': 71,
+                      'subjects': [{'name': 'MATHEMATICS', 'test1': 15, 'test2': 16, 'exam': 40, 'total': 71}]},
+            )
+            for class_name, name, student_id in [('JSS1', 'ADA OBI', 'EMFHS-2025-A7K-B9'),
+                                                 ('JSS1', 'CHIDI EZE', 'EMFHS-2025-B2C-D4'),
+                                                 ('SS1', 'FUNKE BELLO', '')]
+        ]
+        ReportCard.objects.create(class_name='JSS1', session='2025/2026', term='2', student_name='ADA OBI',
+                                  data={'studentName': 'ADA OBI'})
+
+    def render(self, **options):
+        out = StringIO()
+        call_command('render_report_cards', term='1', session='2025/2026', output=str(self.output),
+                     workers=2, stdout=out, **options)
+        return out.getvalue()
+
+    def rendered(self):
+        return sorted(str(path.relative_to(self.term_dir)) for path in self.term_dir.glob('*/*.pdf'))
+
+    def test_every_report_becomes_one_single_page_pdf(self):
+        self.assertIn('3 rendered, 0 unchanged, 0 failed', self.render())
+        self.assertEqual(self.rendered(), ['JSS1/ADA OBI EMFHS-2025-A7K-B9.pdf', 'JSS1/CHIDI EZE EMFHS-2025-B2C-D4.pdf',
+                                           'SS1/FUNKE BELLO.pdf'])
+        for path in self.term_dir.glob('*/*.pdf'):
+            content = path.read_bytes()
+            self.assertTrue(content.startswith(b'%PDF'), path.name)
+            self.assertEqual(len(re.findall(rb'/Type\s*/Page\b', content)), 1, path.name)
+
+    def test_a_second_run_renders_only_what_changed(self):
+        self.render()
+        self.assertIn('0 rendered, 3 unchanged', self.render())
+
+        ada, chidi, _ = self.reports
+        ada.data['totalMarksObtained'] = 72
+        ada.save()
+        chidi.student_name = 'CHIDI EZE-OBI'
+        chidi.save()
+        self.assertIn('2 rendered, 0 unchanged', self.render(class_name='JSS1'))
+        self.assertIn('JSS1/CHIDI EZE-OBI EMFHS-2025-B2C-D4.pdf', self.rendered())
+        self.assertNotIn('JSS1/CHIDI EZE EMFHS-2025-B2C-D4.pdf', self.rendered())
+
+        chidi.delete()
+        self.render()
+        self.assertEqual(self.rendered(), ['JSS1/ADA OBI EMFHS-2025-A7K-B9.pdf', 'SS1/FUNKE BELLO.pdf'])
+
+
+class PooledTransportTests(SimpleTestCase):
+    """One Drive client on PooledHttp used from many threads against a local FakeDriveServer"""
+
+    def setUp(self):
+        drive = FakeDrive()
+        class_id = drive.add_folder('JSS1', drive.main_folder_id)
+        for name in ('EMFHS-2025-A7K-B9.pdf', 'EMFHS-2025-B2C-D3.pdf', 'EMFHS-2025-C3D-E4.pdf'):
+            drive.add_file(name, class_id)
+        self.query = f"'{class_id}' in parents and trashed=false"
+        self.server = FakeDriveServer(drive).start()
+        self.addCleanup(self.server.stop)
+        self.http = PooledHttp(self.server.credentials(), pool_size=4)
+        self.client = self.server.client(http=self.http)
+
+    def list_class(self, _=None):
+        return [item['name'] for item in self.client.files().list(q=self.query, fields='files(id, name)')
+                .execute()['files']]
+
+    def list_from_threads(self, calls=48):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            return list(pool.map(self.list_class, range(calls)))
+
+    def test_threads_share_one_connection_pool_and_one_token(self):
+        results = self.list_from_threads()
+        self.assertTrue(all(len(names) == 3 for names in results))
+        self.assertEqual(self.http.refresh_count, 1)
+        self.assertEqual(self.server.stats['token_refreshes'], 1)
+        self.assertLessEqual(self.server.stats['connections'], 4)
+
+    def test_a_rejected_token_is_refreshed_once_for_every_thread(self):
+        self.list_class()
+        self.server.tokens.clear()  # Drive revokes the token
+        results = self.list_from_threads()
+        self.assertTrue(all(len(names) == 3 for names in results))
+        self.assertEqual(self.http.refresh_count, 2)
+        self.assertEqual(self.server.stats['token_refreshes'], 2)
+
+
+class PublishToFakeDriveServerTests(SimpleTestCase):
+    """DrivePublisher uploading through the real Drive client to a local FakeDriveServer"""
+
+    def setUp(self):
+        self.drive = FakeDrive()
+        self.term_id = self.drive.add_folder('FIRST TERM 2025-2026', self.drive.main_folder_id)
+        self.server = FakeDriveServer(self.drive).start()
+        self.addCleanup(self.server.stop)
+        self.service = fake_drive_service(self.drive)
+        self.service.service = self.server.client(http=PooledHttp(self.server.credentials(), pool_size=4))
+
+        source = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.source = Path(source.name)
+        self.write('JSS1', 'ADA OBI EMFHS-2025-A7K-B9.pdf', b'%PDF-1.4 ada ' + bytes(range(256)) * 40)
+        self.write('JSS1', 'BOLA ADE EMFHS-2025-B2C-D3.pdf', b'%PDF-1.4 bola')
+        self.write('JSS2', 'CHI EZE EMFHS-2025-C3D-E4.pdf', b'%PDF-1.4 chi')
+
+    def write(self, class_name, name, content):
+        path = self.source / term_folder_name(1, '2025/2026') / class_name / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    def publish(self, **kwargs):
+        # 256 KB chunks are the smallest Drive takes; the first card spans several at this size
+        publisher = DrivePublisher(self.service, max_workers=3, retry_delay=0, log=lambda *args: None, **kwargs)
+        return publisher.publish(self.source, 1, '2025/2026')
+
+    def remote_pdfs(self):
+        """{'CLASS/name': content} of every PDF in the fake Drive"""
+        folders = {file_id: item['name'] for file_id, item in self.drive.files.items()
+                   if item['mimeType'] == 'application/vnd.google-apps.folder'}
+        return {f"{folders[item['parents'][0]]}/{item['name']}": item['content']
+                for item in self.drive.files.values() if item['mimeType'] == 'application/pdf'}
+
+    def local_pdfs(self):
+        term_dir = self.source / term_folder_name(1, '2025/2026')
+        return {f"{path.parent.name}/{path.name}": path.read_bytes() for path in term_dir.glob('*/*.pdf')}
+
+    def test_publishing_creates_the_class_folders_and_uploads_every_card(self):
+        summary = self.publish()
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged'], summary['failed']),
+                         (3, 0, 0, 0))
+        self.assertEqual(self.remote_pdfs(), self.local_pdfs())
+        class_folders = sorted(item['name'] for item in self.drive.files.values() if item['parents'] == [self.term_id])
+        self.assertEqual(class_folders, ['JSS1', 'JSS2'])
+
+    def test_large_cards_go_up_in_several_chunks(self):
+        self.write('JSS1', 'ADA OBI EMFHS-2025-A7K-B9.pdf', bytes(600 * 1024))
+        publisher = DrivePublisher(self.service, max_workers=1, chunk_size=256 * 1024, log=lambda *args: None)
+        publisher.publish(self.source, 1, '2025/2026')
+        self.assertEqual(publisher.stats['chunks'], 5)  # 3 for the large card, 1 each for the others
+        self.assertEqual(self.remote_pdfs(), self.local_pdfs())
+
+    def test_republishing_overwrites_instead_of_duplicating(self):
+        self.publish()
+        ids_before = {item['name']: file_id for file_id, item in self.drive.files.items()}
+        self.write('JSS1', 'BOLA ADE EMFHS-2025-B2C-D3.pdf', b'%PDF-1.4 bola, corrected')
+
+        summary = self.publish()
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (0, 1, 2))
+        self.assertEqual(self.remote_pdfs(), self.local_pdfs())
+        ids_after = {item['name']: file_id for file_id, item in self.drive.files.items()}
+        self.assertEqual(ids_after, ids_before)
+
+    def test_a_dropped_chunk_is_resumed(self):
+        self.drive.fail_chunks = 2
+        summary = self.publish()
+        self.assertEqual((summary['created'], summary['failed'], summary['retries']), (3, 0, 2))
+        self.assertEqual(self.remote_pdfs(), self.local_pdfs())
+
+    def test_a_card_that_keeps_failing_is_reported_and_the_rest_are_published(self):
+        self.drive.fail_chunks = 100
+        summary = self.publish(max_retries=1)
+        self.assertEqual((summary['created'], summary['failed']), (0, 3))
+        self.drive.fail_chunks = 0
+        summary = self.publish()
+        self.assertEqual((summary['created'], summary['failed']), (3, 0))
+        self.assertEqual(self.remote_pdfs(), self.local_pdfs())
+
+    def test_a_missing_term_is_an_error(self):
+        with self.assertRaises(PublishError):
+            DrivePublisher(self.service, log=lambda *args: None).publish(self.source, 2, '2025/2026')
 
-# Create your tests here.
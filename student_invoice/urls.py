@@ -25,6 +25,28 @@ urlpatterns = [
 
 
     path('student_report_card_maker/', views.student_report_card_maker, name="student_report_card_maker"),
+    path('general/staff_broadsheet/', views.staff_broadsheet, name='staff_broadsheet'),
+    path('general/staff_broadsheet/benchmark/', views.broadsheet_benchmark, name='broadsheet_benchmark'),
+
+    path('api/grading/', views.grade_class_api, name='grade_class_api'),
+    path('api/broadsheet/', views.broadsheet_api, name='broadsheet_api'),
+    path('api/broadsheet/export/', views.broadsheet_export_api, name='broadsheet_export_api'),
+    path('api/student-ids/', views.student_ids_api, name='student_ids_api'),
+    path('api/student-ids/import/', views.import_student_ids_api, name='import_student_ids_api'),
+    path('api/student-ids/<str:student_id>/', views.student_id_detail_api, name='student_id_detail_api'),
+    path('api/report-cards/', views.report_cards_api, name='report_cards_api'),
+    path('api/report-cards/import/', views.import_report_cards_api, name='import_report_cards_api'),
+    path('api/report-cards/<int:report_id>/', views.report_card_detail_api, name='report_card_detail_api'),
+    path('api/fees/invoices/', views.fee_invoices_api, name='fee_invoices_api'),
+    path('api/fees/invoices/<int:invoice_id>/', views.fee_invoice_detail_api, name='fee_invoice_detail_api'),
+    path('api/fees/payments/', views.fee_payments_api, name='fee_payments_api'),
+    path('api/fees/payments/<int:payment_id>/', views.fee_payment_detail_api, name='fee_payment_detail_api'),
+    path('api/fees/outstanding/', views.outstanding_fees_api, name='outstanding_fees_api'),
+
+    path('search/', views.search_result, name='search'),
+    path('download/', views.download_pdf, name='download'),
+    path('preview/', views.preview_pdf, name='preview'),
+    path('api/drive/class-files/', views.class_files_api, name='class_files_api'),
 
 
     # path('ss1_exam_result_view', views.ss1_exam_result_view, name='ss1_exam_result'),
@@ -33,7 +55,6 @@ urlpatterns = [
     # path('jss1_exam_result_view', views.jss1_exam_result_view, name='jss1_exam_result'),
     # path('jss2_exam_result_view', views.jss2_exam_result_view, name='jss2_exam_result'),
     # path('jss3_exam_result_view', views.jss3_exam_result_view, name='jss3_exam_result'),
-    # path('general/staff_broadsheet/', views.staff_broadsheet, name='staff_broadsheet'),
 
     # path('student_result_search/', views.student_result_search, name="student_result_search"),
     
@@ -1,21 +1,47 @@
 # ResultChecker/views.py - COMPLETE VERSION
-from django.http import JsonResponse, HttpResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.http import JsonResponse, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.views.decorators.http import require_http_methods
 from django.contrib.admin.views.decorators import staff_member_required
 from django.core.cache import cache
-from googleapiclient.http import MediaIoBaseDownload
 import io
 import traceback
 from django.conf import settings
 from django.contrib.auth.decorators import login_required  # ADD THIS IMPORT
 
 from django.shortcuts import render, redirect
+from django.core.paginator import Paginator
+from django.db.models import Q
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+
+from .async_drive import DriveBusy, drive_pool
+from .billing import _class_key
+from .broadsheet import Broadsheet, BroadsheetError
+from .downloads import allow_downloads, build_download_response, get_download_metadata
+from .drive_service import DriveFileNotFound, FolderNotFound, drive_service
+from .fee_ledger import (
+    LedgerError, balance_json, delete_invoice, delete_payment, invoice_json, outstanding_balances,
+    outstanding_summary, payment_json, record_payment, save_invoice,
+)
+from .grading import GradingError, grade_class_payload
+from .id_filter import check_student_id, known_ids
+from .models import Invoice, Payment, ReportCard, StudentRecord
+from .pdf_cache import pdf_cache
+from .report_store import (
+    DuplicateReport, ReportStoreError, VersionConflict, import_reports, patch_report,
+    report_detail, report_summary, save_report,
+)
+from .result_index import normalize_class_name, normalize_session, normalize_term
+from .student_ids import (
+    StudentIdError, allocate_ids, has_valid_checksum, register_existing_ids, student_record_json,
+)
 
 
 
@@ -29,17 +55,20 @@ def dashboard_exam_page(request):
 
 
 
+@ensure_csrf_cookie  # The page saves invoices to the fee ledger
 def term_end_account(request):
     """Main page for parents to search results"""
     return render(request, "invoice/term_end_account.html")
 
 
 
+@ensure_csrf_cookie  # The page saves invoices to the fee ledger
 def new_term_bill_payment(request):
     """Main page for parents to search results"""
     return render(request, "invoice/new_term_bill.html")
 
 
+@ensure_csrf_cookie  # IDs are allocated by POSTing to the student ID API
 def student_id_maker(request):
     """Main page for parents to search results"""
     return render(request, "invoice/student_id_maker.html")
@@ -49,10 +78,770 @@ def student_report_card_maker(request):
     """Main page for parents to search results"""
     return render(request, "invoice/student_report_card_maker.html")
 
+@ensure_csrf_cookie  # The page POSTs scores to the broadsheet API
 def staff_broadsheet(request):
     return render(request, "invoice/staff_broadsheet.html")
 
 
+@ensure_csrf_cookie
+def broadsheet_benchmark(request):
+    """Virtualized broadsheet vs. the old full-DOM table (?students=1000&subjects=20)"""
+    return render(request, "invoice/broadsheet_benchmark.html")
+
+
+# ============ JSON API ACCESS ============
+def _report_error(message, status=400, **extra):
+    return JsonResponse({'success': False, 'message': message, **extra}, status=status)
+
+
+def _staff_denied(user):
+    """The JSON error for a user who may not use the staff APIs, or None"""
+    if not user.is_authenticated:
+        return _report_error('Please log in as staff', status=401)
+    if not (user.is_active and user.is_staff):
+        return _report_error('Staff access only', status=403)
+    return None
+
+
+def staff_api(view):
+    """
+    Staff-only JSON API view
+    Like staff_member_required, but answers 401/403 JSON instead of redirecting
+    the pages' fetch() calls to a login form. Write methods still need the CSRF
+    token (CsrfViewMiddleware; none of these views are csrf_exempt).
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return _staff_denied(request.user) or view(request, *args, **kwargs)
+    return wrapper
+
+
+# ============ CLASS GRADING API ============
+@require_http_methods(["POST"])
+@staff_api
+def grade_class_api(request):
+    """Grade a whole class at once (totals, grades, remarks, percentages, positions)"""
+    try:
+        payload = json.loads(request.body)
+        students = grade_class_payload(payload)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid request data'
+        }, status=400)
+    except GradingError as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        }, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'count': len(students),
+        'students': students
+    })
+
+
+# ============ BROADSHEET API ============
+# GET builds the broadsheet from the saved report cards (?class_name=&session=&term=);
+# POST computes it for the scores typed on the staff broadsheet page.
+
+def _load_broadsheet(request):
+    """Broadsheet for this request, plus a file name stem for exports"""
+    if request.method == 'POST':
+        try:
+            payload = json.loads(request.body)
+        except json.JSONDecodeError:
+            raise BroadsheetError('Invalid request data')
+        sheet = Broadsheet.from_payload(payload)
+        title = str(payload.get('title') or 'broadsheet') if isinstance(payload, dict) else 'broadsheet'
+        return sheet, title
+    
+    class_name = normalize_class_name(request.GET.get('class_name', ''))
+    session = normalize_session(request.GET.get('session', ''))
+    term = request.GET.get('term', '').strip()
+    if not class_name or not session or term not in ('1', '2', '3'):
+        raise BroadsheetError('class_name, session (e.g. 2025/2026) and term (1-3) are required')
+    return Broadsheet.from_report_cards(class_name, session, term), f"{class_name} {session} term {term}"
+
+
+@require_http_methods(["GET", "POST"])
+@staff_api
+def broadsheet_api(request):
+    """Totals, averages, positions and subject statistics for a class"""
+    try:
+        sheet, _ = _load_broadsheet(request)
+    except BroadsheetError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    return JsonResponse({'success': True, 'count': len(sheet.students), **sheet.as_json()})
+
+
+@require_http_methods(["GET", "POST"])
+@staff_api
+def broadsheet_export_api(request):
+    """The computed broadsheet as a streamed CSV (?format=csv, default) or XLSX file"""
+    export_format = request.GET.get('format', 'csv').lower()
+    if export_format not in ('csv', 'xlsx'):
+        return JsonResponse({'success': False, 'message': 'format must be csv or xlsx'}, status=400)
+    try:
+        sheet, title = _load_broadsheet(request)
+    except BroadsheetError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    filename = ''.join(c if c.isalnum() or c in ' -_' else '-' for c in title).strip() or 'broadsheet'
+    if export_format == 'xlsx':
+        response = StreamingHttpResponse(
+            sheet.iter_xlsx(title=filename),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+    else:
+        response = StreamingHttpResponse(sheet.iter_csv(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+# ============ REPORT CARD STORE API ============
+# Exam result pages save report cards here instead of in localStorage (see report_store.py)
+
+@ensure_csrf_cookie  # The exam result pages call this first; it gives them the token for saves
+@require_http_methods(["GET", "POST", "DELETE"])
+@staff_api
+def report_cards_api(request):
+    """List (paginated summaries), save a full report, or clear a class"""
+    if request.method == 'GET':
+        reports = ReportCard.objects.only(
+            'id', 'class_name', 'session', 'term', 'student_name', 'student_id', 'subject_count',
+            'total_obtained', 'total_obtainable', 'result', 'version', 'updated_at',
+        )
+        for field in ('class_name', 'session', 'term', 'student_id'):
+            value = request.GET.get(field, '').strip()
+            if value:
+                reports = reports.filter(**{field: value.upper()})
+        query = request.GET.get('q', '').strip()
+        if query:
+            reports = reports.filter(Q(student_name__icontains=query) | Q(student_id__icontains=query))
+        
+        try:
+            page_size = min(max(int(request.GET.get('page_size', 50)), 1), 200)
+        except ValueError:
+            page_size = 50
+        page = Paginator(reports, page_size).get_page(request.GET.get('page'))
+        
+        return JsonResponse({
+            'success': True,
+            'count': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'has_next': page.has_next(),
+            'reports': [report_summary(report) for report in page],
+        })
+    
+    if request.method == 'DELETE':
+        class_name = request.GET.get('class_name', '').strip().upper()
+        if not class_name:
+            return _report_error('class_name is required')
+        deleted, _ = ReportCard.objects.filter(class_name=class_name).delete()
+        return JsonResponse({'success': True, 'deleted': deleted})
+    
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            return _report_error('Invalid request data')
+        report, created = save_report(payload.get('class_name', ''), payload.get('data'),
+                                      client_id=str(payload.get('client_id') or '')[:255])
+    except json.JSONDecodeError:
+        return _report_error('Invalid request data')
+    except ReportStoreError as e:
+        return _report_error(str(e))
+    
+    return JsonResponse({'success': True, 'created': created, 'report': report_summary(report)},
+                        status=201 if created else 200)
+
+
+@require_http_methods(["GET", "PATCH", "DELETE"])
+@staff_api
+def report_card_detail_api(request, report_id):
+    """Load one report, apply a delta save, or delete it"""
+    if request.method == 'PATCH':
+        try:
+            payload = json.loads(request.body)
+            if not isinstance(payload, dict):
+                return _report_error('Invalid request data')
+            report = patch_report(report_id, payload.get('version'), payload.get('changes'))
+        except json.JSONDecodeError:
+            return _report_error('Invalid request data')
+        except ReportCard.DoesNotExist:
+            return _report_error('Report not found', status=404)
+        except (ReportStoreError, ValueError, TypeError) as e:
+            return _report_error(str(e))
+        except VersionConflict as e:
+            # Someone else saved first: send the current document so the page can reload it
+            return _report_error('Report was changed elsewhere', status=409, report=report_detail(e.report))
+        except DuplicateReport as e:
+            return _report_error(str(e), status=409)
+        return JsonResponse({'success': True, 'report': report_summary(report)})
+    
+    try:
+        report = ReportCard.objects.get(pk=report_id)
+    except ReportCard.DoesNotExist:
+        return _report_error('Report not found', status=404)
+    
+    if request.method == 'DELETE':
+        report.delete()
+        return JsonResponse({'success': True})
+    
+    return JsonResponse({'success': True, 'report': report_detail(report)})
+
+
+@require_http_methods(["POST"])
+@staff_api
+def import_report_cards_api(request):
+    """Bulk import the reports a browser saved in localStorage"""
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            return _report_error('Invalid request data')
+        created, updated = import_reports(payload.get('class_name', ''), payload.get('reports'))
+    except json.JSONDecodeError:
+        return _report_error('Invalid request data')
+    except ReportStoreError as e:
+        return _report_error(str(e))
+    
+    return JsonResponse({'success': True, 'created': created, 'updated': updated})
+
+
+# ============ STUDENT ID API ============
+# The student ID maker allocates IDs here instead of minting them in the browser (see student_ids.py)
+
+@require_http_methods(["GET", "POST"])
+@staff_api
+def student_ids_api(request):
+    """List issued IDs (paginated), or allocate IDs for one or many names"""
+    if request.method == 'GET':
+        records = StudentRecord.objects.all()
+        year = request.GET.get('year', '').strip()
+        if year.isdigit():
+            records = records.filter(year=int(year))
+        query = request.GET.get('q', '').strip()
+        if query:
+            records = records.filter(Q(name__icontains=query) | Q(student_id__icontains=query))
+        
+        try:
+            page_size = min(max(int(request.GET.get('page_size', 50)), 1), 500)
+        except ValueError:
+            page_size = 50
+        page = Paginator(records, page_size).get_page(request.GET.get('page'))
+        
+        return JsonResponse({
+            'success': True,
+            'count': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'has_next': page.has_next(),
+            'students': [student_record_json(record) for record in page],
+        })
+    
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            return _report_error('Invalid request data')
+        names = payload.get('names')
+        if names is None and payload.get('name'):
+            names = [payload['name']]
+        results = allocate_ids(
+            payload.get('year'), names,
+            class_name=payload.get('class_name', ''),
+            admission_date=_parse_admission_date(payload.get('admission_date')),
+        )
+    except json.JSONDecodeError:
+        return _report_error('Invalid request data')
+    except StudentIdError as e:
+        return _report_error(str(e))
+    
+    created = sum(1 for _, was_created in results if was_created)
+    return JsonResponse({
+        'success': True,
+        'created': created,
+        'skipped': len(results) - created,
+        'students': [student_record_json(record, created=was_created) for record, was_created in results],
+    }, status=201 if created else 200)
+
+
+def _parse_admission_date(value):
+    from django.utils.dateparse import parse_date
+    
+    try:
+        return parse_date(str(value or ''))
+    except ValueError:
+        raise StudentIdError('admission_date must be YYYY-MM-DD')
+
+
+@require_http_methods(["POST"])
+@staff_api
+def import_student_ids_api(request):
+    """Register the IDs a browser minted before the server allocator existed"""
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            return _report_error('Invalid request data')
+        registered, known = register_existing_ids(payload.get('students'))
+    except json.JSONDecodeError:
+        return _report_error('Invalid request data')
+    except StudentIdError as e:
+        return _report_error(str(e))
+    
+    return JsonResponse({'success': True, 'registered': registered, 'already_registered': known})
+
+
+@require_http_methods(["GET", "DELETE"])
+@staff_api
+def student_id_detail_api(request, student_id):
+    """Look up (and checksum-validate) one ID, or withdraw it"""
+    student_id = student_id.strip().upper()
+    record = StudentRecord.objects.filter(student_id=student_id).first()
+    
+    if request.method == 'DELETE':
+        if record is None:
+            return _report_error('Student ID not found', status=404)
+        record.delete()
+        return JsonResponse({'success': True})
+    
+    return JsonResponse({
+        'success': True,
+        'student_id': student_id,
+        'valid_checksum': has_valid_checksum(student_id),
+        'registered': record is not None,
+        'student': student_record_json(record) if record else None,
+    })
+
+
+# ============ FEE LEDGER API ============
+# The term bill and term-end account pages save their invoices here (see fee_ledger.py)
+
+def _parse_ledger_date(value, field):
+    from django.utils.dateparse import parse_date
+    
+    if not value:
+        return None
+    try:
+        parsed = parse_date(str(value))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise LedgerError(f'{field} must be YYYY-MM-DD')
+    return parsed
+
+
+def _page_size(request, default=50, maximum=500):
+    try:
+        return min(max(int(request.GET.get('page_size', default)), 1), maximum)
+    except ValueError:
+        return default
+
+
+@require_http_methods(["GET", "POST"])
+@staff_api
+def fee_invoices_api(request):
+    """List invoices (paginated), or save one from a bill page"""
+    if request.method == 'GET':
+        invoices = Invoice.objects.all()
+        # Same canonical forms save_invoice() stores, so '2025-2026', '2' and 'jss 1' all match
+        normalizers = {
+            'session': normalize_session,
+            'term': normalize_term,
+            'class_name': lambda value: _class_key(value)[:10],
+            'student_id': str.upper,
+            'kind': str,
+        }
+        for field, normalize in normalizers.items():
+            value = request.GET.get(field, '').strip()
+            if value:
+                invoices = invoices.filter(**{field: normalize(value) or value})
+        query = request.GET.get('q', '').strip()
+        if query:
+            invoices = invoices.filter(Q(student_name__icontains=query) | Q(student_id__icontains=query))
+        page = Paginator(invoices, _page_size(request)).get_page(request.GET.get('page'))
+        
+        return JsonResponse({
+            'success': True,
+            'count': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'has_next': page.has_next(),
+            'invoices': [invoice_json(invoice) for invoice in page],
+        })
+    
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            return _report_error('Invalid request data')
+        invoice, created = save_invoice(
+            payload.get('kind', Invoice.KIND_TERM_BILL),
+            payload.get('session', ''),
+            payload.get('term', ''),
+            payload.get('class_name', ''),
+            payload.get('student_name', ''),
+            student_id=payload.get('student_id', ''),
+            items=payload.get('items') or [],
+            due_date=_parse_ledger_date(payload.get('due_date'), 'due_date'),
+            late_fee=payload.get('late_fee') or 0,
+            bank_details=payload.get('bank_details'),
+            payment_notes=payload.get('payment_notes'),
+        )
+    except json.JSONDecodeError:
+        return _report_error('Invalid request data')
+    except LedgerError as e:
+        return _report_error(str(e))
+    
+    return JsonResponse({'success': True, 'created': created, 'invoice': invoice_json(invoice, items=True)},
+                        status=201 if created else 200)
+
+
+@require_http_methods(["GET", "DELETE"])
+@staff_api
+def fee_invoice_detail_api(request, invoice_id):
+    """One invoice with its fee lines and payments, or delete it"""
+    try:
+        if request.method == 'DELETE':
+            delete_invoice(invoice_id)
+            return JsonResponse({'success': True})
+        invoice = Invoice.objects.get(pk=invoice_id)
+    except Invoice.DoesNotExist:
+        return _report_error('Invoice not found', status=404)
+    
+    return JsonResponse({'success': True, 'invoice': invoice_json(invoice, items=True)})
+
+
+@require_http_methods(["POST"])
+@staff_api
+def fee_payments_api(request):
+    """Record a payment against an invoice"""
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            return _report_error('Invalid request data')
+        payment = record_payment(
+            payload.get('invoice_id'),
+            payload.get('amount'),
+            paid_on=_parse_ledger_date(payload.get('paid_on'), 'paid_on'),
+            method=payload.get('method', ''),
+            reference=payload.get('reference', ''),
+        )
+    except json.JSONDecodeError:
+        return _report_error('Invalid request data')
+    except Invoice.DoesNotExist:
+        return _report_error('Invoice not found', status=404)
+    except (ValueError, TypeError) as e:
+        return _report_error(str(e))
+    
+    return JsonResponse({'success': True, 'payment': payment_json(payment)}, status=201)
+
+
+@require_http_methods(["DELETE"])
+@staff_api
+def fee_payment_detail_api(request, payment_id):
+    try:
+        delete_payment(payment_id)
+    except Payment.DoesNotExist:
+        return _report_error('Payment not found', status=404)
+    return JsonResponse({'success': True})
+
+
+@require_http_methods(["GET"])
+@staff_api
+def outstanding_fees_api(request):
+    """Students still owing for a term (?session=&term=&class_name=), with per-class totals"""
+    session = request.GET.get('session', '').strip()
+    term = request.GET.get('term', '').strip()
+    if not session or not term:
+        return _report_error('session and term are required')
+    
+    balances = outstanding_balances(session, term, request.GET.get('class_name', '').strip())
+    page = Paginator(balances, _page_size(request, default=100)).get_page(request.GET.get('page'))
+    summary = outstanding_summary(session, term)
+    
+    return JsonResponse({
+        'success': True,
+        'count': page.paginator.count,
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'has_next': page.has_next(),
+        'balances': [balance_json(balance) for balance in page],
+        'classes': [{**row, 'owed': f"{row['owed']:.2f}"} for row in summary],
+        'total_owed': f"{sum((row['owed'] for row in summary), 0):.2f}",
+    })
+
+
+# ============ ASYNC DRIVE VIEWS ============
+# search/preview/download are async so a worker can hold many parents waiting on
+# Drive at once; the blocking Drive calls run on drive_pool (see async_drive.py).
+# require_http_methods/csrf_exempt are sync-only in Django 4.2, so methods are checked inline.
+
+def _drive_busy_response(error):
+    response = JsonResponse({
+        'success': False,
+        'message': str(error),
+    }, status=503)
+    response['Retry-After'] = '5'
+    return response
+
+
+# ============ SEARCH FUNCTION - SUPPORTS NEW ID FORMAT ============
+async def search_result(request):
+    """Handle search with NO YEAR RESTRICTIONS - SUPPORTS NEW ID FORMAT"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST method required'}, status=400)
+    
+    try:
+        data = json.loads(request.body)
+        student_name = data.get('student_name', '').strip()
+        student_id = data.get('student_id', '').strip()
+        student_class = data.get('student_class', '').strip()
+        term = data.get('term', '1').strip()
+        session = data.get('session', '2025/2026').strip()
+        
+        print(f"\n🔍 SEARCH (NEW ID FORMAT SUPPORTED):")
+        print(f"   🔑 ID: {student_id}")
+        print(f"   🏫 Class: {student_class}")
+        print(f"   📅 Term: {term} | Session: {session}")
+        
+        # Validate
+        if not student_id:
+            return JsonResponse({
+                'success': False,
+                'message': 'Student ID is required'
+            })
+        
+        if not student_class:
+            return JsonResponse({
+                'success': False,
+                'message': 'Please select class'
+            })
+        
+        # Validate session format
+        if '/' not in session:
+            return JsonResponse({
+                'success': False,
+                'message': 'Invalid session format. Use format: YYYY/YYYY'
+            })
+        
+        # Extract year from ID for information only (NO RESTRICTION)
+        student_id_year = drive_service._extract_year_from_id(student_id)
+        session_start_year = drive_service._extract_year_from_session(session)
+        
+        # Malformed, mistyped or never-issued IDs are answered here, without a Drive slot
+        if known_ids.needs_refresh():
+            await sync_to_async(known_ids.refresh)()
+        id_rejection = check_student_id(student_id, refresh=False)
+        
+        if id_rejection:
+            pdf_files = []
+        else:
+            # Parents refreshing the same result share one Drive search
+            pdf_files = await drive_pool.coalesce(
+                ('search', term, session, student_class.upper(), student_id.upper()),
+                drive_service.search_student_pdf,
+                term,
+                session,
+                student_class,
+                student_name,  # Name is passed but NOT USED for verification
+                student_id
+            )
+        
+        if pdf_files:
+            # Only files a search returned (or the index knows) can be downloaded
+            await sync_to_async(allow_downloads)([pdf.get('id') for pdf in pdf_files])
+            return JsonResponse({
+                'success': True,
+                'files': pdf_files,
+                'count': len(pdf_files),
+                'student_id': student_id,
+                'student_id_year': student_id_year,
+                'session_year': session_start_year,
+                'strict_id_matching': True,
+                'student_name_verification': False,
+                'year_restrictions': False,
+                'id_format': 'NEW: EMFHS-YYYY-XXX-XX (mixed alphanumeric)',
+                'message': f'Found {len(pdf_files)} result(s) with ID: {student_id}'
+            })
+        
+        # Helpful error message with new ID format examples
+        error_msg = f'No results found with Student ID: {student_id} in {student_class}. '
+        error_msg += 'Please check: '
+        error_msg += '1) Exact Student ID spelling '
+        error_msg += '2) Correct class selection '
+        error_msg += '3) Correct term/session '
+        error_msg += '4) Try both old and new ID formats if needed '
+        
+        # Add format guidance
+        format_note = ''
+        if student_id_year:
+            format_note = f'Your ID ({student_id}) appears to be from year {student_id_year}. '
+            format_note += 'New ID format: EMFHS-YYYY-XXX-XX (e.g., EMFHS-2025-A7K-B9) '
+            format_note += 'Old ID format: EMFHS-YYYY-NNN-XX (e.g., EMFHS-2025-001-A4)'
+        
+        return JsonResponse({
+            'success': False,
+            'files': [],
+            'count': 0,
+            'message': error_msg,
+            'format_note': format_note,
+            'id_check': id_rejection,
+            'student_id_year': student_id_year,
+            'session_year': session_start_year,
+            'strict_id_matching': True,
+            'student_name_verification': False,
+            'year_restrictions': False,
+            'id_format': 'Supports both old and new formats'
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid request data'
+        }, status=400)
+    
+    except DriveBusy as e:
+        return _drive_busy_response(e)
+        
+    except Exception as e:
+        print(f"❌ Search error: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'message': 'Search failed. Please try again.'
+        }, status=500)
+
+
+# ============ PREVIEW FUNCTION ============
+async def preview_pdf(request):
+    """Generate preview link for PDF"""
+    file_id = request.GET.get('file_id')
+    
+    if not file_id:
+        return JsonResponse({'error': 'No file selected'}, status=400)
+    
+    try:
+        file_info = await drive_pool.coalesce(('file_info', file_id), drive_service.get_file_info, file_id)
+    except DriveBusy as e:
+        return _drive_busy_response(e)
+    
+    if not file_info:
+        return JsonResponse({
+            'success': False,
+            'error': 'File not found'
+        }, status=404)
+    
+    preview_url = file_info.get('webViewLink', f'https://drive.google.com/file/d/{file_id}/view')
+    
+    return JsonResponse({
+        'success': True,
+        'preview_url': preview_url,
+        'filename': file_info.get('name', 'result.pdf')
+    })
+
+
+# ============ CLASS FILES (STAFF) ============
+MAX_FILE_IDS = 500
+
+
+def _with_preview_url(file_info):
+    file_info['preview_url'] = file_info.get('webViewLink', f"https://drive.google.com/file/d/{file_info['id']}/view")
+    return file_info
+
+
+async def class_files_api(request):
+    """
+    Metadata for a whole class in one Drive round trip (staff only)
+    GET ?term=2&session=2025/2026&class=JSS1  -> every report card in the class folder
+    GET ?file_ids=id1,id2,...                 -> those files (batched files().get)
+    Either way the metadata is cached, so preview/download of these files skip Drive.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    # Filenames carry student IDs: only staff may list a class
+    denied = await sync_to_async(_staff_denied)(request.user)
+    if denied:
+        return denied
+
+    file_ids = [file_id.strip() for file_id in request.GET.get('file_ids', '').split(',') if file_id.strip()]
+    try:
+        if file_ids:
+            if len(file_ids) > MAX_FILE_IDS:
+                return _report_error(f"At most {MAX_FILE_IDS} file IDs per request")
+            found = await drive_pool.coalesce(('files_info', tuple(file_ids)), drive_service.get_files_info, file_ids)
+            files = [_with_preview_url(info) for info in found.values() if info]
+            missing = [file_id for file_id, info in found.items() if info is None]
+        else:
+            term = request.GET.get('term', '').strip()
+            session = request.GET.get('session', '').strip()
+            class_name = request.GET.get('class', '').strip()
+            if not term or '/' not in session or not class_name:
+                return _report_error("Give file_ids, or term, session (YYYY/YYYY) and class")
+            files = await drive_pool.coalesce(
+                ('class_files', term, session, class_name.upper()),
+                drive_service.get_class_files, term, session, class_name,
+            )
+            files = [_with_preview_url(info) for info in files]
+            missing = []
+    except DriveBusy as e:
+        return _drive_busy_response(e)
+    except FolderNotFound as e:
+        return _report_error(str(e), status=404)
+    except Exception as e:
+        print(f"❌ Class files error: {str(e)}")
+        return _report_error('Could not read the files from Drive', status=502)
+
+    await sync_to_async(allow_downloads)([info['id'] for info in files])
+    return JsonResponse({
+        'success': True,
+        'count': len(files),
+        'files': files,
+        'missing': missing,
+    })
+
+
+# ============ DOWNLOAD FUNCTION ============
+async def download_pdf(request):
+    """Stream a report card PDF from Drive (supports Range and conditional GET)"""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    
+    file_id = request.GET.get('file_id')
+    
+    if not file_id:
+        return JsonResponse({'error': 'No file selected'}, status=400)
+    
+    try:
+        metadata = await drive_pool.coalesce(('metadata', file_id), get_download_metadata, drive_service, file_id)
+    except DriveBusy as e:
+        return _drive_busy_response(e)
+    except DriveFileNotFound:
+        return JsonResponse({'error': 'File not found'}, status=404)
+    except Exception as e:
+        print(f"❌ Download error: {str(e)}")
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    md5_checksum = metadata['md5Checksum']
+    
+    def stream_from_drive(start, end):
+        chunks = drive_service.iter_file_content(file_id, start, end)
+        if start == 0 and end == metadata['size'] - 1:
+            # Whole-file downloads fill the local PDF cache on the way through
+            chunks = pdf_cache.tee(file_id, md5_checksum, chunks)
+        # Each chunk is fetched on the Drive pool, never on the event loop
+        return drive_pool.iterate(chunks)
+    
+    return build_download_response(
+        request,
+        metadata,
+        stream_from_drive,
+        cached_path=pdf_cache.get(file_id, md5_checksum),
+        wrap_iterator=drive_pool.iterate
+    )
+
+
 
 # def ss1_exam_result_view(request):
 #     return render(request, 'invoice/ss1_exam_result.html')  # You'll need to create this template